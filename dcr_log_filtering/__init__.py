@@ -2,6 +2,6 @@
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from . import activity, main, cmd_parser, result_data, conn, eventlog_parser, eventlog, graph, marking
+from . import activity, main, cmd_parser, result_data, conn, eventlog_parser, eventlog, graph, marking, replay, transition_cache, automaton, parallel, cleaner, fused, result_cache, incremental, monitor, mining, batch, evaluation, log_cache, roles, timed, diagnostics
 
-__all__ = [activity, main, cmd_parser, result_data, conn, eventlog_parser, eventlog, graph, marking]
+__all__ = [activity, main, cmd_parser, result_data, conn, eventlog_parser, eventlog, graph, marking, replay, transition_cache, automaton, parallel, cleaner, fused, result_cache, incremental, monitor, mining, batch, evaluation, log_cache, roles, timed, diagnostics]
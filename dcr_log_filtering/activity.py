@@ -21,6 +21,7 @@ class DCRActivityBase(ABC):
             raise TypeError('Parameters may not be null')
         self.ActivityId = activity_id
         self.ActivityName = activity_name
+        self.Index = None
         self.Roles = []
         self.IsConditionTarget = False
         self.IsMilestoneTarget = False
@@ -0,0 +1,183 @@
+# coding=utf-8
+"""
+The module compiles a DCR graph into a deterministic finite automaton. The reachable markings of the graph are
+explored once with the marking semantics of ``marking.py``, afterwards the replay of an event is a lookup in the
+dense transition table
+"""
+import hashlib
+import pickle
+from array import array
+from collections import deque
+
+from marking import BitMarking
+
+# Transition table entry of an activity that is blocked or not included in the marking
+VIOLATION = -1
+
+
+class StateExplosionError(Exception):
+    """
+    Raised if the graph has more reachable markings than the automaton may have states
+    """
+    pass
+
+
+class DCRAutomaton(object):
+    """
+    Deterministic automaton of a DCR graph. The states are the reachable markings, state 0 is the initial marking
+    """
+
+    def __init__(self, activity_ids, transitions, accepting, fingerprint=None):
+        """
+        Constructor of the automaton
+        :param activity_ids: dict that maps the activity names to the columns of the transition table
+        :param transitions: array with len(accepting) * len(activity_ids) entries, the successor state of state s
+        and activity a is at s * len(activity_ids) + a, VIOLATION if the activity is blocked
+        :param accepting: bytearray with a 1 for every state without included pending responses
+        :param fingerprint: hash of the DCR graph xml the automaton was compiled from
+        """
+        self.ActivityIds = activity_ids
+        self.Width = len(activity_ids)
+        self.Transitions = transitions
+        self.Accepting = accepting
+        self.Fingerprint = fingerprint
+
+    @staticmethod
+    def compile_graph(dcr_graph, max_states=100000, marking_class=BitMarking, fingerprint=None):
+        """
+        Explores the reachable markings of the graph breadth-first and builds the automaton
+        :param dcr_graph: the graph to be compiled
+        :param max_states: the maximal number of states, StateExplosionError is raised if there are more
+        :param marking_class: the marking engine whose semantics are compiled
+        :param fingerprint: hash of the DCR graph xml that is stored with the automaton
+        :return: the DCRAutomaton
+        """
+        activity_ids = {}
+        nodes = []
+        for activity_name in dcr_graph.NameMappings:
+            node = dcr_graph.get_node_by_name(activity_name)
+            if node is not None:
+                activity_ids[activity_name] = len(nodes)
+                nodes.append(node)
+
+        marking = marking_class.get_initial_marking(dcr_graph)
+        states = {marking.get_key(): 0}
+        queue = deque([marking.get_key()])
+        transitions = array('i')
+        accepting = bytearray()
+        while queue:
+            key = queue.popleft()
+            marking.set_key(key)
+            accepting.append(1 if marking.is_accepting() else 0)
+            for node in nodes:
+                marking.set_key(key)
+                if marking.perform_transition_node(node):
+                    transitions.append(VIOLATION)
+                    continue
+                successor = marking.get_key()
+                state = states.get(successor)
+                if state is None:
+                    if len(states) >= max_states:
+                        raise StateExplosionError('The graph has more than {} reachable markings'.format(max_states))
+                    state = len(states)
+                    states[successor] = state
+                    queue.append(successor)
+                transitions.append(state)
+        return DCRAutomaton(activity_ids, transitions, accepting, fingerprint)
+
+    @staticmethod
+    def get_fingerprint(xml_path):
+        """
+        Gets the hash of a DCR graph xml file, it is used to detect automata of changed graphs
+        :param xml_path: path to the DCR graph xml
+        :return: hex digest of the file content
+        """
+        with open(xml_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    @staticmethod
+    def load(path):
+        """
+        Loads an automaton that was saved with save
+        :param path: path of the automaton file
+        :return: the DCRAutomaton
+        """
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        return DCRAutomaton(data['activity_ids'], data['transitions'], data['accepting'], data['fingerprint'])
+
+    def save(self, path):
+        """
+        Saves the automaton to a file
+        :param path: path of the automaton file
+        """
+        data = {
+            'activity_ids': self.ActivityIds,
+            'transitions': self.Transitions,
+            'accepting': self.Accepting,
+            'fingerprint': self.Fingerprint
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(data, f)
+
+    def get_state_count(self):
+        """
+        Gets the number of states of the automaton
+        :return: the number of states
+        """
+        return len(self.Accepting)
+
+    def check_activities(self, activity_names):
+        """
+        Replays a sequence of activities on the automaton, activities that are not in the graph are skipped
+        :param activity_names: iterable of the activity names of a trace
+        :return: True if the sequence violates the graph, False if it is conformant
+        """
+        activity_ids = self.ActivityIds
+        transitions = self.Transitions
+        width = self.Width
+        state = 0
+        for activity_name in activity_names:
+            activity = activity_ids.get(activity_name)
+            if activity is None:
+                continue
+            state = transitions[state * width + activity]
+            if state == VIOLATION:
+                return True
+        return not self.Accepting[state]
+
+
+def get_automaton(dcr_graph, xml_path, automaton_path=None, max_states=100000):
+    """
+    Gets the automaton of a graph. A saved automaton is reused if it was compiled from the same graph xml,
+    otherwise the graph is compiled and the automaton saved
+    :param dcr_graph: the graph
+    :param xml_path: path of the DCR graph xml
+    :param automaton_path: optional path the automaton is loaded from and saved to
+    :param max_states: the maximal number of states of the automaton
+    :return: the DCRAutomaton, raises StateExplosionError if the graph has too many reachable markings
+    """
+    fingerprint = DCRAutomaton.get_fingerprint(xml_path)
+    if automaton_path is not None:
+        try:
+            automaton = DCRAutomaton.load(automaton_path)
+            if automaton.Fingerprint == fingerprint:
+                return automaton
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+            pass
+    automaton = DCRAutomaton.compile_graph(dcr_graph, max_states, fingerprint=fingerprint)
+    if automaton_path is not None:
+        automaton.save(automaton_path)
+    return automaton
+
+
+def replay_automaton(automaton, event_log, ca):
+    """
+    Replays every trace variant of the event log on the automaton
+    :param automaton: the DCRAutomaton
+    :param event_log: the event log
+    :param ca: the RuleViolation object the violating traces are appended to
+    """
+    for activity_names, traces in event_log.get_variants().items():
+        if automaton.check_activities(activity_names):
+            ca.append_variant_data(traces, True)
@@ -0,0 +1,99 @@
+# coding=utf-8
+"""
+The module implements the batch experiment runner that produces the Results/ grid of graph x miner in one invocation.
+Every event log is parsed once, all graphs are replayed against its shared trace variants and the miners of a graph
+run in parallel. Cells whose result file exists are skipped, thus an interrupted batch can be resumed
+
+The manifest is a JSON file:
+{
+    "output_dir": "Results",
+    "logs": {"<log name>": {"path": "<xes file>", "labels": "<csv file with trace id and label per row>"}},
+    "graphs": {"<graph name>": {"path": "<dcr graph xml>", "log": "<log name>"}},
+    "miners": ["alpha", "alpha_plus", "heuristics", "ilp", "inductive"],
+    "timeout": null
+}
+"""
+import json
+import os
+
+import pm4py
+
+import evaluation
+import mining
+import replay
+from graph import DCRGraph
+from marking import BitMarking
+
+
+def get_result_path(output_dir, graph_name, cell):
+    """
+    Gets the path of the result file of a cell
+    :param output_dir: the output directory
+    :param graph_name: the name of the graph
+    :param cell: the miner name or trace for the filter itself
+    :return: the path of the csv file
+    """
+    return os.path.join(output_dir, 'results_{}_{}.csv'.format(graph_name, cell))
+
+
+def run_batch(manifest_path):
+    """
+    Runs all cells of the manifest that have no result file yet
+    :param manifest_path: path of the manifest
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    output_dir = manifest.get('output_dir', 'Results')
+    miner_names = manifest.get('miners', list(mining.miners))
+    timeout = manifest.get('timeout')
+    os.makedirs(output_dir, exist_ok=True)
+
+    for log_name, log_entry in manifest['logs'].items():
+        graphs = {graph_name: graph_entry for graph_name, graph_entry in manifest['graphs'].items()
+                  if graph_entry['log'] == log_name}
+        open_cells = {graph_name: [cell for cell in ['trace'] + miner_names
+                                   if not os.path.exists(get_result_path(output_dir, graph_name, cell))]
+                      for graph_name in graphs}
+        if not any(open_cells.values()):
+            print(f"All cells of the log {log_name} are done")
+            continue
+
+        # The log is parsed once for all graphs and miners
+        log_df = pm4py.read_xes(log_entry['path'])
+        traces = log_df.groupby('case:concept:name', sort=False)['concept:name'].agg(tuple)
+        event_log = None
+        trace_ids = traces.index.to_numpy(dtype=str)
+        y_true = evaluation.get_label_array(trace_ids, *evaluation.read_labels(log_entry['labels']))
+
+        # All graphs with open cells are checked in a single pass over the trace variants
+        graph_names = [graph_name for graph_name in graphs if open_cells[graph_name]]
+        dcr_graphs = [DCRGraph(graphs[graph_name]['path']) for graph_name in graph_names]
+        violating_sets = replay.replay_multi_graph(dcr_graphs, traces.items(), BitMarking)
+        print(f"Log {log_name}: {len(traces)} traces checked against {len(dcr_graphs)} graphs")
+
+        for graph_name, violating in zip(graph_names, violating_sets):
+            cells = open_cells[graph_name]
+            predictions = {}
+            if 'trace' in cells:
+                predictions[get_result_path(output_dir, graph_name, 'trace')] = \
+                    evaluation.get_prediction_array(trace_ids, violating)
+
+            cell_miners = [cell for cell in cells if cell != 'trace']
+            if cell_miners:
+                filtered_df = log_df[~log_df['case:concept:name'].isin(violating)]
+                results = mining.run_miners(filtered_df, cell_miners, timeout)
+                for miner_name in cell_miners:
+                    result = results[miner_name]
+                    print(f"{graph_name} x {miner_name}: {result.Status} after {result.WallTime:.2f}s")
+                    if result.Status != 'ok':
+                        continue
+                    if event_log is None:
+                        event_log = pm4py.convert_to_event_log(log_df)
+                    net, im, fm = result.PetriNet
+                    diagnostics = pm4py.conformance_diagnostics_token_based_replay(event_log, net, im, fm)
+                    unfit_ids = [trace.attributes['concept:name'] for trace, diagnostic in zip(event_log, diagnostics)
+                                 if not diagnostic['trace_is_fit']]
+                    predictions[get_result_path(output_dir, graph_name, miner_name)] = \
+                        evaluation.get_prediction_array(trace_ids, unfit_ids)
+            # All cells of the graph are evaluated in one vectorized pass
+            evaluation.evaluate(y_true, predictions)
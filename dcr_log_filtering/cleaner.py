@@ -1,22 +1,173 @@
+# coding=utf-8
+"""
+This module filters an event log in a single streaming pass, either by a list of violating trace ids or by any
+other decision that is made per trace while the log is parsed
+"""
+import os
 from xml.etree import ElementTree as Etree
+from xml.sax.saxutils import quoteattr
+
 
 def filter_event_log(event_log_path, output_file_name, trace_list, ns=''):
-    event_log = Etree.parse(event_log_path)
-    root = event_log.getroot()
-    all_traces = root.findall(ns + 'trace')
+    """
+    Streams the XES file once and writes every trace that is not in the trace list directly to the output file.
+    The log attributes, extensions, globals and classifiers are copied as they are, the memory is bounded by the
+    size of a single trace. The output is only kept if the number of written traces is as expected
+    :param event_log_path: path of the XES file to be filtered
+    :param output_file_name: path of the filtered XES file
+    :param trace_list: ids (concept:name) of the traces that are removed
+    :param ns: namespace of the XES file, e.g. {http://www.xes-standard.org/}, it is only needed to recognize
+    the traces if the file mixes namespaces
+    :return: True if the filtered log was written, False if not
+    """
+    filtered_ids = set(trace_list)
     cnt_fail = len(trace_list)
-    cnt = len(all_traces)
     print('# of traces to be filtered: {}'.format(cnt_fail))
+    tmp_file_name = output_file_name + '.tmp'
+    cnt, num_filtered = stream_event_log(event_log_path, tmp_file_name,
+                                         lambda trace: get_trace_id(trace) not in filtered_ids, ns)
+
     print('# of traces in the event log: {}'.format(cnt))
-    for trace in all_traces:
-        trace_name = trace.findall(ns + 'string')
-        for trace_id in trace_name:
-            if trace_id.get('key') == 'concept:name' \
-                    and trace_id.get('value') in trace_list:
-                root.remove(trace)
-                trace_list.remove(trace_id.get('value'))
-    num_filtered = len(root.findall(ns + 'trace'))
     if cnt - cnt_fail == num_filtered:
+        os.replace(tmp_file_name, output_file_name)
         print("Resulting event log contains {} trace(s)".format(num_filtered))
         print("Event log successfully filtered")
-        event_log.write(output_file_name)
\ No newline at end of file
+        return True
+    os.remove(tmp_file_name)
+    return False
+
+
+def stream_event_log(event_log_path, output_file_name, keep_trace, ns=''):
+    """
+    Streams the XES file once and writes every trace for which keep_trace is True directly to the output file.
+    The log attributes, extensions, globals and classifiers are copied as they are, the memory is bounded by the
+    size of a single trace
+    :param event_log_path: path of the XES file
+    :param output_file_name: path of the written XES file
+    :param keep_trace: function that gets the complete trace element and returns True if the trace is written
+    :param ns: namespace of the XES file, see filter_event_log
+    :return: tuple of the number of traces in the log and the number of written traces
+    """
+    cnt = 0
+    num_kept = 0
+    namespaces = []
+    default_namespace = None
+    root = None
+    depth = 0
+    with open(output_file_name, 'w', encoding='utf-8') as output:
+        output.write('<?xml version="1.0" encoding="UTF-8" ?>\n')
+        for xml_event, element in Etree.iterparse(event_log_path, events=('start-ns', 'start', 'end')):
+            if xml_event == 'start-ns':
+                namespaces.append(element)
+                continue
+            if xml_event == 'start':
+                depth += 1
+                if root is None:
+                    root = element
+                    if root.tag.startswith('{'):
+                        default_namespace = root.tag[1:].split('}', 1)[0]
+                    output.write(__create_start_tag(root, namespaces, default_namespace))
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            # A direct child of the log is complete
+            if __is_trace(element, ns):
+                cnt += 1
+                if keep_trace(element):
+                    num_kept += 1
+                    output.write(__to_string(element, default_namespace))
+            else:
+                output.write(__to_string(element, default_namespace))
+            element.clear()
+            root.remove(element)
+        output.write('\n</{}>\n'.format(__strip_namespace(root.tag, default_namespace)))
+    return cnt, num_kept
+
+
+def __is_trace(element, ns):
+    """
+    Checks if a child of the log is a trace
+    :param element: the element
+    :param ns: the namespace given for the log
+    :return: True if the element is a trace
+    """
+    if ns:
+        return element.tag == ns + 'trace'
+    return element.tag.rsplit('}', 1)[-1] == 'trace'
+
+
+def get_trace_id(trace):
+    """
+    Gets the concept:name of a trace
+    :param trace: the trace element
+    :return: the trace id or None
+    """
+    for attribute in trace:
+        if attribute.get('key') == 'concept:name':
+            return attribute.get('value')
+    return None
+
+
+def get_events(trace):
+    """
+    Gets the activity name and the timestamp of every event of a trace element
+    :param trace: the trace element
+    :return: list of (activity name, timestamp string or None)
+    """
+    events = []
+    for event in trace:
+        if event.tag.rsplit('}', 1)[-1] != 'event':
+            continue
+        activity_name = str()
+        timestamp = None
+        for attribute in event:
+            key = attribute.get('key')
+            if key == 'concept:name':
+                activity_name = attribute.get('value')
+            elif key == 'time:timestamp':
+                timestamp = attribute.get('value')
+        events.append((activity_name, timestamp))
+    return events
+
+
+def __strip_namespace(tag, default_namespace):
+    """
+    Removes the default namespace from a tag, it is declared once at the log element
+    :param tag: the tag
+    :param default_namespace: the default namespace uri of the log
+    :return: the tag without the default namespace
+    """
+    if default_namespace is not None and tag.startswith('{' + default_namespace + '}'):
+        return tag[len(default_namespace) + 2:]
+    return tag
+
+
+def __create_start_tag(root, namespaces, default_namespace):
+    """
+    Creates the start tag of the log with its attributes and namespace declarations
+    :param root: the log element
+    :param namespaces: list of (prefix, uri) that were declared in the input
+    :param default_namespace: the default namespace uri of the log
+    :return: the start tag
+    """
+    attributes = []
+    for prefix, uri in namespaces:
+        attributes.append('{}={}'.format('xmlns:' + prefix if prefix else 'xmlns', quoteattr(uri)))
+    for key, value in root.attrib.items():
+        attributes.append('{}={}'.format(__strip_namespace(key, default_namespace), quoteattr(value)))
+    return '<{}>\n'.format(' '.join([__strip_namespace(root.tag, default_namespace)] + attributes))
+
+
+def __to_string(element, default_namespace):
+    """
+    Serializes a complete child of the log, the default namespace is inherited from the log element
+    :param element: the element
+    :param default_namespace: the default namespace uri of the log
+    :return: the serialized element
+    """
+    if default_namespace is not None:
+        for child in element.iter():
+            child.tag = __strip_namespace(child.tag, default_namespace)
+    element.tail = None
+    return '  ' + Etree.tostring(element, encoding='unicode').rstrip() + '\n'
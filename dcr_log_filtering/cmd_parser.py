@@ -17,5 +17,60 @@ def parse_args():
                         help='The input path for the DCR Graph xml')
     parser.add_argument('--namespace', nargs='?', default='')
     parser.add_argument('--outFile', nargs='?', default="")
+    parser.add_argument('--engine', choices=['list', 'bitset'], default='list',
+                        help='The marking engine used for the replay')
+    parser.add_argument('--replay', choices=['trace', 'variant', 'trie', 'automaton', 'stream', 'columnar'],
+                        default='trace',
+                        help='Replay every trace, every trace variant once, along a prefix trie of the traces, '
+                             'on the automaton compiled from the graph, while streaming the XES file or every '
+                             'variant of the integer-encoded columnar log')
+    parser.add_argument('--checkRoles', action='store_true',
+                        help='Check that the role or resource of every event may execute its activity, role '
+                             'violations are reported separately from control-flow violations')
+    parser.add_argument('--diagnostics', nargs='?', const='', default=None,
+                        help='Report the blocking constraint, the position and the activity of every control-flow '
+                             'violation aggregated per constraint, the report is written to the given csv file')
+    parser.add_argument('--logCache', action='store_true',
+                        help='With --replay columnar the parsed log is kept in a memory-mappable sidecar of the XES '
+                             'file and loaded from it on the next run')
+    parser.add_argument('--transitionCache', type=int, default=0,
+                        help='Maximal number of memoized transitions, 0 disables the transition cache')
+    parser.add_argument('--automaton', nargs='?', default=None,
+                        help='File the compiled automaton of the graph is loaded from or saved to')
+    parser.add_argument('--maxStates', type=int, default=100000,
+                        help='Maximal number of automaton states before falling back to the variant replay')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes, with more than one the traces are replayed in a process pool')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='Number of traces that are sent to a worker process at once')
+    parser.add_argument('--fused', action='store_true',
+                        help='Check and filter the event log in a single streaming pass')
+    parser.add_argument('--inMemory', action='store_true',
+                        help='With --fused the filtered log is handed to the discovery without reading it from disk')
+    parser.add_argument('--incremental', nargs='?', default=None,
+                        help='File the replay state of the cases is kept in, only appended events are replayed')
+    parser.add_argument('--monitor', nargs='?', default=None,
+                        help='Monitor a stream of JSON events: - for stdin, tcp://host:port or a JSONL file')
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep reading new events that are appended to the monitored file')
+    parser.add_argument('--maxOpenCases', type=int, default=100000,
+                        help='Maximal number of open cases of the monitor, the least recently active are evicted')
+    parser.add_argument('--idleTimeout', type=float, default=None,
+                        help='Seconds without an event after which the monitor closes a case')
+    parser.add_argument('--miners', nargs='+', default=['inductive'],
+                        choices=['alpha', 'alpha_plus', 'heuristics', 'ilp', 'inductive'],
+                        help='The miners that are run concurrently on the filtered log')
+    parser.add_argument('--minerTimeout', type=float, default=None,
+                        help='Seconds after which a miner is terminated')
+    parser.add_argument('--cacheDir', nargs='?', default='Resources/cache',
+                        help='Directory of the conformance result cache')
+    parser.add_argument('--cacheSize', type=int, default=0,
+                        help='Maximal size of the result cache in MB, the cache is disabled by default. The results '
+                             'of a whole log are reused by every replay mode, the verdicts per variant by the '
+                             'replay of the in-memory log with one worker')
+    parser.add_argument('--compareGraphs', nargs='+', default=None,
+                        help='DCR graph xml files the event log is checked against in a single pass')
+    parser.add_argument('--batch', nargs='?', default=None,
+                        help='Manifest of graphs, event logs and miners, runs all open cells of the Results/ grid')
 
     return parser.parse_args()
@@ -40,9 +40,14 @@ class DCRConnection(ABC):
     def __init__(self, start_node, end_node):
         self.StartNode = start_node
         self.EndNode = end_node
+        # The guard expression of the relation and its compiled closure, the relation is always active without guard
+        self.Expression = None
+        self.Guard = None
+        # The delay of a condition respectively the deadline of a response in seconds, None if not timed
+        self.Time = None
 
     @staticmethod
-    def create_connection(start_node, end_node, connection_type: ConnectionTypes):
+    def create_connection(start_node, end_node, connection_type: ConnectionTypes, expression=None):
         """
         Static method that builds a certain connection based on the enum connection type
         :param expression: If expression exists default is no expression
@@ -64,8 +69,30 @@ class DCRConnection(ABC):
             connection = Milestone(start_node, end_node)
         else:
             raise ValueError('connection was None')
+        if expression is not None:
+            connection.set_guard(expression)
         return connection
 
+    def set_guard(self, expression, guard=None):
+        """
+        Guards the relation by an expression, which is compiled once
+        :param expression: the parsed guard, see expr.parse_guard
+        :param guard: the compiled guard, the expression is compiled on its own if None
+        """
+        self.Expression = expression
+        self.Guard = guard if guard is not None else expression.compile_guard()
+
+    def is_active(self, marking):
+        """
+        Checks the guard of the relation on the guard context of the marking. Without a guard context the event data
+        is unknown and the relation is active like an unguarded one
+        :param marking: the marking the relation is evaluated for
+        :return: True if the relation is active, False if its guard does not hold
+        """
+        if self.Guard is None or marking.GuardContext is None:
+            return True
+        return self.Guard(marking.GuardContext)
+
     @abstractmethod
     def perform_transition(self, marking):
         """
@@ -106,7 +133,7 @@ class Include(DCRConnection):
                 if activity not in marking.Included:
                     marking.Included.append(activity)
         elif self.EndNode.NestingActivity is not None:
-            if self.EndNode.NestingActivity is not marking.Included:
+            if self.EndNode.NestingActivity not in marking.Included:
                 marking.Included.append(self.EndNode.NestingActivity)
 
 
@@ -172,7 +199,8 @@ class Exclude(DCRConnection):
                 if activity in marking.Included:
                     marking.Included.remove(activity)
         elif self.EndNode.NestingActivity is not None:
-            if not any(activity in marking.Included for activity in self.EndNode.NestingActivity.Activities):
+            if not any(activity in marking.Included for activity in self.EndNode.NestingActivity.Activities) \
+                    and self.EndNode.NestingActivity in marking.Included:
                 marking.Included.remove(self.EndNode.NestingActivity)
 
 
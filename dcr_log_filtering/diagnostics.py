@@ -0,0 +1,167 @@
+# coding=utf-8
+"""
+The module collects the diagnostics of the control flow violations of a replay. Every constraint of the graph has a
+constraint id: the relations are numbered by their position in the graph, followed by the exclusion of every activity
+and the pending response of every activity at the end of a trace. The violations are counted in preallocated integer
+arrays indexed by the constraint id, thus the report is aggregated over the whole log without keeping the traces
+"""
+import csv
+
+import numpy as np
+
+import conn
+
+CONDITION = 'condition'
+MILESTONE = 'milestone'
+EXCLUDED = 'excluded'
+PENDING = 'pending'
+
+REPORT_COLUMNS = ('constraint', 'kind', 'source', 'target', 'traces', 'mean position')
+
+
+class ViolationDiagnostics(object):
+    """
+    The per-constraint violation counters of a graph
+    """
+
+    def __init__(self, dcr_graph):
+        """
+        Allocates the counters and the tables of the blocking constraints of every activity
+        :param dcr_graph: the graph the traces are replayed on
+        """
+        self.Graph = dcr_graph
+        node_count = len(dcr_graph.Nodes)
+        self.ConnectionCount = len(dcr_graph.Connections)
+        self.NodeCount = node_count
+        constraint_count = self.ConnectionCount + 2 * node_count
+        # The violating traces and the sum of the event positions per constraint id
+        self.Counts = np.zeros(constraint_count, dtype=np.int64)
+        self.PositionSums = np.zeros(constraint_count, dtype=np.int64)
+        # The violating traces per activity of the event that could not be executed
+        self.ActivityCounts = np.zeros(node_count, dtype=np.int64)
+        self.TraceCount = 0
+        # The conditions and milestones of every activity as (constraint id, connection) in the order of the engines
+        self.Milestones = [()] * node_count
+        self.Conditions = [()] * node_count
+        for constraint_id, connection in enumerate(dcr_graph.Connections):
+            target = connection.EndNode.Index
+            if isinstance(connection, conn.Milestone):
+                self.Milestones[target] += ((constraint_id, connection),)
+            elif isinstance(connection, conn.Condition):
+                self.Conditions[target] += ((constraint_id, connection),)
+
+    def get_excluded_id(self, node):
+        """
+        Gets the constraint id of the exclusion of an activity
+        :param node: the node of the activity
+        :return: the constraint id
+        """
+        return self.ConnectionCount + node.Index
+
+    def get_pending_id(self, node):
+        """
+        Gets the constraint id of the pending response of an activity at the end of a trace
+        :param node: the node of the activity
+        :return: the constraint id
+        """
+        return self.ConnectionCount + self.NodeCount + node.Index
+
+    def get_blocking_id(self, marking, node):
+        """
+        Finds the constraint that blocks an activity in the marking, in the order the engines check them
+        :param marking: the marking the activity could not be executed in
+        :param node: the node of the activity
+        :return: the constraint id of the first blocking condition, milestone or exclusion
+        """
+        for blocked_node in (node, getattr(node, 'NestingActivity', None)):
+            if blocked_node is None:
+                continue
+            for constraint_id, milestone in self.Milestones[blocked_node.Index]:
+                if marking.is_pending(milestone.StartNode) and milestone.is_active(marking):
+                    return constraint_id
+            for constraint_id, condition in self.Conditions[blocked_node.Index]:
+                if marking.is_included(condition.StartNode) and not marking.is_executed(condition.StartNode) \
+                        and condition.is_active(marking):
+                    return constraint_id
+        return self.get_excluded_id(node)
+
+    def get_blocked_violation(self, marking, node, position):
+        """
+        Describes the violation of an activity that could not be executed
+        :param marking: the marking before the event
+        :param node: the node of the activity
+        :param position: the position of the event in the trace
+        :return: tuple of the constraint ids, the position and the activity index
+        """
+        return (self.get_blocking_id(marking, node),), position, node.Index
+
+    def get_pending_violation(self, marking, position):
+        """
+        Describes the violation of a trace that ends in a marking that is not accepting
+        :param marking: the marking at the end of the trace
+        :param position: the length of the trace
+        :return: tuple of the constraint ids of all pending activities, the position and None as activity
+        """
+        pending_ids = tuple(self.get_pending_id(node) for node in self.Graph.Nodes if marking.is_pending(node))
+        return pending_ids, position, None
+
+    def add_violation(self, violation, count=1):
+        """
+        Counts a violation for a number of traces
+        :param violation: the violation, see get_blocked_violation and get_pending_violation
+        :param count: the number of traces with the violation, e.g. the traces of a variant
+        """
+        constraint_ids, position, activity = violation
+        for constraint_id in constraint_ids:
+            self.Counts[constraint_id] += count
+            self.PositionSums[constraint_id] += position * count
+        if activity is not None:
+            self.ActivityCounts[activity] += count
+        self.TraceCount += count
+
+    def get_constraint_description(self, constraint_id):
+        """
+        Describes a constraint by its kind, its source and its target
+        :param constraint_id: the constraint id
+        :return: tuple of kind, source activity name and target activity name
+        """
+        if constraint_id < self.ConnectionCount:
+            connection = self.Graph.Connections[constraint_id]
+            kind = MILESTONE if isinstance(connection, conn.Milestone) else CONDITION
+            return kind, connection.StartNode.ActivityName, connection.EndNode.ActivityName
+        if constraint_id < self.ConnectionCount + self.NodeCount:
+            return EXCLUDED, '', self.Graph.Nodes[constraint_id - self.ConnectionCount].ActivityName
+        return PENDING, '', self.Graph.Nodes[constraint_id - self.ConnectionCount - self.NodeCount].ActivityName
+
+    def get_report(self):
+        """
+        Aggregates the counters to a report of the violated constraints, the most violated first
+        :return: list of (constraint id, kind, source, target, traces, mean position)
+        """
+        constraint_ids = np.flatnonzero(self.Counts)
+        constraint_ids = constraint_ids[np.argsort(-self.Counts[constraint_ids], kind='stable')]
+        mean_positions = self.PositionSums[constraint_ids] / self.Counts[constraint_ids]
+        return [(constraint_id,) + self.get_constraint_description(constraint_id)
+                + (int(self.Counts[constraint_id]), float(mean_position))
+                for constraint_id, mean_position in zip(constraint_ids.tolist(), mean_positions.tolist())]
+
+    def write_report(self, path):
+        """
+        Writes the report of the violated constraints to a csv file
+        :param path: the path of the csv file
+        """
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(REPORT_COLUMNS)
+            writer.writerows(self.get_report())
+
+    def print_report(self):
+        """
+        Prints the report of the violated constraints and the activities the violating traces stopped at
+        """
+        print(f"{self.TraceCount} traces violated the graph")
+        for constraint_id, kind, source, target, traces, mean_position in self.get_report():
+            constraint = f"{source} -> {target}" if source else target
+            print(f"[{constraint_id}] {kind} {constraint}: {traces} traces, mean position {mean_position:.1f}")
+        for index in np.flatnonzero(self.ActivityCounts).tolist():
+            print(f"{self.ActivityCounts[index]} traces could not execute {self.Graph.Nodes[index].ActivityName}")
@@ -0,0 +1,147 @@
+# coding=utf-8
+"""
+The module evaluates the quality of the filter and the discovered models against the ground truth labels of the traces.
+The traces are represented by integer label arrays and the confusion matrices of all graph/miner combinations are
+computed in one vectorized pass. The reports are written in the layout of the sklearn classification report
+"""
+import csv
+
+import numpy as np
+
+UNLABELED = -1
+CLASSES = (0, 1)
+REPORT_ROWS = ('precision', 'recall', 'f1-score', 'support')
+REPORT_COLUMNS = ('0', '1', 'accuracy', 'macro avg', 'weighted avg')
+
+
+def read_labels(labels_path):
+    """
+    Reads the ground truth labels of the traces
+    :param labels_path: csv file with the trace id and the label (0 or 1) per row, an optional header is skipped
+    :return: tuple of the trace id array and the label array
+    """
+    trace_ids = []
+    labels = []
+    with open(labels_path, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                continue
+            try:
+                label = int(row[1])
+            except ValueError:
+                continue
+            trace_ids.append(row[0])
+            labels.append(label)
+    return np.asarray(trace_ids, dtype=str), np.asarray(labels, dtype=np.int8)
+
+
+def get_label_array(trace_ids, label_ids, labels):
+    """
+    Aligns the ground truth labels with the traces of a log
+    :param trace_ids: the trace ids of the log in their order
+    :param label_ids: the trace ids of the labels
+    :param labels: the labels
+    :return: the label array in the order of trace_ids, UNLABELED for traces without a label
+    """
+    trace_ids = np.asarray(trace_ids, dtype=str)
+    label_ids = np.asarray(label_ids, dtype=str)
+    result = np.full(len(trace_ids), UNLABELED, dtype=np.int8)
+    if len(label_ids) == 0:
+        return result
+    order = np.argsort(label_ids)
+    sorted_ids = label_ids[order]
+    positions = np.minimum(np.searchsorted(sorted_ids, trace_ids), len(sorted_ids) - 1)
+    found = sorted_ids[positions] == trace_ids
+    result[found] = np.asarray(labels, dtype=np.int8)[order[positions[found]]]
+    return result
+
+
+def get_prediction_array(trace_ids, rejected_ids):
+    """
+    Creates the predicted labels of the traces
+    :param trace_ids: the trace ids of the log in their order
+    :param rejected_ids: the ids of the rejected traces, e.g. RuleViolation.ViolatingTraceIDs
+    :return: the prediction array, 1 for rejected and 0 for accepted traces
+    """
+    rejected_ids = np.asarray(list(rejected_ids), dtype=str)
+    return np.isin(np.asarray(trace_ids, dtype=str), rejected_ids).astype(np.int8)
+
+
+def get_confusion_matrices(y_true, y_preds):
+    """
+    Computes the confusion matrices of many predictions of the same traces at once
+    :param y_true: the label array, UNLABELED traces are ignored
+    :param y_preds: 2d array with one prediction array per row
+    :return: array of shape (number of predictions, 2, 2) indexed by true and predicted class
+    """
+    y_true = np.asarray(y_true, dtype=np.int64)
+    y_preds = np.atleast_2d(np.asarray(y_preds, dtype=np.int64))
+    labeled = y_true != UNLABELED
+    codes = y_true[labeled] * 2 + y_preds[:, labeled]
+    codes += np.arange(len(y_preds))[:, None] * 4
+    return np.bincount(codes.ravel(), minlength=len(y_preds) * 4).reshape(len(y_preds), 2, 2)
+
+
+def __divide(numerator, denominator):
+    """
+    Divides element-wise, a zero denominator yields 0 like the sklearn default
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+
+def get_reports(confusion_matrices):
+    """
+    Computes the classification reports of the confusion matrices
+    :param confusion_matrices: array of shape (number of predictions, 2, 2)
+    :return: array of shape (number of predictions, 4, 5) with the rows REPORT_ROWS and the columns REPORT_COLUMNS
+    """
+    confusion_matrices = np.asarray(confusion_matrices)
+    true_positives = np.diagonal(confusion_matrices, axis1=1, axis2=2)
+    support = confusion_matrices.sum(axis=2)
+    predicted = confusion_matrices.sum(axis=1)
+    total = support.sum(axis=1)
+
+    precision = __divide(true_positives, predicted)
+    recall = __divide(true_positives, support)
+    f1 = __divide(2 * true_positives, predicted + support)
+    accuracy = __divide(true_positives.sum(axis=1), total)
+
+    per_class = np.stack([precision, recall, f1, support.astype(np.float64)], axis=1)
+    reports = np.empty((len(confusion_matrices), len(REPORT_ROWS), len(REPORT_COLUMNS)))
+    reports[:, :, :len(CLASSES)] = per_class
+    reports[:, :, 2] = accuracy[:, None]
+    reports[:, :3, 3] = per_class[:, :3].mean(axis=2)
+    reports[:, :3, 4] = __divide((per_class[:, :3] * support[:, None, :]).sum(axis=2), total[:, None])
+    reports[:, 3, 3] = total
+    reports[:, 3, 4] = total
+    return reports
+
+
+def write_report(path, report):
+    """
+    Writes a classification report in the layout of the Results/ files
+    :param path: the path of the csv file
+    :param report: array of shape (4, 5), see get_reports
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('',) + REPORT_COLUMNS)
+        for row_name, row in zip(REPORT_ROWS, report):
+            writer.writerow([row_name] + [repr(float(value)) for value in row])
+
+
+def evaluate(y_true, predictions):
+    """
+    Evaluates many graph/miner combinations of the same traces in one pass and writes their reports
+    :param y_true: the label array
+    :param predictions: dict with the path of the report as key and the prediction array as value
+    :return: dict with the path of the report as key and the report array as value
+    """
+    if not predictions:
+        return {}
+    paths = list(predictions)
+    reports = get_reports(get_confusion_matrices(y_true, np.stack([predictions[path] for path in paths])))
+    for path, report in zip(paths, reports):
+        write_report(path, report)
+    return dict(zip(paths, reports))
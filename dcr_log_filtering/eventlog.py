@@ -1,7 +1,16 @@
 # coding=utf-8
 """The module implements a data structure to represent an event log"""
-import opyenxes.data_in.XesXmlParser as XESParser
-import opyenxes.model.XAttributable as xA
+from array import array
+
+import numpy as np
+import pandas as pd
+
+try:
+    import opyenxes.data_in.XesXmlParser as XESParser
+    import opyenxes.model.XAttributable as xA
+except ImportError:
+    # Only the log of the opyenxes parser needs it, the columnar and the streamed logs are parsed without opyenxes
+    XESParser = xA = None
 
 
 class EventLog(object):
@@ -22,6 +31,17 @@ class EventLog(object):
         """
         self.Traces.append(trace)
 
+    def get_variants(self):
+        """
+        Groups the traces by their sequence of activity names
+        :return: dict with the tuple of activity names as key and the list of traces of the variant as value
+        """
+        variants = {}
+        for trace in self.Traces:
+            activity_names = tuple(event.EventName for event in trace.Events)
+            variants.setdefault(activity_names, []).append(trace)
+        return variants
+
     def print_event_log(self):
         """
         Is used to print the log for test purposes
@@ -85,6 +105,144 @@ class EventLog(object):
         return event_log
 
 
+class ColumnarEventLog(object):
+    """
+    Columnar representation of an event log. The activity names are interned against a vocabulary and the events of
+    all traces are stored in one integer array of activity codes, the events of trace i are
+    Codes[Offsets[i]:Offsets[i + 1]]. Timestamps and roles are optional columns parallel to the codes
+    """
+
+    def __init__(self, activities, codes, offsets, trace_ids, timestamps=None, roles=None, role_names=None):
+        """
+        Constructor of a columnar event log
+        :param activities: the vocabulary, the activity name of every code
+        :param codes: array of the activity codes of all events
+        :param offsets: array of the start offset of every trace and the number of events as last element
+        :param trace_ids: array of the trace ids
+        :param timestamps: optional datetime64 array of the event timestamps, NaT for missing timestamps
+        :param roles: optional array of the role codes of the events
+        :param role_names: the role name of every role code
+        """
+        self.Activities = list(activities)
+        self.ActivityCodes = {activity_name: code for code, activity_name in enumerate(self.Activities)}
+        self.Codes = codes
+        self.Offsets = offsets
+        self.TraceIds = trace_ids
+        self.Timestamps = timestamps
+        self.Roles = roles
+        self.RoleNames = role_names
+
+    def __len__(self):
+        return len(self.TraceIds)
+
+    @staticmethod
+    def __to_code_array(codes, vocabulary_size):
+        """
+        Converts the collected codes to the smallest unsigned integer array that holds every code
+        """
+        return np.frombuffer(codes, dtype=np.int32).astype(np.min_scalar_type(max(vocabulary_size - 1, 0)))
+
+    @staticmethod
+    def create_columnar_event_log(traces, with_timestamps=False, with_roles=False):
+        """
+        Creates the columnar event log from a stream of traces, only the columns are kept in memory
+        :param traces: iterable of (trace id, activity names, roles, timestamps),
+        e.g. eventlog_parser.iterate_trace_events
+        :param with_timestamps: if True the timestamp column is created
+        :param with_roles: if True the role column is created
+        :return: the columnar event log
+        """
+        activity_codes = {}
+        role_codes = {}
+        codes = array('i')
+        roles = array('i')
+        offsets = array('q', [0])
+        trace_ids = []
+        timestamps = []
+        for trace_id, activity_names, event_roles, event_timestamps in traces:
+            trace_ids.append(trace_id)
+            for activity_name in activity_names:
+                code = activity_codes.get(activity_name)
+                if code is None:
+                    code = len(activity_codes)
+                    activity_codes[activity_name] = code
+                codes.append(code)
+            offsets.append(len(codes))
+            if with_roles:
+                roles.extend(role_codes.setdefault(role, len(role_codes)) for role in event_roles)
+            if with_timestamps:
+                timestamps.extend(event_timestamps)
+
+        timestamp_column = None
+        if with_timestamps:
+            timestamp_column = pd.to_datetime(pd.Series(timestamps, dtype=object), utc=True, errors='coerce') \
+                .dt.tz_convert(None).to_numpy()
+        role_column = None
+        if with_roles:
+            role_column = ColumnarEventLog.__to_code_array(roles, len(role_codes))
+        return ColumnarEventLog(activity_codes, ColumnarEventLog.__to_code_array(codes, len(activity_codes)),
+                                np.frombuffer(offsets, dtype=np.int64), np.asarray(trace_ids, dtype=str),
+                                timestamp_column, role_column, list(role_codes) if with_roles else None)
+
+    @staticmethod
+    def create_from_event_log(event_log, with_timestamps=False, with_roles=False):
+        """
+        Converts an event log of Trace and Event objects to the columnar event log
+        :param event_log: the event log
+        :param with_timestamps: if True the timestamp column is created
+        :param with_roles: if True the role column is created
+        :return: the columnar event log
+        """
+        traces = ((str(trace.TraceId), tuple(event.EventName for event in trace.Events),
+                   tuple(event.Role for event in trace.Events), tuple(event.Timestamp for event in trace.Events))
+                  for trace in event_log.Traces)
+        return ColumnarEventLog.create_columnar_event_log(traces, with_timestamps, with_roles)
+
+    def get_event_count(self):
+        """
+        Gets the number of events of all traces
+        :return: the number of events
+        """
+        return len(self.Codes)
+
+    def get_trace_lengths(self):
+        """
+        Gets the number of events of every trace
+        :return: array of the trace lengths
+        """
+        return np.diff(self.Offsets)
+
+    def get_codes(self, trace_index):
+        """
+        Gets the activity codes of a trace without copying them
+        :param trace_index: the position of the trace
+        :return: view on the activity codes of the trace
+        """
+        return self.Codes[self.Offsets[trace_index]:self.Offsets[trace_index + 1]]
+
+    def get_activity_names(self, trace_index):
+        """
+        Decodes the activity names of a trace
+        :param trace_index: the position of the trace
+        :return: tuple of the activity names
+        """
+        return tuple(self.Activities[code] for code in self.get_codes(trace_index).tolist())
+
+    def get_variants(self):
+        """
+        Groups the traces by their sequence of activity codes
+        :return: dict with the bytes of the activity codes of the variant as key and the list of the trace
+        positions as value, the codes are restored with numpy.frombuffer(key, dtype=Codes.dtype)
+        """
+        variants = {}
+        codes = self.Codes
+        offsets = self.Offsets.tolist()
+        for trace_index in range(len(offsets) - 1):
+            key = codes[offsets[trace_index]:offsets[trace_index + 1]].tobytes()
+            variants.setdefault(key, []).append(trace_index)
+        return variants
+
+
 class Event(object):
     """
     The event class that represents an atomic event
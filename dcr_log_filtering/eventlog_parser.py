@@ -2,9 +2,10 @@
 """
 This module is used to parse an event log and afterwards bring it to the data structure contained in ``eventlog.py``
 """
-import opyenxes.data_in.XesXmlParser as XesParser
+from xml.etree import ElementTree as Etree
 
-from eventlog import EventLog
+import log_cache
+from eventlog import EventLog, ColumnarEventLog
 
 
 def get_event_log(file_path: str = None):
@@ -25,6 +26,115 @@ def get_event_log(file_path: str = None):
         raise ValueError('The input file was not a XES file')
 
 
+def iterate_traces(file_path: str):
+    """
+    Streams the traces of a XES file with incremental XML parsing instead of building the whole event log.
+    Every element is cleared as soon as it was read, thus the memory does not grow with the size of the log
+    :param file_path: Path to the xes file
+    :return: generator of (trace id, tuple of activity names), the position of the trace is the id if the trace
+    has no concept:name
+    """
+    for trace_id, activity_names, _, _ in iterate_trace_events(file_path):
+        yield trace_id, activity_names
+
+
+def iterate_trace_events(file_path: str, with_attributes=False):
+    """
+    Streams the traces of a XES file like iterate_traces, optionally with the role and the timestamp of the events
+    :param file_path: Path to the xes file
+    :param with_attributes: if True the roles (org:role, else org:resource) and timestamps of the events are read
+    :return: generator of (trace id, tuple of activity names, tuple of roles, tuple of timestamps), roles and
+    timestamps are None without with_attributes and a missing attribute is an empty string respectively None
+    """
+    if file_path is None or not file_path.lower().endswith(".xes"):
+        raise ValueError('The input file was not a XES file')
+    trace_count = 0
+    trace_id = None
+    activity_names = []
+    roles = []
+    timestamps = []
+    activity_name = str()
+    role = str()
+    resource = str()
+    timestamp = None
+    depth = 0
+    trace_depth = None
+    event_depth = None
+    root = None
+    for xml_event, element in Etree.iterparse(file_path, events=('start', 'end')):
+        tag = element.tag.rsplit('}', 1)[-1]
+        if xml_event == 'start':
+            depth += 1
+            if root is None:
+                root = element
+            elif tag == 'trace' and trace_depth is None:
+                trace_depth = depth
+                trace_id = None
+                activity_names = []
+                roles = []
+                timestamps = []
+            elif tag == 'event' and trace_depth is not None and event_depth is None:
+                event_depth = depth
+                activity_name = str()
+                role = str()
+                resource = str()
+                timestamp = None
+            continue
+
+        key = element.get('key')
+        if key == 'concept:name':
+            if event_depth is not None and depth == event_depth + 1:
+                activity_name = element.get('value')
+            elif event_depth is None and trace_depth is not None and depth == trace_depth + 1:
+                trace_id = element.get('value')
+        elif with_attributes and event_depth is not None and depth == event_depth + 1:
+            if key == 'org:role':
+                role = element.get('value')
+            elif key == 'org:resource':
+                resource = element.get('value')
+            elif key == 'time:timestamp':
+                timestamp = element.get('value')
+        elif tag == 'event' and depth == event_depth:
+            activity_names.append(activity_name)
+            if with_attributes:
+                roles.append(role or resource)
+                timestamps.append(timestamp)
+            event_depth = None
+            element.clear()
+        elif tag == 'trace' and depth == trace_depth:
+            trace_id = trace_id if trace_id is not None else str(trace_count)
+            if with_attributes:
+                yield trace_id, tuple(activity_names), tuple(roles), tuple(timestamps)
+            else:
+                yield trace_id, tuple(activity_names), None, None
+            trace_count += 1
+            trace_depth = None
+            element.clear()
+            root.remove(element)
+        depth -= 1
+
+
+def get_columnar_event_log(file_path: str, with_timestamps=False, with_roles=False, use_sidecar=False):
+    """
+    Streams a XES file into the columnar event log, the events are never built as objects
+    :param file_path: Path to the xes file
+    :param with_timestamps: if True the timestamp column is read
+    :param with_roles: if True the role column is read
+    :param use_sidecar: if True the log is loaded from a valid sidecar of the file, otherwise it is parsed and the
+    sidecar is written for the next run
+    :return: ColumnarEventLog data structure
+    """
+    if use_sidecar:
+        columnar_log = log_cache.read_sidecar(file_path, with_timestamps, with_roles)
+        if columnar_log is not None:
+            return columnar_log
+    traces = iterate_trace_events(file_path, with_timestamps or with_roles)
+    columnar_log = ColumnarEventLog.create_columnar_event_log(traces, with_timestamps, with_roles)
+    if use_sidecar:
+        log_cache.write_sidecar(columnar_log, file_path)
+    return columnar_log
+
+
 def __handle_xes_file(import_path):
     """
     Puts an xes file into a common data structure
@@ -41,6 +151,8 @@ def __import_event_log_xes(import_path):
     :param import_path: Path of the event log
     :return: parsed event log
     """
+    # opyenxes is imported on demand, the streamed and columnar logs are parsed without it
+    import opyenxes.data_in.XesXmlParser as XesParser
     xml_parser = XesParser.XesXmlParser()
     can_parse = xml_parser.can_parse(import_path)
     if can_parse:
@@ -4,6 +4,7 @@ This module is used to implement the Expression class.
 The expression class parses an expression from a DCR graph and is able to interpret that
 """
 import numbers
+import operator
 from enum import Enum, auto
 
 
@@ -46,6 +47,9 @@ class Expression(object):
         if self.expression_right.strip().startswith('{') and self.expression_right.endswith('}'):
             self.CompareWithEventData = True
             self.expression_right = self.expression_right.replace('{','').replace('}','')
+        elif is_quoted(self.expression_right):
+            # A quoted value is a string literal and is not converted
+            self.expression_right = self.expression_right[1:-1]
         else:
             self.expression_right = try_convert_value(self.expression_right)
 
@@ -153,10 +157,44 @@ class Expression(object):
         Splits a multiple expression to singular expressions
         For example "data>10 && data2<10" or
         :param expression: The expression to be split
-        :return: Not Implemented Error
-        TODO: Future Feature
+        :return: list of the singular expressions of the parsed guard
         """
-        raise NotImplementedError
+        return parse_guard(expression, self.expression_id).get_comparisons()
+
+    def get_key(self):
+        """
+        Gets the canonical representation of the comparison, equal comparisons have the same key
+        :return: the key
+        """
+        return repr(('comparison', self.expression_reference_node if self.CheckDifferentEvent else None,
+                     self.expression_left, self.expression_comparator.name, self.CompareWithEventData,
+                     type(self.expression_right).__name__, self.expression_right))
+
+    def get_comparisons(self):
+        """
+        Gets the singular expressions of the guard
+        :return: list with this expression
+        """
+        return [self]
+
+    def get_constant_value(self):
+        """
+        Gets the value of a comparison of two literals, e.g. 5 > 3, which does not depend on the event data
+        :return: the boolean value or None if the comparison reads an attribute
+        """
+        if self.CompareWithEventData:
+            return None
+        left = self.expression_left
+        if self.CheckDifferentEvent:
+            left = self.expression_reference_node + '.' + left
+        if is_quoted(left):
+            left_value = left[1:-1]
+        else:
+            left_value = try_convert_value(left)
+            # only numbers are literals, an attribute can be named like a boolean, e.g. t or y
+            if isinstance(left_value, (str, bool)):
+                return None
+        return bool(self.do_comparison(left_value, self.expression_right))
 
     def do_comparison(self, left_value, right_expr):
         """
@@ -200,6 +238,56 @@ class Expression(object):
         else:
             raise TypeError("Not a valid comparator")
 
+    def compile_guard(self):
+        """
+        Compiles the expression once into a closure with the same semantics as evaluate_expression. The constant is
+        converted, the comparator is resolved to a function of the operator module and the referenced event is
+        looked up in the last executions of the GuardContext instead of searching the trace
+        :return: function of a GuardContext that returns True if the guard holds
+        """
+        left_key = self.expression_left
+        reference = self.expression_reference_node if self.CheckDifferentEvent else None
+
+        if self.CompareWithEventData:
+            right_key = self.expression_right
+            compare_values = compile_comparison(self.expression_comparator)
+
+            def compare(left_value, context):
+                right_attribute = context.Attributes.get(right_key)
+                right_value = right_key if right_attribute is None else get_attribute_value(right_attribute)
+                return compare_values(left_value, right_value)
+        else:
+            compare_constant = compile_constant_comparison(self.expression_comparator, self.expression_right)
+
+            def compare(left_value, context):
+                return compare_constant(left_value)
+
+        if reference == 'trace':
+            def guard(context):
+                attribute = context.TraceAttributes.get(left_key)
+                if attribute is None:
+                    return False
+                return compare(get_attribute_value(attribute), context)
+        elif reference is not None:
+            def guard(context):
+                index = context.LastExecution.get(reference)
+                if index is None:
+                    return False
+                attribute = context.Events[index].get(left_key)
+                if attribute is None:
+                    return False
+                return compare(get_attribute_value(attribute), context)
+        else:
+            # Only checks for the existence if the attribute is not in the event
+            missing_result = self.expression_right == '' and self.expression_comparator == Comparators.eq
+
+            def guard(context):
+                attribute = context.Attributes.get(left_key)
+                if attribute is None:
+                    return missing_result
+                return compare(get_attribute_value(attribute), context)
+        return guard
+
     def set_reference_node(self, node):
         """
         TODO Check if needed
@@ -241,6 +329,403 @@ class Comparators(Enum):
     # ... Add up more if required
 
 
+# The functions of the operator module the comparators are resolved to
+comparator_functions = {
+    Comparators.eq: operator.eq,
+    Comparators.neq: operator.ne,
+    Comparators.lt: operator.lt,
+    Comparators.gt: operator.gt,
+    Comparators.gte: operator.ge,
+    Comparators.lte: operator.le,
+}
+
+
+class GuardContext(object):
+    """
+    The data of a case the compiled guards are evaluated on: the attributes of the trace, of the current event and
+    of the executed events with the index of the last execution of every activity
+    """
+
+    def __init__(self, trace_attributes=None):
+        """
+        Constructor of the guard context of a case
+        :param trace_attributes: the attributes of the trace
+        """
+        self.TraceAttributes = trace_attributes if trace_attributes is not None else {}
+        self.Attributes = {}
+        self.Events = []
+        self.LastExecution = {}
+        # Values of the shared sub-expressions of the guards for the current event
+        self.Cache = {}
+
+    def begin_event(self, attributes):
+        """
+        Sets the attributes of the event that is executed next
+        :param attributes: the attributes of the event
+        """
+        self.Attributes = attributes if attributes is not None else {}
+        self.Cache.clear()
+
+    def end_event(self, activity_name):
+        """
+        Records the current event as the last execution of its activity
+        :param activity_name: the activity of the event
+        """
+        self.LastExecution[activity_name] = len(self.Events)
+        self.Events.append(self.Attributes)
+
+
+class ConstantExpression(object):
+    """
+    Guard that always has the same value, e.g. true or a folded comparison of two literals
+    """
+
+    def __init__(self, value: bool):
+        """
+        Constructor of a constant guard
+        :param value: the value of the guard
+        """
+        self.Value = value
+
+    def get_key(self):
+        """
+        Gets the canonical representation of the constant
+        :return: the key
+        """
+        return 'true' if self.Value else 'false'
+
+    def get_comparisons(self):
+        """
+        Gets the singular expressions of the guard
+        :return: empty list
+        """
+        return []
+
+    def compile_guard(self):
+        """
+        Compiles the constant to a closure
+        :return: function of a GuardContext that returns the value
+        """
+        value = self.Value
+        return lambda context: value
+
+
+class BooleanExpression(object):
+    """
+    Conjunction (&&) or disjunction (||) of guards, the operands are evaluated from left to right until the value
+    is decided
+    """
+    AND = '&&'
+    OR = '||'
+
+    def __init__(self, operator_str, operands):
+        """
+        Constructor of a compound guard, use create to get a folded guard
+        :param operator_str: AND or OR
+        :param operands: the operand guards
+        """
+        self.Operator = operator_str
+        self.Operands = operands
+
+    @staticmethod
+    def create(operator_str, operands):
+        """
+        Creates a compound guard with constant folding: nested operands of the same operator are flattened, neutral
+        constants and duplicates are dropped and an absorbing constant decides the whole guard
+        :param operator_str: AND or OR
+        :param operands: the operand guards
+        :return: the folded guard, which is not necessarily a BooleanExpression
+        """
+        absorbing = operator_str == BooleanExpression.OR
+        folded = []
+        keys = set()
+        for operand in operands:
+            if isinstance(operand, BooleanExpression) and operand.Operator == operator_str:
+                nested = operand.Operands
+            else:
+                nested = [operand]
+            for nested_operand in nested:
+                if isinstance(nested_operand, ConstantExpression):
+                    if nested_operand.Value == absorbing:
+                        return ConstantExpression(absorbing)
+                    continue
+                key = nested_operand.get_key()
+                if key not in keys:
+                    keys.add(key)
+                    folded.append(nested_operand)
+        if not folded:
+            return ConstantExpression(not absorbing)
+        if len(folded) == 1:
+            return folded[0]
+        return BooleanExpression(operator_str, folded)
+
+    def get_key(self):
+        """
+        Gets the canonical representation of the guard, it does not depend on the order of the operands
+        :return: the key
+        """
+        return '(' + self.Operator.join(sorted(operand.get_key() for operand in self.Operands)) + ')'
+
+    def get_comparisons(self):
+        """
+        Gets the singular expressions of the guard
+        :return: list of the comparisons of all operands
+        """
+        return [comparison for operand in self.Operands for comparison in operand.get_comparisons()]
+
+    def compile_guard(self):
+        """
+        Compiles the guard to a short-circuiting closure without sharing sub-expressions
+        :return: function of a GuardContext that returns True if the guard holds
+        """
+        return GuardCompiler().compile(self)
+
+
+class GuardCompiler(object):
+    """
+    Compiles the guards of a graph. Equal sub-expressions are compiled to one closure and if they are used by more
+    than one guard their value is cached in the GuardContext, thus they are evaluated once per event
+    """
+
+    def __init__(self):
+        """
+        Default constructor of the guard compiler
+        """
+        self.Uses = {}
+        self.Closures = {}
+
+    def add_uses(self, guard):
+        """
+        Counts the sub-expressions of a guard, all guards have to be added before the first one is compiled
+        :param guard: the parsed guard
+        """
+        key = guard.get_key()
+        self.Uses[key] = self.Uses.get(key, 0) + 1
+        if isinstance(guard, BooleanExpression):
+            for operand in guard.Operands:
+                self.add_uses(operand)
+
+    def compile(self, guard):
+        """
+        Compiles a guard, the closures of equal sub-expressions are shared
+        :param guard: the parsed guard
+        :return: function of a GuardContext that returns True if the guard holds
+        """
+        key = guard.get_key()
+        closure = self.Closures.get(key)
+        if closure is not None:
+            return closure
+
+        if isinstance(guard, BooleanExpression):
+            operands = tuple(self.compile(operand) for operand in guard.Operands)
+            if guard.Operator == BooleanExpression.AND:
+                def closure(context):
+                    for operand in operands:
+                        if not operand(context):
+                            return False
+                    return True
+            else:
+                def closure(context):
+                    for operand in operands:
+                        if operand(context):
+                            return True
+                    return False
+        else:
+            closure = guard.compile_guard()
+
+        if self.Uses.get(key, 0) > 1 and not isinstance(guard, ConstantExpression):
+            closure = GuardCompiler.__cache_value(key, closure)
+        self.Closures[key] = closure
+        return closure
+
+    @staticmethod
+    def __cache_value(key, closure):
+        """
+        Wraps a closure such that its value is computed once per event
+        """
+        def cached_closure(context):
+            value = context.Cache.get(key)
+            if value is None:
+                value = bool(closure(context))
+                context.Cache[key] = value
+            return value
+        return cached_closure
+
+
+def is_quoted(value: str):
+    """
+    Checks if a value is a string literal in single or double quotes
+    :param value: the value
+    :return: True if quoted, False if not
+    """
+    return len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'")
+
+
+def tokenize_guard(expression: str):
+    """
+    Splits a guard into the tokens (, ), &&, || and the comparisons in between, quoted values are not split
+    :param expression: the guard
+    :return: list of the tokens
+    """
+    tokens = []
+    comparison = []
+    quote = None
+    index = 0
+    while index < len(expression):
+        char = expression[index]
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char in '()' or expression[index:index + 2] in (BooleanExpression.AND, BooleanExpression.OR):
+            if ''.join(comparison).strip():
+                tokens.append(''.join(comparison).strip())
+            comparison = []
+            token = char if char in '()' else expression[index:index + 2]
+            tokens.append(token)
+            index += len(token)
+            continue
+        comparison.append(char)
+        index += 1
+    if quote is not None:
+        raise ValueError('The guard {} has an unterminated string'.format(expression))
+    if ''.join(comparison).strip():
+        tokens.append(''.join(comparison).strip())
+    return tokens
+
+
+def parse_guard(expression: str, expression_id='guard'):
+    """
+    Parses a guard with the operators && and || and parentheses, && binds stronger than ||. The comparisons are
+    singular expressions, true and false are constants
+    :param expression: the guard
+    :param expression_id: the id of the expression in the xml
+    :return: the folded guard, an Expression, BooleanExpression or ConstantExpression
+    """
+    tokens = tokenize_guard(expression)
+    position = 0
+    if expression_id == 'unit-test':
+        # the comparisons of a guard are always split, see the constructor of Expression
+        expression_id = 'guard'
+
+    def parse_or():
+        nonlocal position
+        operands = [parse_and()]
+        while position < len(tokens) and tokens[position] == BooleanExpression.OR:
+            position += 1
+            operands.append(parse_and())
+        return BooleanExpression.create(BooleanExpression.OR, operands)
+
+    def parse_and():
+        nonlocal position
+        operands = [parse_primary()]
+        while position < len(tokens) and tokens[position] == BooleanExpression.AND:
+            position += 1
+            operands.append(parse_primary())
+        return BooleanExpression.create(BooleanExpression.AND, operands)
+
+    def parse_primary():
+        nonlocal position
+        if position >= len(tokens):
+            raise ValueError('The guard {} ends unexpectedly'.format(expression))
+        token = tokens[position]
+        position += 1
+        if token == '(':
+            guard = parse_or()
+            if position >= len(tokens) or tokens[position] != ')':
+                raise ValueError('The guard {} has an unbalanced parenthesis'.format(expression))
+            position += 1
+            return guard
+        if token in (')', BooleanExpression.AND, BooleanExpression.OR):
+            raise ValueError('Unexpected {} in the guard {}'.format(token, expression))
+        if token.lower() in ('true', 'false'):
+            return ConstantExpression(token.lower() == 'true')
+        comparison = Expression(token, expression_id)
+        constant_value = comparison.get_constant_value()
+        if constant_value is not None:
+            return ConstantExpression(constant_value)
+        return comparison
+
+    guard = parse_or()
+    if position != len(tokens):
+        raise ValueError('Unexpected {} in the guard {}'.format(tokens[position], expression))
+    return guard
+
+
+def get_attribute_value(attribute):
+    """
+    Gets the value of an attribute, which is an opyenxes attribute or already the value
+    :param attribute: the attribute
+    :return: the value
+    """
+    get_value = getattr(attribute, 'get_value', None)
+    return attribute if get_value is None else get_value()
+
+
+def __is_type_mismatch(left_value, right_type, right_is_real):
+    """
+    Checks the type compatibility of do_comparison
+    """
+    return not isinstance(left_value, right_type) and isinstance(left_value, numbers.Real) != right_is_real
+
+
+def compile_constant_comparison(comparator, right_value):
+    """
+    Compiles the comparison of do_comparison against a constant
+    :param comparator: the Comparators member
+    :param right_value: the converted constant
+    :return: function of the left value that returns the result of the comparison
+    """
+    if right_value == "":
+        if comparator == Comparators.neq:
+            return bool
+        elif comparator == Comparators.eq:
+            return operator.not_
+    compare = comparator_functions[comparator]
+    right_type = type(right_value)
+    right_is_real = isinstance(right_value, numbers.Real)
+    mismatch_result = comparator == Comparators.neq
+
+    def compare_constant(left_value):
+        if __is_type_mismatch(left_value, right_type, right_is_real):
+            # Fallback, the data type could not be parsed from the event log itself
+            if not isinstance(left_value, str):
+                return mismatch_result
+            left_value = try_convert_value(left_value)
+            if __is_type_mismatch(left_value, right_type, right_is_real):
+                return mismatch_result
+        return compare(left_value, right_value)
+    return compare_constant
+
+
+def compile_comparison(comparator):
+    """
+    Compiles the comparison of do_comparison against a value that is only known when the guard is evaluated
+    :param comparator: the Comparators member
+    :return: function of the left and the right value that returns the result of the comparison
+    """
+    compare = comparator_functions[comparator]
+    mismatch_result = comparator == Comparators.neq
+
+    def compare_values(left_value, right_value):
+        if right_value == "":
+            if comparator == Comparators.neq:
+                return bool(left_value)
+            elif comparator == Comparators.eq:
+                return not bool(left_value)
+        right_type = type(right_value)
+        right_is_real = isinstance(right_value, numbers.Real)
+        if __is_type_mismatch(left_value, right_type, right_is_real):
+            if not isinstance(left_value, str):
+                return mismatch_result
+            left_value = try_convert_value(left_value)
+            if __is_type_mismatch(left_value, right_type, right_is_real):
+                return mismatch_result
+        return compare(left_value, right_value)
+    return compare_values
+
+
 def try_convert_value(value:str):
     """
     The real conversion method. always with try except to make it error prone, fallback is string
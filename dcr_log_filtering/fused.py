@@ -0,0 +1,53 @@
+# coding=utf-8
+"""
+The module fuses conformance checking and filtering: the XES file is streamed once, every trace is replayed while it
+is parsed and written to the filtered log immediately if it is conformant
+"""
+import os
+
+import cleaner
+import replay
+from marking import Marking
+
+
+def check_and_filter(dcr_graph, event_log_path, output_file_name, ca, marking_class=Marking, transition_cache=None,
+                     collect_events=False, ns=''):
+    """
+    Replays every trace of the XES file while it is streamed and writes the conformant traces to the output file
+    :param dcr_graph: the graph the traces are replayed on
+    :param event_log_path: path of the XES file
+    :param output_file_name: path of the filtered XES file
+    :param ca: the RuleViolation object the violating trace ids are appended to
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache
+    :param collect_events: if True the events of the conformant traces are returned for an in-memory discovery
+    :param ns: namespace of the XES file, see cleaner.filter_event_log
+    :return: list of (trace id, activity name, timestamp) of the conformant traces if collect_events is set,
+    otherwise None
+    """
+    replay.require_control_flow(dcr_graph, 'fused replay')
+    collected_events = [] if collect_events else None
+    trace_count = 0
+
+    def keep_trace(trace):
+        nonlocal trace_count
+        trace_id = cleaner.get_trace_id(trace)
+        if trace_id is None:
+            trace_id = str(trace_count)
+        trace_count += 1
+        events = cleaner.get_events(trace)
+        if replay.check_activities(dcr_graph, (activity_name for activity_name, _ in events), marking_class,
+                                   transition_cache):
+            ca.append_violating_trace_id(trace_id)
+            return False
+        if collected_events is not None:
+            for activity_name, timestamp in events:
+                collected_events.append((trace_id, activity_name, timestamp))
+        return True
+
+    tmp_file_name = output_file_name + '.tmp'
+    cnt, num_kept = cleaner.stream_event_log(event_log_path, tmp_file_name, keep_trace, ns)
+    os.replace(tmp_file_name, output_file_name)
+    print('# of traces in the event log: {}'.format(cnt))
+    print("Resulting event log contains {} trace(s)".format(num_kept))
+    return collected_events
@@ -2,10 +2,13 @@
 """
 This module contains the DCR graph representation. It also contains the XML format parsing functionality
 """
+import hashlib
 import xml.etree.ElementTree as Etree
 
 from activity import DCRActivityBase, DCRActivityNest, DCRActivity
-from conn import DCRConnection, ConnectionTypes, Condition, Milestone
+from conn import DCRConnection, ConnectionTypes, Condition, Milestone, Response
+from expr import GuardCompiler, parse_guard
+from timed import parse_duration
 
 
 class DCRGraph(object):
@@ -26,6 +29,16 @@ class DCRGraph(object):
         self.InitialIncluded = []
         self.InitialPending = []
         self.InitialExecuted = []
+        # Hash indexes that are kept consistent by add_node/remove_node/add_connection/remove_connection
+        self.NodesById = {}
+        self.NameMappings = {}
+        self.OutgoingConnections = {}
+        self.IncomingConnections = {}
+        self.TransitionConnections = {}
+        # Guard expressions of the relations by their id
+        self.Expressions = {}
+        # Compiled bitmask tables of the graph, built on demand by marking.BitTables
+        self.BitTables = None
 
         # Init XML reader for class
         self.dcr_xml = Etree.parse(xml_path)
@@ -34,6 +47,7 @@ class DCRGraph(object):
         # Start parsing the DCR Graph xml
         self.create_label_mapping()
         self.create_activities_dcr_graph()
+        self.create_expressions()
         self.create_connections_dcr_graph()
         self.create_initial_marking()
         self.set_condition_targets()
@@ -48,9 +62,15 @@ class DCRGraph(object):
         :return: a list with related mappings
         """
         mappings = {}
+        name_mappings = {}
         for mapping in self.dcr_xml_root.iter('labelMapping'):
             mappings[mapping.get('eventId')] = mapping.get('labelId')
+        for activity_id, event_name in mappings.items():
+            # the first event id of a label is the one that is found when looking up the label
+            if event_name not in name_mappings:
+                name_mappings[event_name] = activity_id
         self.Mappings = mappings
+        self.NameMappings = name_mappings
 
     def __add_event_to_graph(self, event):
         """
@@ -132,11 +152,22 @@ class DCRGraph(object):
                 node: DCRActivityBase = self.get_node(event_id)
                 self.InitialPending.append(node)
 
+    def create_expressions(self):
+        """
+        Creates the guard expressions of the DCR Graph from the XML
+        :return: None
+        """
+        for expressions in self.dcr_xml_root.iter('expressions'):
+            for expression in expressions.iter('expression'):
+                expression_id = expression.get('id')
+                self.Expressions[expression_id] = parse_guard(expression.get('value'), expression_id)
+
     def create_connections_dcr_graph(self):
         """
         Creates all constraints (connections) of a DCR Graph from the XML
         :return: None
         """
+        guarded_connections = []
         for constraint in self.dcr_xml_root.iter('constraints'):
             for constraint_type in constraint:
                 for connection in constraint_type:
@@ -146,7 +177,42 @@ class DCRGraph(object):
                     target_node = self.get_node(connection_destination)
                     connection_type = ConnectionTypes[connection.tag]
                     dcr_connection = DCRConnection.create_connection(source_node, target_node, connection_type)
+                    dcr_connection.Time = parse_duration(connection.get('time'))
                     self.add_connection(dcr_connection)
+                    expression = self.Expressions.get(connection.get('expressionId'))
+                    if expression is not None:
+                        guarded_connections.append((dcr_connection, expression))
+        self.compile_guards(guarded_connections)
+
+    def compile_guards(self, guarded_connections):
+        """
+        Compiles the guards of the relations together, equal sub-expressions of several guards are evaluated once
+        per event
+        :param guarded_connections: list of (connection, parsed guard)
+        :return: None
+        """
+        guard_compiler = GuardCompiler()
+        for _, expression in guarded_connections:
+            guard_compiler.add_uses(expression)
+        for connection, expression in guarded_connections:
+            connection.set_guard(expression, guard_compiler.compile(expression))
+        self.BitTables = None
+
+    def has_guards(self):
+        """
+        Checks if any relation of the graph is guarded, then the verdict of a trace depends on its event data
+        :return: True if a relation has a guard, False if not
+        """
+        return any(connection.Guard is not None for connection in self.Connections)
+
+    def has_timed_constraints(self):
+        """
+        Checks if any condition has a delay or any response has a deadline, then the verdict of a trace depends on the
+        timestamps of its events
+        :return: True if a condition or response is timed, False if not
+        """
+        return any(connection.Time is not None for connection in self.Connections
+                   if isinstance(connection, (Condition, Response)))
 
     def get_node(self, node_id: str) -> DCRActivityBase:
         """
@@ -154,35 +220,67 @@ class DCRGraph(object):
         :param node_id:The node id which is located
         :return: A DCRActivityBase object
         """
-        for node in self.Nodes:
-            if node.ActivityId == node_id:
-                return node
+        return self.NodesById.get(node_id)
 
     def get_node_by_name(self, activity_name):
         """
-        Gets a node by using the
-        :param activity_name:
-        :return:
+        Gets a node by using the activity label of the mappings
+        :param activity_name: the label of the activity
+        :return: A DCRActivityBase object or None if the label is not in the graph
         """
-        for activity_id, event_name in self.Mappings.items():
-            if event_name == activity_name:
-                return self.get_node(activity_id)
+        return self.NodesById.get(self.NameMappings.get(activity_name))
 
     def add_node(self, node: DCRActivityBase):
         """
-        Adds a node to the list of
+        Adds a node to the list of nodes and gives it the next dense index
         :type node: DCRNode
         :param node: The Node that will be added to the Graphs list
         """
+        node.Index = len(self.Nodes)
         self.Nodes.append(node)
+        if node.ActivityId not in self.NodesById:
+            self.NodesById[node.ActivityId] = node
+        self.OutgoingConnections.setdefault(node, [])
+        self.IncomingConnections.setdefault(node, {None: []})
+        self.__update_transition_connections(node)
+        self.BitTables = None
 
     def remove_node(self, node: DCRActivityBase):
         """
-        Removes a node from the DCR Graph
+        Removes a node and its connections from the DCR Graph, the remaining nodes are re-indexed to keep the indices
+        dense. The nested activities of a removed nesting activity are lifted to its own nesting activity
         :param node: Node to be removed
         :return: None
         """
+        for connection in [connection for connection in self.Connections
+                           if connection.StartNode is node or connection.EndNode is node]:
+            self.remove_connection(connection)
+        nesting_activity = getattr(node, "NestingActivity", None)
+        if nesting_activity is not None and node in nesting_activity.Activities:
+            nesting_activity.Activities.remove(node)
+        for activity in getattr(node, "Activities", []):
+            activity.NestingActivity = nesting_activity
+            if nesting_activity is not None:
+                nesting_activity.Activities.append(activity)
+        for activities in (self.InitialIncluded, self.InitialPending, self.InitialExecuted):
+            while node in activities:
+                activities.remove(node)
         self.Nodes.remove(node)
+        node.Index = None
+        for index, remaining in enumerate(self.Nodes):
+            remaining.Index = index
+        if self.NodesById.get(node.ActivityId) is node:
+            del self.NodesById[node.ActivityId]
+            for remaining in self.Nodes:
+                if remaining.ActivityId == node.ActivityId:
+                    self.NodesById[remaining.ActivityId] = remaining
+                    break
+        self.OutgoingConnections.pop(node, None)
+        self.IncomingConnections.pop(node, None)
+        self.TransitionConnections.pop(node, None)
+        for activity in getattr(node, "Activities", []):
+            self.__update_transition_connections(activity)
+        self.BitTables = None
 
     def add_role(self, role):
         """
@@ -201,6 +299,12 @@ class DCRGraph(object):
         :return:
         """
         self.Connections.append(connection)
+        self.OutgoingConnections.setdefault(connection.StartNode, []).append(connection)
+        incoming = self.IncomingConnections.setdefault(connection.EndNode, {None: []})
+        incoming[None].append(connection)
+        incoming.setdefault(type(connection), []).append(connection)
+        self.__update_transition_connections(connection.StartNode)
+        self.BitTables = None
 
     def remove_connection(self, connection):
         """
@@ -209,6 +313,29 @@ class DCRGraph(object):
         :return: None
         """
         self.Connections.remove(connection)
+        self.OutgoingConnections[connection.StartNode].remove(connection)
+        incoming = self.IncomingConnections[connection.EndNode]
+        incoming[None].remove(connection)
+        incoming[type(connection)].remove(connection)
+        self.__update_transition_connections(connection.StartNode)
+        self.BitTables = None
+
+    def __update_transition_connections(self, node):
+        """
+        Updates the connections that are performed when the node is executed. These are the outgoing connections
+        of the node followed by the ones of its nesting activity. If the node is a nesting activity the entries of
+        its nested activities are updated as well
+        :param node: the node whose outgoing connections changed
+        """
+        nodes = [node]
+        if hasattr(node, "Activities"):
+            nodes.extend(node.Activities)
+        for activity in nodes:
+            connections = list(self.OutgoingConnections.get(activity, []))
+            nesting_activity = getattr(activity, "NestingActivity", None)
+            if nesting_activity is not None:
+                connections.extend(self.OutgoingConnections.get(nesting_activity, []))
+            self.TransitionConnections[activity] = connections
 
     @staticmethod
     def get_graph_instance(xml_path=None):
@@ -230,29 +357,48 @@ class DCRGraph(object):
         :return: list of connections starting at the node
         """
         node = self.get_node(source_id)
-        connections_outgoing = []
-        for connection in self.Connections:
-            if connection.StartNode is node:
-                connections_outgoing.append(connection)
-        return connections_outgoing
+        return list(self.OutgoingConnections.get(node, []))
 
-    def get_connections_incoming(self, target_id, connection_type=None):
+    def get_transition_connections(self, node):
         """
-        Gets all connections that start at the node related to the source id
-        :param connection_type:
-        :param target_id: the id of the connection start node
-        :return: list of connections starting at the node
+        Gets all connections that are performed when the node is executed, i.e. the outgoing connections of the
+        node and of its nesting activity. The returned list is the index itself and must not be changed
+        :param node: the executed node
+        :return: list of connections
         """
-        node = self.get_node(target_id)
-        connections_incoming = []
-        for connection in self.Connections:
-            if connection.EndNode is node:
-                if connection_type is None:
-                    connections_incoming.append(connection)
-                else:
-                    if isinstance(connection, connection_type):
-                        connections_incoming.append(connection)
-        return connections_incoming
+        return self.TransitionConnections[node]
+
+    def get_connections_incoming(self, target_id, connection_type=None):
+        """
+        Gets all connections that end at the node related to the target id.
+        The returned list is the index itself and must not be changed
+        :param connection_type: optional connection class the connections are filtered by
+        :param target_id: the id of the connection end node
+        :return: list of connections ending at the node
+        """
+        incoming = self.IncomingConnections.get(self.get_node(target_id))
+        if incoming is None:
+            return []
+        if connection_type in incoming:
+            return incoming[connection_type]
+        return [connection for connection in incoming[None] if isinstance(connection, connection_type)]
+
+    def get_semantic_hash(self):
+        """
+        Gets a content hash over the semantics of the graph, i.e. the nodes, the label mapping, the constraints in
+        their order of execution and the initial marking. Layout, descriptions and meta data are not part of it
+        :return: hex digest of the hash
+        """
+        nodes = [(node.ActivityId, node.ActivityName, getattr(getattr(node, 'NestingActivity', None), 'ActivityId', None))
+                 for node in self.Nodes]
+        connections = [(type(connection).__name__, connection.StartNode.ActivityId, connection.EndNode.ActivityId,
+                        connection.Expression.get_key() if connection.Expression is not None else None,
+                        connection.Time)
+                       for connection in self.Connections]
+        marking = [sorted(node.ActivityId for node in activities)
+                   for activities in (self.InitialIncluded, self.InitialPending, self.InitialExecuted)]
+        semantics = repr((nodes, sorted(self.NameMappings.items()), connections, marking))
+        return hashlib.sha256(semantics.encode('utf-8')).hexdigest()
 
     def set_condition_targets(self):
         """
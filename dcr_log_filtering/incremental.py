@@ -0,0 +1,105 @@
+# coding=utf-8
+"""
+The module implements the incremental conformance checking of append-only event logs. The replay state of every
+case is persisted, on the next run only the events that were appended to existing cases and the new cases are
+replayed
+"""
+import os
+import pickle
+
+import replay
+from marking import BitMarking
+
+
+class IncrementalState(object):
+    """
+    The persisted replay state of all cases of an event log that were checked against one DCR graph
+    """
+
+    def __init__(self, graph_hash):
+        """
+        Constructor of an empty replay state
+        :param graph_hash: semantic hash of the graph the cases are replayed on
+        """
+        self.GraphHash = graph_hash
+        # case id -> (number of replayed events, marking key or None if the case was blocked, violated)
+        self.Cases = {}
+
+    @staticmethod
+    def load(path, dcr_graph):
+        """
+        Loads the replay state of the graph, a new state is created if there is none or if the graph has changed
+        :param path: path of the state file
+        :param dcr_graph: the graph the cases are replayed on
+        :return: the IncrementalState
+        """
+        graph_hash = dcr_graph.get_semantic_hash()
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            if state.GraphHash == graph_hash:
+                return state
+            print("The DCR graph has changed, all cases are replayed again")
+        return IncrementalState(graph_hash)
+
+    def save(self, path):
+        """
+        Saves the replay state
+        :param path: path of the state file
+        """
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(path + '.tmp', path)
+
+    def update(self, dcr_graph, traces, marking_class=BitMarking, transition_cache=None):
+        """
+        Resumes the replay of the cases with the events that were appended since the last update. Cases that were
+        blocked keep their verdict, cases with fewer events than before are replayed from the start and cases that
+        are no longer in the event log are dropped
+        :param dcr_graph: the graph the cases are replayed on
+        :param traces: iterable of (trace id, activity names) of the whole event log
+        :param marking_class: the marking engine, it has to support get_key and set_key
+        :param transition_cache: optional TransitionCache
+        :return: tuple of the number of new cases, resumed cases and replayed events
+        """
+        replay.require_control_flow(dcr_graph, 'incremental replay')
+        new_cases = 0
+        resumed_cases = 0
+        replayed_events = 0
+        trace_ids = set()
+        for trace_id, activity_names in traces:
+            trace_ids.add(trace_id)
+            marking = marking_class.get_initial_marking(dcr_graph)
+            start = 0
+            entry = self.Cases.get(trace_id)
+            if entry is None:
+                new_cases += 1
+            else:
+                event_count, key, _ = entry
+                if len(activity_names) >= event_count:
+                    if key is None or len(activity_names) == event_count:
+                        continue
+                    marking.set_key(key)
+                    start = event_count
+                    resumed_cases += 1
+
+            blocked = False
+            for activity_name in activity_names[start:]:
+                replayed_events += 1
+                if replay.perform_transition(marking, dcr_graph.get_node_by_name(activity_name), transition_cache):
+                    blocked = True
+                    break
+            if blocked:
+                self.Cases[trace_id] = (len(activity_names), None, True)
+            else:
+                self.Cases[trace_id] = (len(activity_names), marking.get_key(), not marking.is_accepting())
+        for trace_id in [trace_id for trace_id in self.Cases if trace_id not in trace_ids]:
+            del self.Cases[trace_id]
+        return new_cases, resumed_cases, replayed_events
+
+    def get_violating_trace_ids(self):
+        """
+        Gets the cases of the event log of the last update that are violating with the events replayed so far
+        :return: list of the violating trace ids
+        """
+        return [trace_id for trace_id, (_, _, violated) in self.Cases.items() if violated]
@@ -0,0 +1,131 @@
+# coding=utf-8
+"""
+The module implements the binary sidecar of a parsed event log. The sidecar holds the columns of the ColumnarEventLog
+as raw arrays behind a JSON header, the arrays are memory-mapped when the sidecar is loaded, thus a log is loaded
+without parsing the XES file again. The sidecar is bound to the size, the modification time and the content hash of
+the XES file it was created from
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+from eventlog import ColumnarEventLog
+from result_cache import get_file_fingerprint
+
+MAGIC = b'DCRLOG01'
+VERSION = 1
+ALIGNMENT = 64
+COLUMNS = ('Codes', 'Offsets', 'TraceIds', 'Timestamps', 'Roles')
+
+
+def get_sidecar_path(file_path):
+    """
+    Gets the path of the sidecar of an event log
+    :param file_path: path of the XES file
+    :return: path of the sidecar next to the XES file
+    """
+    return file_path + '.dcrlog'
+
+
+def __get_source_info(file_path, with_hash=True):
+    """
+    Gets the size, the modification time and optionally the content hash of the XES file
+    """
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'hash': get_file_fingerprint(file_path) if with_hash else None}
+
+
+def __align(position):
+    """
+    Rounds the position up to the next multiple of ALIGNMENT
+    """
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_sidecar(columnar_log: ColumnarEventLog, file_path, sidecar_path=None):
+    """
+    Writes the sidecar of a parsed event log, it is written to a temporary file and moved into place
+    :param columnar_log: the parsed event log
+    :param file_path: path of the XES file the log was parsed from
+    :param sidecar_path: path of the sidecar, next to the XES file if None
+    """
+    if sidecar_path is None:
+        sidecar_path = get_sidecar_path(file_path)
+    arrays = {column: np.ascontiguousarray(getattr(columnar_log, column)) for column in COLUMNS
+              if getattr(columnar_log, column) is not None}
+    layout = {}
+    position = 0
+    for column, column_array in arrays.items():
+        layout[column] = {'dtype': column_array.dtype.str, 'shape': list(column_array.shape), 'offset': position}
+        position = __align(position + column_array.nbytes)
+    header = json.dumps({'version': VERSION, 'source': __get_source_info(file_path),
+                         'activities': columnar_log.Activities, 'role_names': columnar_log.RoleNames,
+                         'arrays': layout}).encode('utf-8')
+    data_offset = __align(len(MAGIC) + 8 + len(header))
+
+    tmp_path = sidecar_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for column, column_array in arrays.items():
+            f.seek(data_offset + layout[column]['offset'])
+            f.write(column_array.tobytes())
+        f.truncate(data_offset + position)
+    os.replace(tmp_path, sidecar_path)
+
+
+def read_sidecar(file_path, with_timestamps=False, with_roles=False, sidecar_path=None):
+    """
+    Loads the event log from its sidecar with memory-mapped columns. The sidecar is valid if the size of the XES
+    file is unchanged and either its modification time or, if only that changed, its content hash is unchanged
+    :param file_path: path of the XES file
+    :param with_timestamps: if True the sidecar has to contain the timestamp column
+    :param with_roles: if True the sidecar has to contain the role column
+    :param sidecar_path: path of the sidecar, next to the XES file if None
+    :return: the ColumnarEventLog or None if there is no valid sidecar
+    """
+    if sidecar_path is None:
+        sidecar_path = get_sidecar_path(file_path)
+    if not os.path.exists(sidecar_path):
+        return None
+    try:
+        with open(sidecar_path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            header_length, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_length).decode('utf-8'))
+    except (OSError, ValueError, struct.error):
+        return None
+    if header.get('version') != VERSION:
+        return None
+
+    source = header['source']
+    current = __get_source_info(file_path, with_hash=False)
+    if current['size'] != source['size']:
+        return None
+    if current['mtime_ns'] != source['mtime_ns'] and get_file_fingerprint(file_path) != source['hash']:
+        return None
+
+    layout = header['arrays']
+    if (with_timestamps and 'Timestamps' not in layout) or (with_roles and 'Roles' not in layout):
+        return None
+    data_offset = __align(len(MAGIC) + 8 + header_length)
+    columns = {}
+    try:
+        for column, entry in layout.items():
+            dtype = np.dtype(entry['dtype'])
+            shape = tuple(entry['shape'])
+            if 0 in shape:
+                columns[column] = np.empty(shape, dtype=dtype)
+            else:
+                columns[column] = np.memmap(sidecar_path, dtype=dtype, mode='r',
+                                            offset=data_offset + entry['offset'], shape=shape)
+    except (OSError, ValueError):
+        # a truncated sidecar is shorter than its columns, it is rebuilt from the XES file
+        return None
+    return ColumnarEventLog(header['activities'], columns['Codes'], columns['Offsets'], columns['TraceIds'],
+                            columns.get('Timestamps'), columns.get('Roles'), header['role_names'])
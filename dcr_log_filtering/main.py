@@ -1,26 +1,39 @@
 # coding=utf-8
 """The main file of the dcr-cc that is executed"""
-from threading import Thread
-
 import os.path
-import pickle
+import sys
 import time
 
 import cmd_parser
+import automaton
+import batch
+import cleaner
+import diagnostics
 import eventlog_parser
+import fused
+import incremental
+import mining
+import monitor
+import parallel
+import replay
+import result_cache
+from result_cache import ResultCache
 from result_data import RuleViolation
+from roles import RoleTable
+from timed import TimingTable
 from graph import DCRGraph
-from marking import Marking
-from xml.etree import ElementTree as Etree
+from marking import Marking, BitMarking
+from transition_cache import TransitionCache
 
-import pm4py.discovery as discovery
+import pandas as pd
+import pm4py
 import pm4py.objects.log.importer as xes_importer
 import pm4py.visualization.petri_net as vis_factory
 
 
-
-miners = {
-    'inductive': discovery.discover_petri_net_inductive
+marking_engines = {
+    'list': Marking,
+    'bitset': BitMarking
 }
 
 def main():
@@ -29,68 +42,313 @@ def main():
     subsequently the conformance is checked
     :return:
     """
-    global dcr_graph
-
     args = cmd_parser.parse_args()
     data_path = args.eventLog
     out_path = args.outFile
     xml_path = args.XmlDcr
     ns = args.namespace
+    engine = args.engine
+    replay_mode = args.replay
+    transition_cache_size = args.transitionCache
+    automaton_path = args.automaton
+    max_states = args.maxStates
+    workers = args.workers
+    chunk_size = args.chunk_size
     dcr_graph = None
-    import_successful = False
 
     name = xml_path.split('/')[-1].split('.')[0]
-    name_tau_v = name + "_tauv.txt"
-    path_tau_v = f"Resources/pickle/{name_tau_v}"
-    tau_v = []
-
-
-    if os.path.exists(path_tau_v):
-        with open(path_tau_v, "rb") as f:
-            tau_v = pickle.load(f)
-        import_successful = True
-
-    if not import_successful:
-        start_time = time.clock()
-        tau_v = perform_rule_checking(data_path, xml_path)
-        with open(path_tau_v, "wb") as f:
-            pickle.dump(tau_v, f)
-        end_time = time.clock()
+    tau_v = None
+
+    if args.batch:
+        batch.run_batch(args.batch)
+        return
+
+    if args.compareGraphs:
+        start_time = time.perf_counter()
+        violating_sets = perform_multi_graph_checking(data_path, args.compareGraphs, engine)
+        print(f"Multi graph conformance calculation took: {time.perf_counter() - start_time}")
+        for graph_path, graph_tau_v in zip(args.compareGraphs, violating_sets):
+            graph_name = graph_path.split('/')[-1].split('.')[0]
+            print(f"{graph_name}: {len(graph_tau_v)} violating traces")
+            if out_path:
+                root, extension = os.path.splitext(out_path)
+                cleaner.filter_event_log(data_path, f"{root}_{graph_name}{extension}", graph_tau_v, ns)
+        return
+
+    if args.monitor:
+        perform_monitoring(xml_path, args.monitor, args.follow, args.maxOpenCases, args.idleTimeout,
+                           transition_cache_size)
+        return
+
+    if args.incremental:
+        # only the appended events are replayed, the filtered log is written again afterwards
+        start_time = time.perf_counter()
+        tau_v = perform_incremental_checking(data_path, xml_path, args.incremental, engine, transition_cache_size)
+        print(f"Incremental conformance calculation took: {time.perf_counter() - start_time}")
+        cleaner.filter_event_log(data_path, out_path, tau_v, ns)
+        discover(out_path, name, None, args.miners, args.minerTimeout)
+        return
+
+    # The results are cached by the semantic hash of the graph and the content hash of the event log
+    conformance_cache = None
+    # the cached results do not contain the role checking and the violation diagnostics
+    if args.cacheSize > 0 and not args.checkRoles and args.diagnostics is None:
+        conformance_cache = ResultCache(args.cacheDir, args.cacheSize * 1024 * 1024)
+        # the graph is parsed once, the replay uses the same instance
+        dcr_graph = DCRGraph.get_graph_instance(xml_path)
+        graph_hash = dcr_graph.get_semantic_hash()
+        log_fingerprint = result_cache.get_file_fingerprint(data_path)
+        tau_v = conformance_cache.get_violating_trace_ids(graph_hash, log_fingerprint)
+
+    if tau_v is not None:
+        print(f"Conformance results were found in the result cache: {len(tau_v)} violating traces")
+    elif args.fused:
+        # check, filter and optionally discover on a single pass over the event log
+        start_time = time.perf_counter()
+        tau_v, log_d = perform_fused_checking(data_path, xml_path, out_path, engine, transition_cache_size,
+                                              args.inMemory, ns, dcr_graph)
+        if conformance_cache is not None:
+            conformance_cache.put_violating_trace_ids(graph_hash, log_fingerprint, tau_v)
+        print(f"Fused conformance checking and filtering took: {time.perf_counter() - start_time}")
+        discover(out_path, name, log_d, args.miners, args.minerTimeout)
+        return
+    else:
+        start_time = time.perf_counter()
+        tau_v = perform_rule_checking(data_path, xml_path, engine, replay_mode, transition_cache_size,
+                                      automaton_path, max_states, workers, chunk_size, conformance_cache,
+                                      args.logCache, args.checkRoles, args.diagnostics, dcr_graph)
+        if conformance_cache is not None:
+            conformance_cache.put_violating_trace_ids(graph_hash, log_fingerprint, tau_v)
+        end_time = time.perf_counter()
         print(f"Conformance calculation took: {end_time-start_time}")
         print(len(tau_v))
 
     if not os.path.exists(out_path) and tau_v:
-        filter_event_log(data_path, out_path, tau_v, ns)
+        cleaner.filter_event_log(data_path, out_path, tau_v, ns)
 
-    discover(out_path, name)
+    discover(out_path, name, None, args.miners, args.minerTimeout)
 
 
-def perform_rule_checking(data_path, xml_path):
-    global dcr_graph
-    dcr_graph = DCRGraph.get_graph_instance(xml_path)
-    event_log = eventlog_parser.get_event_log(data_path)
+def perform_rule_checking(data_path, xml_path, engine='list', replay_mode='trace', transition_cache_size=0,
+                          automaton_path=None, max_states=100000, workers=1, chunk_size=1000, conformance_cache=None,
+                          log_cache=False, check_roles=False, diagnostics_path=None, dcr_graph=None):
+    if dcr_graph is None:
+        dcr_graph = DCRGraph.get_graph_instance(xml_path)
+    marking_class = marking_engines[engine]
+    transition_cache = None
+    if transition_cache_size:
+        transition_cache = TransitionCache(transition_cache_size)
     ca = RuleViolation()
-    # if parallel is set: code is executed in thread pool
-    parallel = False
+    violation_diagnostics = None
+    if diagnostics_path is not None and (dcr_graph.has_guards() or dcr_graph.has_timed_constraints() or check_roles):
+        # the violations of guards, delays, deadlines and roles have no constraint id, the report stays empty
+        print("The violation diagnostics are not collected for guarded or timed graphs or with role checking")
+        if diagnostics_path:
+            diagnostics.ViolationDiagnostics(dcr_graph).write_report(diagnostics_path)
+    elif diagnostics_path is not None:
+        violation_diagnostics = diagnostics.ViolationDiagnostics(dcr_graph)
+        if workers > 1 or replay_mode in ('trie', 'automaton'):
+            # the violations are diagnosed on the marking of the failed event, which the other modes do not keep
+            print("The violation diagnostics are collected by the variant replay")
+            workers = 1
+            if replay_mode in ('trie', 'automaton'):
+                replay_mode = 'variant'
+
+    # the verdict of a guarded graph depends on the event data, thus every trace is replayed with its data
+    if dcr_graph.has_guards():
+        if replay_mode != 'trace' or workers > 1:
+            print("The graph has guarded relations, the traces are replayed one by one with their event data")
+        event_log = eventlog_parser.get_event_log(data_path)
+        role_table = RoleTable(dcr_graph) if check_roles else None
+        timing_table = TimingTable(dcr_graph) if dcr_graph.has_timed_constraints() else None
+        for trace in event_log.Traces:
+            reason = replay.check_trace(dcr_graph, trace, marking_class, role_table, timing_table)
+            if reason is not None:
+                ca.append_conformance_data(trace, reason)
+        print_violation_counts(ca)
+        return ca.ViolatingTraceIDs
+
+    # the verdict of a graph with delays or deadlines depends on the timestamps of the events
+    if dcr_graph.has_timed_constraints():
+        if replay_mode != 'trace' or workers > 1:
+            print("The graph has timed constraints, the traces are replayed one by one with their timestamps")
+        trace_count = replay.replay_timed(dcr_graph, eventlog_parser.iterate_trace_events(data_path, True), ca,
+                                          marking_class, transition_cache, check_roles)
+        print(f"{trace_count} traces were replayed with timed constraints")
+        print_violation_counts(ca)
+        return ca.ViolatingTraceIDs
+
+    # the role or resource of every event has to be allowed to execute its activity
+    if check_roles:
+        trace_count = replay.replay_roles(dcr_graph, eventlog_parser.iterate_trace_events(data_path, True), ca,
+                                          marking_class, transition_cache)
+        print(f"{trace_count} traces were replayed with role checking")
+        print_violation_counts(ca)
+        return ca.ViolatingTraceIDs
+
+    # the streamed traces are replayed while the log is parsed, the log is never built in memory
+    if replay_mode == 'stream':
+        trace_count = replay.replay_trace_stream(dcr_graph, eventlog_parser.iterate_traces(data_path), ca,
+                                                 marking_class, transition_cache, violation_diagnostics)
+        print(f"{trace_count} traces were streamed")
+        report_diagnostics(violation_diagnostics, diagnostics_path)
+        return ca.ViolatingTraceIDs
+
+    # the log is held as integer activity codes, the variants are grouped and replayed on the codes
+    if replay_mode == 'columnar':
+        if workers > 1:
+            # the workers share the memory-mapped sidecar of the log and only receive trace ranges
+            columnar_log = parallel.replay_parallel_columnar(xml_path, data_path, ca, marking_class, workers,
+                                                             chunk_size, transition_cache_size, log_cache,
+                                                             transition_cache)
+            print(f"{len(columnar_log)} traces were replayed by {workers} workers on the memory-mapped log")
+        else:
+            columnar_log = eventlog_parser.get_columnar_event_log(data_path, use_sidecar=log_cache)
+            variant_count = replay.replay_columnar(dcr_graph, columnar_log, ca, marking_class, transition_cache,
+                                                   violation_diagnostics)
+            print(f"{len(columnar_log)} traces with {columnar_log.get_event_count()} events were replayed as "
+                  f"{variant_count} variants, the activity codes take {columnar_log.Codes.nbytes} bytes")
+        print_transition_cache_statistics(transition_cache)
+        report_diagnostics(violation_diagnostics, diagnostics_path)
+        return ca.ViolatingTraceIDs
 
+    event_log = eventlog_parser.get_event_log(data_path)
 
-    if parallel:
-        threads = []
-        for trace in event_log.Traces:
-            t = Thread(target=rule_checking, args=(trace, ca))
-            threads.append(t)
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join()
+    if replay_mode == 'automaton':
+        try:
+            dcr_automaton = automaton.get_automaton(dcr_graph, xml_path, automaton_path, max_states)
+            print(f"The automaton of the graph has {dcr_automaton.get_state_count()} states")
+            automaton.replay_automaton(dcr_automaton, event_log, ca)
+            return ca.ViolatingTraceIDs
+        except automaton.StateExplosionError as e:
+            print(f"{e}, falling back to the variant replay")
+            replay_mode = 'variant'
+
+    # with more than one worker the traces are replayed in chunks in a process pool
+    if workers > 1:
+        parallel.replay_parallel(xml_path, event_log, ca, marking_class, workers, chunk_size, transition_cache_size,
+                                 transition_cache)
+    elif replay_mode == 'variant' or conformance_cache is not None:
+        if conformance_cache is not None:
+            # the cached verdicts are kept per variant, thus the trace and trie replay are served by the variants
+            variant_count = conformance_cache.replay_variants(dcr_graph, event_log, ca, marking_class,
+                                                              transition_cache)
+            print(f"Result cache: {conformance_cache.Hits} variant hits, {conformance_cache.Misses} misses")
+        else:
+            variant_count = replay.replay_variants(dcr_graph, event_log, ca, marking_class, transition_cache,
+                                                   violation_diagnostics)
+        trace_count = len(event_log.Traces)
+        compression_ratio = trace_count / variant_count if variant_count else 0
+        print(f"{trace_count} traces were replayed as {variant_count} variants "
+              f"(compression ratio: {compression_ratio:.2f})")
+    elif replay_mode == 'trie':
+        transitions = replay.replay_trie(dcr_graph, event_log, ca, marking_class, transition_cache)
+        event_count = sum(len(trace.Events) for trace in event_log.Traces)
+        print(f"{transitions} transitions were executed for {event_count} events")
     else:
         for trace in event_log.Traces:
-            rule_checking(trace,ca)
+            rule_checking(trace, ca, marking_class, transition_cache, violation_diagnostics, dcr_graph)
+    print_transition_cache_statistics(transition_cache)
+    report_diagnostics(violation_diagnostics, diagnostics_path)
     # If fitness information is desired uncomment:
     # create_conformance_output(ca, event_log)
     return ca.ViolatingTraceIDs
 
 
+def perform_multi_graph_checking(data_path, xml_paths, engine='list'):
+    """
+    Checks the event log against several DCR graphs in a single streaming pass, every trace variant is replayed once
+    with one marking per graph
+    :param data_path: path of the XES file
+    :param xml_paths: paths of the DCR graph xml files
+    :param engine: the marking engine, see marking_engines
+    :return: list with the set of violating trace ids of every graph
+    """
+    dcr_graphs = [DCRGraph(xml_path) for xml_path in xml_paths]
+    return replay.replay_multi_graph(dcr_graphs, eventlog_parser.iterate_traces(data_path), marking_engines[engine])
+
+
+def perform_fused_checking(data_path, xml_path, out_path, engine='list', transition_cache_size=0, in_memory=False,
+                           ns='', dcr_graph=None):
+    """
+    Streams the event log once, replays every trace while it is parsed and writes the conformant traces to the
+    output log
+    :param data_path: path of the XES file
+    :param xml_path: path of the DCR graph xml
+    :param out_path: path of the filtered XES file
+    :param engine: the marking engine, see marking_engines
+    :param transition_cache_size: size of the transition cache, 0 disables it
+    :param in_memory: if True the conformant traces are also returned as a dataframe for the discovery
+    :param ns: namespace of the XES file
+    :param dcr_graph: the graph if it is already loaded, otherwise it is loaded from xml_path
+    :return: tuple of the violating trace ids and the dataframe of the filtered log or None
+    """
+    if dcr_graph is None:
+        dcr_graph = DCRGraph.get_graph_instance(xml_path)
+    transition_cache = None
+    if transition_cache_size:
+        transition_cache = TransitionCache(transition_cache_size)
+    ca = RuleViolation()
+    events = fused.check_and_filter(dcr_graph, data_path, out_path, ca, marking_engines[engine], transition_cache,
+                                    in_memory, ns)
+    log_d = None
+    if events is not None:
+        log_d = pm4py.format_dataframe(
+            pd.DataFrame(events, columns=['case:concept:name', 'concept:name', 'time:timestamp']),
+            case_id='case:concept:name', activity_key='concept:name', timestamp_key='time:timestamp')
+    return ca.ViolatingTraceIDs, log_d
+
+
+def perform_incremental_checking(data_path, xml_path, state_path, engine='bitset', transition_cache_size=0):
+    """
+    Resumes the replay of an append-only event log from the persisted state of the previous run
+    :param data_path: path of the XES file
+    :param xml_path: path of the DCR graph xml
+    :param state_path: path of the file the replay state of the cases is persisted in
+    :param engine: the marking engine, see marking_engines
+    :param transition_cache_size: size of the transition cache, 0 disables it
+    :return: the violating trace ids of the whole event log
+    """
+    dcr_graph = DCRGraph.get_graph_instance(xml_path)
+    transition_cache = None
+    if transition_cache_size:
+        transition_cache = TransitionCache(transition_cache_size)
+    state = incremental.IncrementalState.load(state_path, dcr_graph)
+    new_cases, resumed_cases, replayed_events = state.update(dcr_graph, eventlog_parser.iterate_traces(data_path),
+                                                             marking_engines[engine], transition_cache)
+    state.save(state_path)
+    print(f"{new_cases} new cases and {resumed_cases} resumed cases, {replayed_events} events were replayed")
+    return state.get_violating_trace_ids()
+
+
+def perform_monitoring(xml_path, source, follow=False, max_open_cases=100000, idle_timeout=None,
+                       transition_cache_size=0):
+    """
+    Runs the online conformance monitor until the event source is exhausted, violations are written to stdout
+    :param xml_path: path of the DCR graph xml
+    :param source: the event source, see monitor.read_lines
+    :param follow: if True a file source is followed like tail -f
+    :param max_open_cases: the maximal number of cases kept in memory
+    :param idle_timeout: seconds without an event after which a case is closed, None keeps idle cases
+    :param transition_cache_size: size of the transition cache, 0 disables it
+    :return: the RuleViolation object with the violating case ids
+    """
+    dcr_graph = DCRGraph.get_graph_instance(xml_path)
+    transition_cache = None
+    if transition_cache_size:
+        transition_cache = TransitionCache(transition_cache_size)
+    ca = RuleViolation()
+    conformance_monitor = monitor.ConformanceMonitor(dcr_graph, ca, max_open_cases, idle_timeout, transition_cache)
+    try:
+        conformance_monitor.run(monitor.read_lines(source, follow))
+    except KeyboardInterrupt:
+        pass
+    conformance_monitor.finish()
+    print(f"{conformance_monitor.EventCount} events were monitored, "
+          f"{conformance_monitor.ViolationCount} violations", file=sys.stderr)
+    return ca
+
+
 def create_conformance_output(ca, event_log):
     """
     Creates the console output of the program
@@ -128,58 +386,91 @@ def create_conformance_output(ca, event_log):
         print('The conformance ratio is 100%')
 
 
-def filter_event_log(event_log_path, output_file_name, tau_v, ns=''):
-    event_log = Etree.parse(event_log_path)
-    root = event_log.getroot()
-    all_traces = root.findall(ns + 'trace')
-    cnt_fail = len(tau_v)
-    cnt = len(all_traces)
-    print('# of traces to be filtered: {}'.format(cnt_fail))
-    print('# of traces in the event log: {}'.format(cnt))
-    for trace in all_traces:
-        trace_name = trace.findall(ns + 'string')
-        for trace_id in trace_name:
-            if trace_id.get('key') == 'concept:name' \
-                    and trace_id.get('value') in tau_v:
-                root.remove(trace)
-    num_filtered = len(root.findall(ns + 'trace'))
-    if cnt - cnt_fail == num_filtered:
-        print(f"Resulting event log contains {num_filtered} trace(s)")
-        print("Event log successfully filtered")
-        event_log.write(output_file_name)
-
-
-def rule_checking(trace, ca):
+def print_violation_counts(ca):
+    """
+    Prints the number of violating traces per reason of the violation
+    :param ca: the RuleViolation object
+    """
+    for reason, count in sorted(ca.get_violation_counts().items()):
+        print(f"{count} traces have a {reason} violation")
+
+
+def print_transition_cache_statistics(transition_cache):
+    """
+    Prints the hits and misses of the transition cache
+    :param transition_cache: the TransitionCache or None if the cache is disabled
+    """
+    if transition_cache is not None:
+        print(f"Transition cache: {transition_cache.Hits} hits, {transition_cache.Misses} misses "
+              f"(hit ratio: {transition_cache.get_hit_ratio():.2f})")
+
+
+def report_diagnostics(violation_diagnostics, diagnostics_path):
+    """
+    Prints the per-constraint violation report and writes it if a path is given
+    :param violation_diagnostics: the ViolationDiagnostics or None if no diagnostics were collected
+    :param diagnostics_path: path of the csv report, empty to only print it
+    """
+    if violation_diagnostics is None:
+        return
+    violation_diagnostics.print_report()
+    if diagnostics_path:
+        violation_diagnostics.write_report(diagnostics_path)
+
+
+def rule_checking(trace, ca, marking_class=Marking, transition_cache=None, violation_diagnostics=None,
+                  dcr_graph=None):
     """
     The rule checking method gets a trace as an input and then simulates the model with
     the constraints retrieved from the DCR graph.
     :param ca: The conformance analysis data object that is used for the overall conformance checking
-    :param trace: the trace that is checked within this thread
+    :param trace: the trace that is checked
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache
+    :param violation_diagnostics: optional ViolationDiagnostics the violation of the trace is counted in
+    :param dcr_graph: the graph the trace is replayed on, the last loaded graph if None
     :return:
     """
-    marking = Marking.get_initial_marking()
-    violated = False
-    for event in trace.Events:
-        node = dcr_graph.get_node_by_name(event.EventName)
-        violated = marking.perform_transition_node(node)
-        if violated:
-            break
-    if not violated and len(marking.PendingResponse) != 0:
-        for pending in  marking.PendingResponse:
-            if pending in marking.Included:
-                violated = True
-                break
+    if dcr_graph is None:
+        dcr_graph = DCRGraph.get_graph_instance()
+    if violation_diagnostics is not None:
+        violation = replay.diagnose_nodes(dcr_graph, (dcr_graph.get_node_by_name(event.EventName)
+                                                      for event in trace.Events),
+                                          violation_diagnostics, marking_class, transition_cache)
+        if violation is not None:
+            violation_diagnostics.add_violation(violation)
+            ca.append_conformance_data(trace, True)
+        return
+    violated = replay.check_activities(dcr_graph, (event.EventName for event in trace.Events), marking_class,
+                                       transition_cache)
     if violated:
         ca.append_conformance_data(trace, violated)
 
-def discover(out_file,name):
-    log_d = xes_importer.xes.importer.apply(out_file)
-
-
-    for miner in miners:
-        net, im, fm = miners[miner](log_d)
-        pviz = vis_factory.visualizer.apply(net, im, fm)
-        pviz.render(name)
+def discover(out_file, name, log_d=None, miner_names=None, timeout=None):
+    """
+    Discovers the process models of the miners from the filtered event log and renders them. The log is loaded once,
+    the miners run concurrently in the mining stage
+    :param out_file: path of the filtered XES file, it is imported if no log is given
+    :param name: name of the rendered models, the miner name is appended
+    :param log_d: optional filtered log that is already in memory
+    :param miner_names: names of the miners, see mining.miners, the inductive miner if None
+    :param timeout: seconds after which a miner is terminated, None for no timeout
+    """
+    if log_d is None:
+        log_d = xes_importer.xes.importer.apply(out_file)
+    if miner_names is None:
+        miner_names = ['inductive']
+
+    results = mining.run_miners(log_d, miner_names, timeout)
+    for miner_name in miner_names:
+        result = results[miner_name]
+        peak_memory = f"{result.PeakMemory} KiB" if result.PeakMemory is not None else "n/a"
+        print(f"Miner {miner_name}: {result.Status} after {result.WallTime:.2f}s, "
+              f"peak memory: {peak_memory}" + (f" ({result.Error})" if result.Error else ""))
+        if result.Status == 'ok':
+            net, im, fm = result.PetriNet
+            pviz = vis_factory.visualizer.apply(net, im, fm)
+            pviz.render(f"{name}_{miner_name}")
 
 
 if __name__ == '__main__':
@@ -23,12 +23,14 @@ class Marking(object):
     InitialMarking = None
 
     @staticmethod
-    def get_initial_marking():
+    def get_initial_marking(dcr_graph: DCRGraph = None):
         """
         Method creates a copy of the Initial Marking of the graph
+        :param dcr_graph: the graph, the last created graph instance if None
         :return: A copy of the Initial Marking of a graph
         """
-        dcr_graph = DCRGraph.get_graph_instance()
+        if dcr_graph is None:
+            dcr_graph = DCRGraph.get_graph_instance()
         initial_included = []
         for incl in dcr_graph.InitialIncluded:
             initial_included.append(incl)
@@ -39,20 +41,54 @@ class Marking(object):
         for exec in dcr_graph.InitialExecuted:
             initial_executed.append(exec)
         return Marking(initial_included, initial_pending,
-                       initial_executed)
+                       initial_executed, dcr_graph)
 
-    def __init__(self, included: [DCRActivityBase], pending_response: [DCRActivityBase], executed: [DCRActivityBase]):
+    def __init__(self, included: [DCRActivityBase], pending_response: [DCRActivityBase], executed: [DCRActivityBase],
+                 dcr_graph: DCRGraph = None):
         self.Included = included
         self.PendingResponse = pending_response
         self.Executed = executed
-        self.dcr_graph: DCRGraph = DCRGraph.get_graph_instance()
+        if dcr_graph is None:
+            dcr_graph = DCRGraph.get_graph_instance()
+        self.dcr_graph: DCRGraph = dcr_graph
+        # The expr.GuardContext of the case, guarded relations are evaluated on it if it is set
+        self.GuardContext = None
+
+    def copy(self):
+        """
+        Creates a copy of the marking that can be changed independently
+        :return: the copied marking
+        """
+        marking = Marking(list(self.Included), list(self.PendingResponse), list(self.Executed), self.dcr_graph)
+        marking.GuardContext = self.GuardContext
+        return marking
+
+    def get_key(self):
+        """
+        Gets a hashable and canonical representation of the marking, which is the same for equal markings
+        :return: tuple of the Included, Pending Response and Executed bitmasks over the activity indices
+        """
+        return BitTables.to_mask(self.Included), BitTables.to_mask(self.PendingResponse), \
+            BitTables.to_mask(self.Executed)
+
+    def set_key(self, key):
+        """
+        Sets the marking to the state of a key that was created by get_key
+        :param key: tuple of the Included, Pending Response and Executed bitmasks
+        """
+        included, pending_response, executed = key
+        nodes = self.dcr_graph.Nodes
+        self.Included = [node for node in nodes if included >> node.Index & 1]
+        self.PendingResponse = [node for node in nodes if pending_response >> node.Index & 1]
+        self.Executed = [node for node in nodes if executed >> node.Index & 1]
 
     def perform_transition_connection(self, connection):
         """
         Performs a transition for each connection
         :return: new Marking
         """
-        return connection.perform_transition(self)
+        if connection.is_active(self):
+            return connection.perform_transition(self)
 
     def perform_transition_node(self, node):
         """
@@ -90,11 +126,8 @@ class Marking(object):
                     self.PendingResponse.remove(node.NestingActivity)
 
 
-        connections = self.dcr_graph.get_connections_outgoing(node.ActivityId)
-        if node.NestingActivity is not None:
-            connections.extend(self.dcr_graph.get_connections_outgoing(node.NestingActivity.ActivityId))
-        for connection in connections:
-                self.perform_transition_connection(connection)
+        for connection in self.dcr_graph.get_transition_connections(node):
+            self.perform_transition_connection(connection)
 
         return False
 
@@ -113,7 +146,7 @@ class Marking(object):
                 # If the Start Node is included in the model as well as pending
                 # the target is blocked
                 if milestone.StartNode in self.Included and \
-                        milestone.StartNode in self.PendingResponse:
+                        milestone.StartNode in self.PendingResponse and milestone.is_active(self):
                     return True
         # Check only if the node is a condition target
         if node.IsConditionTarget:
@@ -122,10 +155,20 @@ class Marking(object):
                 # If the Start Node connection is included in the model
                 # as well as not executed yet the activity is blocked
                 if condition.StartNode in self.Included \
-                        and condition.StartNode not in self.Executed:
+                        and condition.StartNode not in self.Executed and condition.is_active(self):
                     return True
         return False
 
+    def is_accepting(self):
+        """
+        Checks if the marking is accepting, i.e. no included activity is still pending
+        :return: True if no included activity is pending, False if not
+        """
+        for pending in self.PendingResponse:
+            if pending in self.Included:
+                return False
+        return True
+
     def get_included_activities(self, activities: []):
         """
         Get all included activities in a list
@@ -134,3 +177,297 @@ class Marking(object):
         """
         included_nested_activities = [e for e in activities if e in self.Included]
         return included_nested_activities
+
+    def is_included(self, node):
+        """
+        Checks if the node is included
+        :param node: the node
+        :return: True if included, False if not
+        """
+        return node in self.Included
+
+    def is_pending(self, node):
+        """
+        Checks if the node is an included pending response
+        :param node: the node
+        :return: True if included and pending, False if not
+        """
+        return node in self.Included and node in self.PendingResponse
+
+    def is_executed(self, node):
+        """
+        Checks if the node is executed
+        :param node: the node
+        :return: True if executed, False if not
+        """
+        return node in self.Executed
+
+
+class BitTables(object):
+    """
+    The bitmask representation of a DCR graph that is used by the BitMarking.
+    Every activity is addressed by its dense index (``DCRActivityBase.Index``), a set of activities is
+    an integer where bit i is set if the activity with index i is contained
+    """
+    INCLUDE = 0
+    EXCLUDE = 1
+    RESPONSE = 2
+
+    def __init__(self, dcr_graph: DCRGraph):
+        """
+        Compiles the tables from the nodes, connections and the initial marking of a graph
+        :param dcr_graph: the graph the tables are compiled from
+        """
+        node_count = len(dcr_graph.Nodes)
+        self.ConditionSources = [0] * node_count
+        self.MilestoneSources = [0] * node_count
+        # Guarded constraints as (guard, source bit), the effects of a node with a guarded effect as (guard, effect)
+        self.GuardedConditions = [()] * node_count
+        self.GuardedMilestones = [()] * node_count
+        self.GuardedEffects = [()] * node_count
+        self.Parents = [None] * node_count
+        self.Children = [0] * node_count
+        self.Effects = [()] * node_count
+        self.InitialIncluded = BitTables.to_mask(dcr_graph.InitialIncluded)
+        self.InitialPending = BitTables.to_mask(dcr_graph.InitialPending)
+        self.InitialExecuted = BitTables.to_mask(dcr_graph.InitialExecuted)
+
+        for node in dcr_graph.Nodes:
+            if hasattr(node, "Activities"):
+                self.Children[node.Index] = BitTables.to_mask(node.Activities)
+            elif node.NestingActivity is not None:
+                self.Parents[node.Index] = node.NestingActivity.Index
+
+        for connection in dcr_graph.Connections:
+            target = connection.EndNode.Index
+            source_bit = 1 << connection.StartNode.Index
+            if isinstance(connection, conn.Condition):
+                if connection.Guard is None:
+                    self.ConditionSources[target] |= source_bit
+                else:
+                    self.GuardedConditions[target] += ((connection.Guard, source_bit),)
+            elif isinstance(connection, conn.Milestone):
+                if connection.Guard is None:
+                    self.MilestoneSources[target] |= source_bit
+                else:
+                    self.GuardedMilestones[target] += ((connection.Guard, source_bit),)
+
+        for node in dcr_graph.Nodes:
+            effects = []
+            for connection in dcr_graph.get_transition_connections(node):
+                effect = self.compile_effect(connection)
+                if effect is not None:
+                    effects.append((connection.Guard, effect))
+            if any(guard is not None for guard, _ in effects):
+                # the effects of the node keep their order, the unguarded ones have the guard None
+                self.GuardedEffects[node.Index] = tuple(effects)
+            else:
+                self.Effects[node.Index] = tuple(effect for _, effect in effects)
+
+    @staticmethod
+    def get_tables(dcr_graph: DCRGraph):
+        """
+        Gets the tables of a graph, they are compiled once and kept until the graph is changed
+        :param dcr_graph: the graph
+        :return: the BitTables of the graph
+        """
+        if dcr_graph.BitTables is None:
+            dcr_graph.BitTables = BitTables(dcr_graph)
+        return dcr_graph.BitTables
+
+    @staticmethod
+    def to_mask(activities):
+        """
+        Converts a collection of activities to a bitmask
+        :param activities: the activities
+        :return: the bitmask with the bits of all activities set
+        """
+        mask = 0
+        for activity in activities:
+            mask |= 1 << activity.Index
+        return mask
+
+    def compile_effect(self, connection):
+        """
+        Compiles a connection to the bitwise operation it performs on a marking, the masks already contain
+        the nested activities respectively the nesting activity that are affected by the connection
+        :param connection: the connection
+        :return: tuple of (operation, mask, sibling mask, nesting activity bit) or None for constraints
+        that do not change the marking
+        """
+        end_node = connection.EndNode
+        mask = 1 << end_node.Index
+        parent = None
+        if hasattr(end_node, "Activities"):
+            mask |= self.Children[end_node.Index]
+        elif end_node.NestingActivity is not None:
+            parent = end_node.NestingActivity.Index
+
+        if isinstance(connection, conn.Exclude):
+            if parent is None:
+                return BitTables.EXCLUDE, mask, 0, 0
+            return BitTables.EXCLUDE, mask, self.Children[parent], 1 << parent
+        if parent is not None:
+            mask |= 1 << parent
+        if isinstance(connection, conn.Include):
+            return BitTables.INCLUDE, mask, 0, 0
+        if isinstance(connection, conn.Response):
+            return BitTables.RESPONSE, mask, 0, 0
+        return None
+
+
+class BitMarking(object):
+    """
+    Alternative representation of a marking where each of the three sets Included, Pending Response and Executed
+    is an integer bitmask over the activity indices of the graph. The transitions are the same as in Marking,
+    but performed with bitwise operations on the compiled BitTables
+    """
+
+    @staticmethod
+    def get_initial_marking(dcr_graph: DCRGraph = None):
+        """
+        Method creates a copy of the Initial Marking of the graph
+        :param dcr_graph: the graph, the last created graph instance if None
+        :return: A copy of the Initial Marking of a graph
+        """
+        if dcr_graph is None:
+            dcr_graph = DCRGraph.get_graph_instance()
+        tables = BitTables.get_tables(dcr_graph)
+        return BitMarking(tables, tables.InitialIncluded, tables.InitialPending, tables.InitialExecuted)
+
+    def __init__(self, tables: BitTables, included: int = 0, pending_response: int = 0, executed: int = 0):
+        self.Tables = tables
+        self.Included = included
+        self.PendingResponse = pending_response
+        self.Executed = executed
+        # The expr.GuardContext of the case, guarded relations are evaluated on it if it is set
+        self.GuardContext = None
+
+    def copy(self):
+        """
+        Creates a copy of the marking that can be changed independently
+        :return: the copied marking
+        """
+        marking = BitMarking(self.Tables, self.Included, self.PendingResponse, self.Executed)
+        marking.GuardContext = self.GuardContext
+        return marking
+
+    def get_key(self):
+        """
+        Gets a hashable and canonical representation of the marking, which is the same for equal markings
+        :return: tuple of the Included, Pending Response and Executed bitmasks
+        """
+        return self.Included, self.PendingResponse, self.Executed
+
+    def set_key(self, key):
+        """
+        Sets the marking to the state of a key that was created by get_key
+        :param key: tuple of the Included, Pending Response and Executed bitmasks
+        """
+        self.Included, self.PendingResponse, self.Executed = key
+
+    def perform_transition_node(self, node):
+        """
+        Performs a transition on the marking
+        :param node: node that is executed
+        :return: True if the node is blocked or not included, False if the transition was performed
+        """
+        if node is None:
+            return False
+
+        tables = self.Tables
+        index = node.Index
+        included = self.Included
+        pending = self.PendingResponse
+        executed = self.Executed
+
+        if self.mask_is_blocked(index):
+            return True
+        parent = tables.Parents[index]
+        if parent is not None and self.mask_is_blocked(parent):
+            return True
+
+        bit = 1 << index
+        if not included & bit:
+            return True
+
+        if not executed & bit:
+            executed |= bit
+            if parent is not None and not tables.Children[parent] & included & ~executed:
+                executed |= 1 << parent
+
+        if pending & bit:
+            pending &= ~bit
+            if parent is not None and not tables.Children[parent] & pending:
+                pending &= ~(1 << parent)
+
+        effects = tables.Effects[index]
+        if tables.GuardedEffects[index]:
+            context = self.GuardContext
+            effects = [effect for guard, effect in tables.GuardedEffects[index]
+                       if guard is None or context is None or guard(context)]
+        for operation, mask, siblings, parent_bit in effects:
+            if operation == BitTables.INCLUDE:
+                included |= mask
+            elif operation == BitTables.EXCLUDE:
+                included &= ~mask
+                if parent_bit and not included & siblings:
+                    included &= ~parent_bit
+            else:
+                pending |= mask
+
+        self.Included = included
+        self.PendingResponse = pending
+        self.Executed = executed
+        return False
+
+    def mask_is_blocked(self, index):
+        """
+        Checks if the activity with the index is blocked by a condition or milestone
+        :param index: the index of the activity
+        :return: True if blocked, False if not
+        """
+        tables = self.Tables
+        if tables.MilestoneSources[index] & self.Included & self.PendingResponse:
+            return True
+        if tables.ConditionSources[index] & self.Included & ~self.Executed:
+            return True
+        context = self.GuardContext
+        for guard, source_bit in tables.GuardedMilestones[index]:
+            if source_bit & self.Included & self.PendingResponse and (context is None or guard(context)):
+                return True
+        for guard, source_bit in tables.GuardedConditions[index]:
+            if source_bit & self.Included & ~self.Executed and (context is None or guard(context)):
+                return True
+        return False
+
+    def is_accepting(self):
+        """
+        Checks if the marking is accepting, i.e. no included activity is still pending
+        :return: True if no included activity is pending, False if not
+        """
+        return not self.PendingResponse & self.Included
+
+    def is_included(self, node):
+        """
+        Checks if the node is included
+        :param node: the node
+        :return: True if included, False if not
+        """
+        return self.Included >> node.Index & 1 == 1
+
+    def is_pending(self, node):
+        """
+        Checks if the node is an included pending response
+        :param node: the node
+        :return: True if included and pending, False if not
+        """
+        return (self.Included & self.PendingResponse) >> node.Index & 1 == 1
+
+    def is_executed(self, node):
+        """
+        Checks if the node is executed
+        :param node: the node
+        :return: True if executed, False if not
+        """
+        return self.Executed >> node.Index & 1 == 1
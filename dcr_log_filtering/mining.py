@@ -0,0 +1,141 @@
+# coding=utf-8
+"""
+The module implements the discovery stage. The registered pm4py miners are run concurrently in separate processes on
+the already loaded filtered log, every miner has its own timeout and its wall time and peak memory are recorded
+"""
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+
+import pm4py.discovery as discovery
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, the peak memory is not recorded there
+    resource = None
+
+# The registered miners, the name of the miner is also the suffix of the Results/ files
+miners = {
+    'alpha': 'discover_petri_net_alpha',
+    'alpha_plus': 'discover_petri_net_alpha_plus',
+    'heuristics': 'discover_petri_net_heuristics',
+    'ilp': 'discover_petri_net_ilp',
+    'inductive': 'discover_petri_net_inductive'
+}
+
+
+class MinerResult(object):
+    """
+    The result of one miner
+    """
+
+    def __init__(self, miner_name, status, petri_net=None, wall_time=None, peak_memory=None, error=None):
+        """
+        Constructor of a miner result
+        :param miner_name: the name of the miner
+        :param status: ok, timeout or error
+        :param petri_net: tuple of the net, the initial and the final marking if the miner finished
+        :param wall_time: the wall time of the miner in seconds
+        :param peak_memory: the peak resident memory of the miner process in KiB
+        :param error: the error message if the miner failed
+        """
+        self.MinerName = miner_name
+        self.Status = status
+        self.PetriNet = petri_net
+        self.WallTime = wall_time
+        self.PeakMemory = peak_memory
+        self.Error = error
+
+
+def get_miner(miner_name):
+    """
+    Gets the pm4py discovery function of a registered miner
+    :param miner_name: the name of the miner
+    :return: the discovery function
+    """
+    if miner_name not in miners:
+        raise ValueError('The miner {} is not registered'.format(miner_name))
+    miner = getattr(discovery, miners[miner_name], None)
+    if miner is None:
+        raise ValueError('The miner {} is not available in the installed pm4py version'.format(miner_name))
+    return miner
+
+
+def __run_miner(miner_name, log, connection):
+    """
+    Runs a miner in the worker process and sends the result to the parent process
+    :param miner_name: the name of the miner
+    :param log: the filtered log
+    :param connection: the pipe to the parent process
+    """
+    start_time = time.perf_counter()
+    try:
+        petri_net = get_miner(miner_name)(log)
+        message = ('ok', petri_net, None)
+    except Exception as e:
+        message = ('error', None, repr(e))
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None
+    connection.send(message + (time.perf_counter() - start_time, peak_memory))
+    connection.close()
+
+
+def run_miners(log, miner_names=None, timeout=None, max_parallel=None):
+    """
+    Runs the miners concurrently, each in its own process. The log is handed to the processes by fork where it is
+    available, thus it is loaded only once. A miner that exceeds the timeout is terminated without blocking the others
+    :param log: the filtered log
+    :param miner_names: the names of the miners, all registered miners if None
+    :param timeout: seconds after which a miner is terminated, None for no timeout
+    :param max_parallel: the maximal number of miners running at once, None for the number of CPUs
+    :return: dict with the miner name as key and the MinerResult as value
+    """
+    if miner_names is None:
+        miner_names = list(miners)
+    for miner_name in miner_names:
+        if miner_name not in miners:
+            raise ValueError('The miner {} is not registered'.format(miner_name))
+    if max_parallel is None:
+        max_parallel = os.cpu_count() or 1
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+    results = {}
+    pending = list(miner_names)
+    running = {}
+    while pending or running:
+        while pending and len(running) < max_parallel:
+            miner_name = pending.pop(0)
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=__run_miner, args=(miner_name, log, sender), daemon=True)
+            process.start()
+            sender.close()
+            running[receiver] = (miner_name, process, time.perf_counter())
+
+        wait_time = None
+        if timeout is not None:
+            first_deadline = min(start_time for _, _, start_time in running.values()) + timeout
+            wait_time = max(0.0, first_deadline - time.perf_counter())
+        for receiver in wait(list(running), wait_time):
+            miner_name, process, start_time = running.pop(receiver)
+            try:
+                status, petri_net, error, wall_time, peak_memory = receiver.recv()
+            except EOFError:
+                status, petri_net, error = 'error', None, 'the miner process exited unexpectedly'
+                wall_time, peak_memory = time.perf_counter() - start_time, None
+            receiver.close()
+            process.join()
+            results[miner_name] = MinerResult(miner_name, status, petri_net, wall_time, peak_memory, error)
+
+        if timeout is not None:
+            now = time.perf_counter()
+            for receiver, (miner_name, process, start_time) in list(running.items()):
+                if now - start_time >= timeout:
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    results[miner_name] = MinerResult(miner_name, 'timeout', wall_time=now - start_time,
+                                                      error='timeout after {} seconds'.format(timeout))
+    return results
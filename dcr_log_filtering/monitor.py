@@ -0,0 +1,185 @@
+# coding=utf-8
+"""
+The module implements an online conformance monitor. Events (case id, activity, timestamp) are consumed one at a
+time, the live marking of every open case is kept and a violation is emitted as soon as an activity is blocked
+"""
+import json
+import socket
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import replay
+from marking import BitMarking
+
+# Marking key of a case that was blocked, further events of the case are not replayed
+VIOLATED = None
+
+
+class ConformanceMonitor(object):
+    """
+    Keeps the marking key of every open case in an OrderedDict ordered by the last activity of the case, thus idle
+    cases and the least recently active cases are evicted from its front
+    """
+
+    def __init__(self, dcr_graph, ca=None, max_open_cases=100000, idle_timeout=None, transition_cache=None,
+                 output=None):
+        """
+        Constructor of the monitor
+        :param dcr_graph: the graph the events are replayed on
+        :param ca: optional RuleViolation object the violating case ids are appended to
+        :param max_open_cases: the maximal number of cases kept in memory
+        :param idle_timeout: seconds without an event after which a case is closed, None keeps idle cases
+        :param transition_cache: optional TransitionCache
+        :param output: file the violations are written to as JSON lines, None for stdout
+        """
+        if max_open_cases <= 0:
+            raise ValueError('The number of open cases has to be positive')
+        replay.require_control_flow(dcr_graph, 'monitor')
+        self.Graph = dcr_graph
+        self.RuleViolation = ca
+        self.MaxOpenCases = max_open_cases
+        self.IdleTimeout = idle_timeout
+        self.TransitionCache = transition_cache
+        self.Output = output if output is not None else sys.stdout
+        self.Marking = BitMarking.get_initial_marking(dcr_graph)
+        self.InitialKey = self.Marking.get_key()
+        # case id -> (marking key or VIOLATED, time of the last event, number of events)
+        self.Cases = OrderedDict()
+        self.EventCount = 0
+        self.ViolationCount = 0
+
+    def process_event(self, case_id, activity_name, timestamp=None):
+        """
+        Replays an event on the live marking of its case
+        :param case_id: the case id
+        :param activity_name: the activity name
+        :param timestamp: the time of the event in seconds, the current time is used if it is None
+        :return: True if the event violated the graph, False if not
+        """
+        now = timestamp if timestamp is not None else time.time()
+        self.EventCount += 1
+        entry = self.Cases.pop(case_id, None)
+        if entry is None:
+            key = self.InitialKey
+            position = 0
+            if len(self.Cases) >= self.MaxOpenCases:
+                self.close_case(next(iter(self.Cases)), 'evicted')
+        else:
+            key, _, position = entry
+
+        violated = False
+        if key is not VIOLATED:
+            marking = self.Marking
+            marking.set_key(key)
+            if replay.perform_transition(marking, self.Graph.get_node_by_name(activity_name), self.TransitionCache):
+                self.emit_violation(case_id, activity_name, position, 'blocked')
+                key = VIOLATED
+                violated = True
+            else:
+                key = marking.get_key()
+        self.Cases[case_id] = (key, now, position + 1)
+
+        if self.IdleTimeout is not None:
+            self.evict_idle_cases(now)
+        return violated
+
+    def evict_idle_cases(self, now):
+        """
+        Closes all cases whose last event is older than the idle timeout
+        :param now: the current time in seconds
+        """
+        deadline = now - self.IdleTimeout
+        while self.Cases:
+            case_id, (_, last_seen, _) = next(iter(self.Cases.items()))
+            if last_seen >= deadline:
+                break
+            self.close_case(case_id, 'idle')
+
+    def close_case(self, case_id, reason='closed'):
+        """
+        Removes a case from the monitor, a violation is emitted if included activities are still pending
+        :param case_id: the case id
+        :param reason: why the case was closed, it is part of the emitted violation
+        """
+        key, _, position = self.Cases.pop(case_id)
+        if key is VIOLATED:
+            return
+        self.Marking.set_key(key)
+        if not self.Marking.is_accepting():
+            self.emit_violation(case_id, None, position, 'pending ({})'.format(reason))
+
+    def finish(self):
+        """
+        Closes all open cases at the end of the input
+        """
+        while self.Cases:
+            self.close_case(next(iter(self.Cases)))
+
+    def emit_violation(self, case_id, activity_name, position, reason):
+        """
+        Writes a violation as JSON line and records it in the RuleViolation object
+        :param case_id: the case id
+        :param activity_name: the blocked activity, None for pending responses
+        :param position: the position of the event in the case
+        :param reason: blocked or pending
+        """
+        self.ViolationCount += 1
+        self.Output.write(json.dumps({'case': case_id, 'activity': activity_name, 'position': position,
+                                      'reason': reason}) + '\n')
+        self.Output.flush()
+        if self.RuleViolation is not None:
+            self.RuleViolation.append_violating_trace_id(case_id)
+
+    def run(self, lines):
+        """
+        Processes JSON lines with the keys case, activity and optionally timestamp (ISO 8601)
+        :param lines: iterable of lines, e.g. read_lines
+        """
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                timestamp = record.get('timestamp')
+                if timestamp is not None:
+                    timestamp = datetime.fromisoformat(timestamp).timestamp()
+                self.process_event(record['case'], record['activity'], timestamp)
+            except (ValueError, KeyError, TypeError) as e:
+                print('Skipped malformed event {}: {}'.format(line, e), file=sys.stderr)
+
+
+def read_lines(source, follow=False, poll_interval=0.2):
+    """
+    Reads the lines of the event source
+    :param source: '-' for stdin, tcp://host:port to listen on a local socket, otherwise the path of a JSONL file
+    :param follow: if True new lines appended to the file are read until the process is stopped
+    :param poll_interval: seconds to wait for new lines of a followed file
+    :return: generator of lines
+    """
+    if source == '-':
+        yield from sys.stdin
+    elif source.startswith('tcp://'):
+        host, port = source[len('tcp://'):].rsplit(':', 1)
+        with socket.create_server((host, int(port))) as server:
+            while True:
+                connection, _ = server.accept()
+                with connection, connection.makefile('r', encoding='utf-8') as stream:
+                    yield from stream
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            partial = str()
+            while True:
+                line = f.readline()
+                if line.endswith('\n') or (line and not follow):
+                    yield partial + line
+                    partial = str()
+                elif line:
+                    # the writer has not finished the line yet
+                    partial += line
+                elif follow:
+                    time.sleep(poll_interval)
+                else:
+                    break
@@ -0,0 +1,229 @@
+# coding=utf-8
+"""
+The module implements the parallel conformance checking. The traces are split into chunks that are replayed in a
+process pool, every worker process loads the DCR graph once and returns the positions of the violating traces.
+For the columnar event log the workers attach to the memory-mapped sidecar of the log and only receive trace ranges.
+The hits and misses of the transition caches of the workers are added to the statistics of the caller
+"""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import eventlog_parser
+import log_cache
+import replay
+from graph import DCRGraph
+from marking import Marking
+from transition_cache import TransitionCache
+
+# The graph, marking engine and transition cache of a worker process, set once by init_worker, and the attached
+# columnar log with its node table and variant verdicts, set by init_columnar_worker
+__worker_state = {}
+
+
+def init_worker(xml_path, marking_class=Marking, transition_cache_size=0):
+    """
+    Initializer of a worker process, loads the DCR graph once per process
+    :param xml_path: path of the DCR graph xml
+    :param marking_class: the marking engine used for the replay
+    :param transition_cache_size: size of the transition cache of the worker, 0 disables it
+    """
+    __worker_state['graph'] = DCRGraph.get_graph_instance(xml_path)
+    __worker_state['marking_class'] = marking_class
+    __worker_state['transition_cache'] = TransitionCache(transition_cache_size) if transition_cache_size else None
+
+
+def get_cache_statistics(hits, misses):
+    """
+    Gets the hits and misses of the transition cache of the worker since a previous reading
+    :param hits: the hits of the previous reading
+    :param misses: the misses of the previous reading
+    :return: tuple of the new hits and misses
+    """
+    transition_cache = __worker_state['transition_cache']
+    if transition_cache is None:
+        return 0, 0
+    return transition_cache.Hits - hits, transition_cache.Misses - misses
+
+
+def add_cache_statistics(transition_cache, hits, misses):
+    """
+    Adds the hits and misses of a worker to the transition cache statistics of the caller
+    :param transition_cache: the TransitionCache of the caller or None
+    :param hits: the hits of the worker
+    :param misses: the misses of the worker
+    """
+    if transition_cache is not None:
+        transition_cache.Hits += hits
+        transition_cache.Misses += misses
+
+
+def replay_chunk(chunk):
+    """
+    Replays a chunk of traces in a worker process, equal activity sequences within the chunk are replayed once
+    :param chunk: tuple of the position of the first trace in the log and the list of activity name tuples
+    :return: tuple of the list of the positions of the violating traces in the log and the transition cache hits
+    and misses of the chunk
+    """
+    offset, activity_sequences = chunk
+    dcr_graph = __worker_state['graph']
+    marking_class = __worker_state['marking_class']
+    transition_cache = __worker_state['transition_cache']
+    statistics = get_cache_statistics(0, 0)
+    verdicts = {}
+    violating = []
+    for position, activity_names in enumerate(activity_sequences):
+        violated = verdicts.get(activity_names)
+        if violated is None:
+            violated = replay.check_activities(dcr_graph, activity_names, marking_class, transition_cache)
+            verdicts[activity_names] = violated
+        if violated:
+            violating.append(offset + position)
+    return (violating,) + get_cache_statistics(*statistics)
+
+
+def create_chunks(event_log, chunk_size):
+    """
+    Splits the traces of the event log into chunks that only contain the activity names
+    :param event_log: the event log
+    :param chunk_size: the number of traces per chunk
+    :return: generator of (position of the first trace, list of activity name tuples)
+    """
+    traces = event_log.Traces
+    for start in range(0, len(traces), chunk_size):
+        yield start, [tuple(event.EventName for event in trace.Events) for trace in traces[start:start + chunk_size]]
+
+
+def replay_parallel(xml_path, event_log, ca, marking_class=Marking, workers=None, chunk_size=1000,
+                    transition_cache_size=0, transition_cache=None):
+    """
+    Replays the event log in a process pool
+    :param xml_path: path of the DCR graph xml, loaded once by every worker
+    :param event_log: the event log
+    :param ca: the RuleViolation object the violating traces are appended to
+    :param marking_class: the marking engine used for the replay
+    :param workers: the number of worker processes, None for the number of CPUs
+    :param chunk_size: the number of traces per chunk
+    :param transition_cache_size: size of the transition cache of every worker, 0 disables it
+    :param transition_cache: optional TransitionCache of the caller the statistics of the workers are added to
+    """
+    if chunk_size <= 0:
+        raise ValueError('The chunk size has to be positive')
+    traces = event_log.Traces
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(xml_path, marking_class, transition_cache_size)) as executor:
+        for violating, hits, misses in executor.map(replay_chunk, create_chunks(event_log, chunk_size)):
+            add_cache_statistics(transition_cache, hits, misses)
+            if violating:
+                ca.append_variant_data([traces[position] for position in violating], True)
+
+
+def init_columnar_worker(xml_path, file_path, marking_class=Marking, transition_cache_size=0, sidecar_path=None):
+    """
+    Initializer of a worker process for the columnar event log, loads the DCR graph once per process and attaches
+    to the memory-mapped sidecar of the log, the pages of the log are shared by all workers
+    :param xml_path: path of the DCR graph xml
+    :param file_path: path of the XES file, its sidecar has to be valid
+    :param marking_class: the marking engine used for the replay
+    :param transition_cache_size: size of the transition cache of the worker, 0 disables it
+    :param sidecar_path: path of the sidecar, next to the XES file if None
+    """
+    init_worker(xml_path, marking_class, transition_cache_size)
+    columnar_log = log_cache.read_sidecar(file_path, sidecar_path=sidecar_path)
+    if columnar_log is None:
+        raise ValueError('The event log {} has no valid sidecar'.format(file_path))
+    dcr_graph = __worker_state['graph']
+    __worker_state['log'] = columnar_log
+    __worker_state['nodes'] = [dcr_graph.get_node_by_name(activity_name) for activity_name in columnar_log.Activities]
+    __worker_state['verdicts'] = {}
+
+
+def replay_range(trace_range):
+    """
+    Replays a range of traces of the memory-mapped log in a worker process, the verdicts of the variants are kept
+    by the worker for all of its ranges
+    :param trace_range: tuple of the position of the first trace and the position after the last trace
+    :return: tuple of the list of the positions of the violating traces in the log and the transition cache hits
+    and misses of the range
+    """
+    start, end = trace_range
+    dcr_graph = __worker_state['graph']
+    marking_class = __worker_state['marking_class']
+    transition_cache = __worker_state['transition_cache']
+    columnar_log = __worker_state['log']
+    nodes = __worker_state['nodes']
+    verdicts = __worker_state['verdicts']
+    statistics = get_cache_statistics(0, 0)
+    codes = columnar_log.Codes
+    offsets = columnar_log.Offsets[start:end + 1].tolist()
+    violating = []
+    for position in range(end - start):
+        variant_codes = codes[offsets[position]:offsets[position + 1]]
+        key = variant_codes.tobytes()
+        violated = verdicts.get(key)
+        if violated is None:
+            violated = replay.check_nodes(dcr_graph, (nodes[code] for code in variant_codes.tolist()),
+                                          marking_class, transition_cache)
+            verdicts[key] = violated
+        if violated:
+            violating.append(start + position)
+    return (violating,) + get_cache_statistics(*statistics)
+
+
+def replay_parallel_columnar(xml_path, file_path, ca, marking_class=Marking, workers=None, chunk_size=1000,
+                             transition_cache_size=0, use_sidecar=False, transition_cache=None):
+    """
+    Replays the columnar event log in a process pool without serializing traces, the workers memory-map the sidecar
+    of the log and only receive (start, end) trace ranges. With use_sidecar a valid sidecar next to the XES file is
+    reused or written for the next run, otherwise the log is parsed into a temporary sidecar that is removed afterwards
+    :param xml_path: path of the DCR graph xml, loaded once by every worker
+    :param file_path: path of the XES file
+    :param ca: the RuleViolation object the violating trace ids are appended to
+    :param marking_class: the marking engine used for the replay
+    :param workers: the number of worker processes, None for the number of CPUs
+    :param chunk_size: the number of traces per range
+    :param transition_cache_size: size of the transition cache of every worker, 0 disables it
+    :param use_sidecar: if True the sidecar next to the XES file is used
+    :param transition_cache: optional TransitionCache of the caller the statistics of the workers are added to
+    :return: the columnar event log
+    """
+    if chunk_size <= 0:
+        raise ValueError('The chunk size has to be positive')
+    if use_sidecar:
+        columnar_log = eventlog_parser.get_columnar_event_log(file_path, use_sidecar=True)
+        replay_ranges(xml_path, file_path, None, columnar_log, ca, marking_class, workers, chunk_size,
+                      transition_cache_size, transition_cache)
+        return columnar_log
+    columnar_log = eventlog_parser.get_columnar_event_log(file_path)
+    with tempfile.TemporaryDirectory() as sidecar_dir:
+        sidecar_path = os.path.join(sidecar_dir, os.path.basename(log_cache.get_sidecar_path(file_path)))
+        log_cache.write_sidecar(columnar_log, file_path, sidecar_path)
+        replay_ranges(xml_path, file_path, sidecar_path, columnar_log, ca, marking_class, workers, chunk_size,
+                      transition_cache_size, transition_cache)
+    return columnar_log
+
+
+def replay_ranges(xml_path, file_path, sidecar_path, columnar_log, ca, marking_class, workers, chunk_size,
+                  transition_cache_size, transition_cache):
+    """
+    Replays the trace ranges of a columnar event log whose sidecar is written in a process pool
+    :param xml_path: path of the DCR graph xml
+    :param file_path: path of the XES file
+    :param sidecar_path: path of the sidecar, next to the XES file if None
+    :param columnar_log: the columnar event log
+    :param ca: the RuleViolation object the violating trace ids are appended to
+    :param marking_class: the marking engine used for the replay
+    :param workers: the number of worker processes, None for the number of CPUs
+    :param chunk_size: the number of traces per range
+    :param transition_cache_size: size of the transition cache of every worker, 0 disables it
+    :param transition_cache: optional TransitionCache of the caller the statistics of the workers are added to
+    """
+    trace_count = len(columnar_log)
+    trace_ranges = [(start, min(start + chunk_size, trace_count)) for start in range(0, trace_count, chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_columnar_worker,
+                             initargs=(xml_path, file_path, marking_class, transition_cache_size,
+                                       sidecar_path)) as executor:
+        for violating, hits, misses in executor.map(replay_range, trace_ranges):
+            add_cache_statistics(transition_cache, hits, misses)
+            if violating:
+                ca.append_violating_trace_ids(columnar_log.TraceIds[violating].tolist())
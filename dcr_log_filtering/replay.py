@@ -0,0 +1,433 @@
+# coding=utf-8
+"""
+This module contains the replay of activity sequences on a DCR graph, it is shared by the replay modes of main.py
+"""
+import numpy as np
+
+from expr import GuardContext
+from marking import Marking
+from roles import RoleTable, CONTROL_FLOW_VIOLATION, ROLE_VIOLATION
+from timed import CaseTimer, TimingTable, TIME_VIOLATION, to_seconds
+
+
+def perform_transition(marking, node, transition_cache=None):
+    """
+    Performs the transition of a node on the marking, through the transition cache if one is given
+    :param marking: the marking that is changed
+    :param node: the node that is executed
+    :param transition_cache: optional TransitionCache
+    :return: True if the node is blocked or not included, False if the transition was performed
+    """
+    if transition_cache is None:
+        return marking.perform_transition_node(node)
+    return transition_cache.perform_transition_node(marking, node)
+
+
+def require_control_flow(dcr_graph, mode):
+    """
+    Checks that the verdicts of the graph only depend on the activities of a trace, the modes that replay activity
+    names without the event data refuse graphs with guarded relations or timed constraints
+    :param dcr_graph: the graph
+    :param mode: the name of the mode in the error message
+    :raises ValueError: if the graph has guarded relations or timed constraints
+    """
+    if dcr_graph.has_guards():
+        raise ValueError('The graph has guarded relations, which the {} does not evaluate, '
+                         'use the trace replay'.format(mode))
+    if dcr_graph.has_timed_constraints():
+        raise ValueError('The graph has delays or deadlines, which the {} does not evaluate, '
+                         'use the trace replay'.format(mode))
+
+
+def check_activities(dcr_graph, activity_names, marking_class=Marking, transition_cache=None):
+    """
+    Replays a sequence of activities on the initial marking of the DCR graph
+    :param dcr_graph: the graph the activities are replayed on
+    :param activity_names: iterable of the activity names of a trace
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache, it is not thread safe
+    :return: True if the sequence violates the graph, False if it is conformant
+    """
+    return check_nodes(dcr_graph, (dcr_graph.get_node_by_name(activity_name) for activity_name in activity_names),
+                       marking_class, transition_cache)
+
+
+def check_trace(dcr_graph, trace, marking_class=Marking, role_table=None, timing_table=None):
+    """
+    Replays a trace with its event data, the guards of the relations are evaluated on the attributes of the trace,
+    of the current event and of the last execution of a referenced activity
+    :param dcr_graph: the graph the trace is replayed on
+    :param trace: the eventlog.Trace
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param role_table: optional RoleTable, if given the role of every event is checked
+    :param timing_table: optional TimingTable, if given the delays and deadlines are checked on the timestamps
+    :return: the reason of the first violation, CONTROL_FLOW_VIOLATION, ROLE_VIOLATION or TIME_VIOLATION,
+    or None if conformant
+    """
+    marking = marking_class.get_initial_marking(dcr_graph)
+    context = GuardContext(trace.TraceData)
+    marking.GuardContext = context
+    timer = CaseTimer(timing_table) if timing_table is not None else None
+    for event in trace.Events:
+        context.begin_event(event.Attributes)
+        node = dcr_graph.get_node_by_name(event.EventName)
+        if role_table is not None and node is not None and not role_table.is_allowed(node, event.Role):
+            return ROLE_VIOLATION
+        timestamp = to_seconds(event.Timestamp) if timer is not None else None
+        if timer is not None and timer.is_violated(marking, node, timestamp):
+            return TIME_VIOLATION
+        if marking.perform_transition_node(node):
+            return CONTROL_FLOW_VIOLATION
+        if timer is not None:
+            timer.record_event(marking, node, timestamp)
+        context.end_event(event.EventName)
+    return CONTROL_FLOW_VIOLATION if not marking.is_accepting() else None
+
+
+def check_activity_roles(dcr_graph, role_table, activity_names, roles, marking_class=Marking, transition_cache=None):
+    """
+    Replays a sequence of activities and checks that the role of every event may execute its activity
+    :param dcr_graph: the graph the activities are replayed on
+    :param role_table: the RoleTable of the graph
+    :param activity_names: the activity names of a trace
+    :param roles: the roles or resources of the events
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache
+    :return: the reason of the first violation, CONTROL_FLOW_VIOLATION or ROLE_VIOLATION, or None if conformant
+    """
+    allowed_roles = role_table.AllowedRoles
+    marking = marking_class.get_initial_marking(dcr_graph)
+    for activity_name, role in zip(activity_names, roles):
+        node = dcr_graph.get_node_by_name(activity_name)
+        if node is not None and not allowed_roles[node.Index] & role_table.get_role_bit(role):
+            return ROLE_VIOLATION
+        if perform_transition(marking, node, transition_cache):
+            return CONTROL_FLOW_VIOLATION
+    return CONTROL_FLOW_VIOLATION if not marking.is_accepting() else None
+
+
+def replay_roles(dcr_graph, traces, ca, marking_class=Marking, transition_cache=None):
+    """
+    Replays a stream of traces with role checking, equal sequences of activities and roles are replayed once
+    :param dcr_graph: the graph the traces are replayed on
+    :param traces: iterable of (trace id, activity names, roles, timestamps),
+    e.g. eventlog_parser.iterate_trace_events with attributes
+    :param ca: the RuleViolation object the violating trace ids and the reasons are appended to
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache
+    :return: the number of replayed traces
+    """
+    role_table = RoleTable(dcr_graph)
+    reasons = {}
+    trace_count = 0
+    for trace_id, activity_names, roles, _ in traces:
+        key = (activity_names, roles)
+        if key in reasons:
+            reason = reasons[key]
+        else:
+            reason = check_activity_roles(dcr_graph, role_table, activity_names, roles, marking_class,
+                                          transition_cache)
+            reasons[key] = reason
+        if reason is not None:
+            ca.append_violating_trace_id(trace_id, reason)
+        trace_count += 1
+    return trace_count
+
+
+def check_timed_activities(dcr_graph, timing_table, activity_names, timestamps, roles=None, role_table=None,
+                           marking_class=Marking, transition_cache=None):
+    """
+    Replays a sequence of activities and checks the delays and deadlines of the graph on the timestamps of the events
+    :param dcr_graph: the graph the activities are replayed on
+    :param timing_table: the TimingTable of the graph
+    :param activity_names: the activity names of a trace
+    :param timestamps: the timestamps of the events, events without timestamp are not checked
+    :param roles: optional roles or resources of the events, checked if the role table is given
+    :param role_table: optional RoleTable of the graph
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache
+    :return: the reason of the first violation, CONTROL_FLOW_VIOLATION, ROLE_VIOLATION or TIME_VIOLATION,
+    or None if conformant
+    """
+    marking = marking_class.get_initial_marking(dcr_graph)
+    timer = CaseTimer(timing_table)
+    for position, activity_name in enumerate(activity_names):
+        node = dcr_graph.get_node_by_name(activity_name)
+        if role_table is not None and node is not None and not role_table.is_allowed(node, roles[position]):
+            return ROLE_VIOLATION
+        timestamp = to_seconds(timestamps[position])
+        if timer.is_violated(marking, node, timestamp):
+            return TIME_VIOLATION
+        if perform_transition(marking, node, transition_cache):
+            return CONTROL_FLOW_VIOLATION
+        timer.record_event(marking, node, timestamp)
+    return CONTROL_FLOW_VIOLATION if not marking.is_accepting() else None
+
+
+def replay_timed(dcr_graph, traces, ca, marking_class=Marking, transition_cache=None, check_roles=False):
+    """
+    Replays a stream of traces with the timed constraints of the graph. The verdict depends on the timestamps,
+    therefore every trace is replayed on its own
+    :param dcr_graph: the graph the traces are replayed on
+    :param traces: iterable of (trace id, activity names, roles, timestamps),
+    e.g. eventlog_parser.iterate_trace_events with attributes
+    :param ca: the RuleViolation object the violating trace ids and the reasons are appended to
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache
+    :param check_roles: if True the role of every event is checked as well
+    :return: the number of replayed traces
+    """
+    timing_table = TimingTable(dcr_graph)
+    role_table = RoleTable(dcr_graph) if check_roles else None
+    trace_count = 0
+    for trace_id, activity_names, roles, timestamps in traces:
+        reason = check_timed_activities(dcr_graph, timing_table, activity_names, timestamps, roles, role_table,
+                                        marking_class, transition_cache)
+        if reason is not None:
+            ca.append_violating_trace_id(trace_id, reason)
+        trace_count += 1
+    return trace_count
+
+
+def check_nodes(dcr_graph, nodes, marking_class=Marking, transition_cache=None):
+    """
+    Replays a sequence of nodes on the initial marking of the DCR graph
+    :param dcr_graph: the graph the nodes are replayed on
+    :param nodes: iterable of the nodes of the activities of a trace, None for activities unknown to the graph
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache, it is not thread safe
+    :return: True if the sequence violates the graph, False if it is conformant
+    """
+    marking = marking_class.get_initial_marking(dcr_graph)
+    for node in nodes:
+        if perform_transition(marking, node, transition_cache):
+            return True
+    return not marking.is_accepting()
+
+
+def diagnose_nodes(dcr_graph, nodes, diagnostics, marking_class=Marking, transition_cache=None):
+    """
+    Replays a sequence of nodes like check_nodes and describes the violation, the blocking constraint is looked up
+    on the marking of the failed event, thus conformant sequences are replayed at the same cost
+    :param dcr_graph: the graph the nodes are replayed on
+    :param nodes: iterable of the nodes of the activities of a trace, None for activities unknown to the graph
+    :param diagnostics: the ViolationDiagnostics of the graph
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache, it is not thread safe
+    :return: the violation, see ViolationDiagnostics.add_violation, or None if the sequence is conformant
+    """
+    marking = marking_class.get_initial_marking(dcr_graph)
+    position = 0
+    for position, node in enumerate(nodes, 1):
+        if perform_transition(marking, node, transition_cache):
+            return diagnostics.get_blocked_violation(marking, node, position - 1)
+    if not marking.is_accepting():
+        return diagnostics.get_pending_violation(marking, position)
+    return None
+
+
+def replay_variants(dcr_graph, event_log, ca, marking_class=Marking, transition_cache=None, diagnostics=None):
+    """
+    Replays every trace variant of the event log once and hands the verdict to all traces of the variant
+    :param dcr_graph: the graph the variants are replayed on
+    :param event_log: the event log
+    :param ca: the RuleViolation object the violating traces are appended to
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache
+    :param diagnostics: optional ViolationDiagnostics the violations of the variants are counted in
+    :return: the number of variants of the event log
+    """
+    variants = event_log.get_variants()
+    for activity_names, traces in variants.items():
+        if diagnostics is not None:
+            violation = diagnose_nodes(dcr_graph, (dcr_graph.get_node_by_name(activity_name)
+                                                   for activity_name in activity_names),
+                                       diagnostics, marking_class, transition_cache)
+            if violation is not None:
+                diagnostics.add_violation(violation, len(traces))
+                ca.append_variant_data(traces, True)
+        elif check_activities(dcr_graph, activity_names, marking_class, transition_cache):
+            ca.append_variant_data(traces, True)
+    return len(variants)
+
+
+def replay_trace_stream(dcr_graph, traces, ca, marking_class=Marking, transition_cache=None, diagnostics=None):
+    """
+    Replays a stream of lightweight traces one at a time, only the ids of the violating traces are kept
+    :param dcr_graph: the graph the traces are replayed on
+    :param traces: iterable of (trace id, activity names), e.g. eventlog_parser.iterate_traces
+    :param ca: the RuleViolation object the violating trace ids are appended to
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache
+    :param diagnostics: optional ViolationDiagnostics the violations of the traces are counted in
+    :return: the number of replayed traces
+    """
+    trace_count = 0
+    for trace_id, activity_names in traces:
+        if diagnostics is not None:
+            violation = diagnose_nodes(dcr_graph, (dcr_graph.get_node_by_name(activity_name)
+                                                   for activity_name in activity_names),
+                                       diagnostics, marking_class, transition_cache)
+            if violation is not None:
+                diagnostics.add_violation(violation)
+                ca.append_violating_trace_id(trace_id)
+        elif check_activities(dcr_graph, activity_names, marking_class, transition_cache):
+            ca.append_violating_trace_id(trace_id)
+        trace_count += 1
+    return trace_count
+
+
+def replay_columnar(dcr_graph, columnar_log, ca, marking_class=Marking, transition_cache=None, diagnostics=None):
+    """
+    Replays every trace variant of a columnar event log once, the variants are grouped and replayed on the integer
+    activity codes, which are translated to the nodes of the graph by a table
+    :param dcr_graph: the graph the variants are replayed on
+    :param columnar_log: the ColumnarEventLog
+    :param ca: the RuleViolation object the violating trace ids are appended to
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache
+    :param diagnostics: optional ViolationDiagnostics the violations of the variants are counted in
+    :return: the number of variants of the event log
+    """
+    nodes = [dcr_graph.get_node_by_name(activity_name) for activity_name in columnar_log.Activities]
+    dtype = columnar_log.Codes.dtype
+    variants = columnar_log.get_variants()
+    violating = []
+    for key, trace_indices in variants.items():
+        codes = np.frombuffer(key, dtype=dtype).tolist()
+        if diagnostics is not None:
+            violation = diagnose_nodes(dcr_graph, (nodes[code] for code in codes), diagnostics, marking_class,
+                                       transition_cache)
+            if violation is not None:
+                diagnostics.add_violation(violation, len(trace_indices))
+                violating.extend(trace_indices)
+        elif check_nodes(dcr_graph, (nodes[code] for code in codes), marking_class, transition_cache):
+            violating.extend(trace_indices)
+    ca.append_violating_trace_ids(columnar_log.TraceIds[violating].tolist())
+    return len(variants)
+
+
+def check_activities_multi(dcr_graphs, activity_names, marking_class=Marking):
+    """
+    Replays a sequence of activities once on the initial markings of several DCR graphs, every activity advances
+    one marking per graph that is not violated yet
+    :param dcr_graphs: the graphs the activities are replayed on
+    :param activity_names: iterable of the activity names of a trace
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :return: list with True for every graph the sequence violates and False for every graph it conforms to
+    """
+    markings = [marking_class.get_initial_marking(dcr_graph) for dcr_graph in dcr_graphs]
+    violated = [False] * len(dcr_graphs)
+    open_graphs = list(range(len(dcr_graphs)))
+    for activity_name in activity_names:
+        still_open = []
+        for i in open_graphs:
+            if markings[i].perform_transition_node(dcr_graphs[i].get_node_by_name(activity_name)):
+                violated[i] = True
+            else:
+                still_open.append(i)
+        open_graphs = still_open
+        if not open_graphs:
+            break
+    for i in open_graphs:
+        violated[i] = not markings[i].is_accepting()
+    return violated
+
+
+def replay_multi_graph(dcr_graphs, traces, marking_class=Marking):
+    """
+    Checks a log against several DCR graphs in a single pass, every trace variant is walked once for all graphs
+    :param dcr_graphs: the graphs the traces are replayed on
+    :param traces: iterable of (trace id, activity names), e.g. eventlog_parser.iterate_traces
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :return: list with the set of violating trace ids of every graph
+    """
+    for dcr_graph in dcr_graphs:
+        require_control_flow(dcr_graph, 'multi graph replay')
+    violating = [set() for _ in dcr_graphs]
+    verdicts = {}
+    for trace_id, activity_names in traces:
+        activity_names = tuple(activity_names)
+        violated = verdicts.get(activity_names)
+        if violated is None:
+            violated = check_activities_multi(dcr_graphs, activity_names, marking_class)
+            verdicts[activity_names] = violated
+        for i, graph_violated in enumerate(violated):
+            if graph_violated:
+                violating[i].add(trace_id)
+    return violating
+
+
+class TraceTrie(object):
+    """
+    Prefix trie over the activity sequences of an event log. Every trie node stands for a prefix, the traces
+    are stored at the node of their complete activity sequence
+    """
+
+    def __init__(self):
+        """
+        Default constructor of a trie node
+        """
+        self.Children = {}
+        self.Traces = []
+
+    @staticmethod
+    def create_trace_trie(event_log):
+        """
+        Inserts the activity sequences of all traces of the event log into a trie
+        :param event_log: the event log
+        :return: the root of the trie
+        """
+        root = TraceTrie()
+        for trace in event_log.Traces:
+            trie_node = root
+            for event in trace.Events:
+                child = trie_node.Children.get(event.EventName)
+                if child is None:
+                    child = TraceTrie()
+                    trie_node.Children[event.EventName] = child
+                trie_node = child
+            trie_node.Traces.append(trace)
+        return root
+
+    def get_all_traces(self):
+        """
+        Gets the traces of this node and of all nodes below it
+        :return: list of traces
+        """
+        traces = []
+        stack = [self]
+        while stack:
+            trie_node = stack.pop()
+            traces.extend(trie_node.Traces)
+            stack.extend(trie_node.Children.values())
+        return traces
+
+
+def replay_trie(dcr_graph, event_log, ca, marking_class=Marking, transition_cache=None):
+    """
+    Replays the event log depth-first along a prefix trie of its traces. The marking is carried down the trie, thus
+    every shared prefix is executed once, and a subtree is pruned as violating as soon as an activity is blocked
+    :param dcr_graph: the graph the traces are replayed on
+    :param event_log: the event log
+    :param ca: the RuleViolation object the violating traces are appended to
+    :param marking_class: the marking engine used for the replay, Marking or BitMarking
+    :param transition_cache: optional TransitionCache
+    :return: the number of transitions that were executed
+    """
+    transitions = 0
+    stack = [(TraceTrie.create_trace_trie(event_log), marking_class.get_initial_marking(dcr_graph))]
+    while stack:
+        trie_node, marking = stack.pop()
+        if trie_node.Traces and not marking.is_accepting():
+            ca.append_variant_data(trie_node.Traces, True)
+        last = len(trie_node.Children) - 1
+        for position, (activity_name, child) in enumerate(trie_node.Children.items()):
+            # The last child can continue on the marking of its parent, all others need a copy
+            child_marking = marking if position == last else marking.copy()
+            transitions += 1
+            if perform_transition(child_marking, dcr_graph.get_node_by_name(activity_name), transition_cache):
+                ca.append_variant_data(child.get_all_traces(), True)
+            else:
+                stack.append((child, child_marking))
+    return transitions
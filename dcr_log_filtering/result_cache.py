@@ -0,0 +1,161 @@
+# coding=utf-8
+"""
+The module implements a content-addressed cache for conformance checking results. Results are keyed by the semantic
+hash of the DCR graph and the content hash of the event log, the verdicts are also kept per trace variant, thus a
+log with new cases only needs the replay of the variants that were not checked against the graph before
+"""
+import hashlib
+import os
+import pickle
+
+import replay
+from marking import Marking
+
+
+def get_file_fingerprint(file_path, block_size=1 << 20):
+    """
+    Gets the content hash of a file
+    :param file_path: path of the file
+    :param block_size: number of bytes read at once
+    :return: hex digest of the file content
+    """
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+class ResultCache(object):
+    """
+    Cache directory with the violating trace ids per (graph, event log) and the verdicts per (graph, variant).
+    If the directory grows beyond the maximal size the least recently used entries are removed
+    """
+
+    def __init__(self, cache_dir='Resources/cache', max_bytes=512 * 1024 * 1024):
+        """
+        Constructor of the result cache
+        :param cache_dir: the directory of the cache, it is created if it does not exist
+        :param max_bytes: the maximal size of the cache directory in bytes
+        """
+        self.CacheDir = cache_dir
+        self.MaxBytes = max_bytes
+        self.Hits = 0
+        self.Misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def __get_path(self, name):
+        """
+        Gets the path of an entry
+        :param name: the file name of the entry
+        :return: the path
+        """
+        return os.path.join(self.CacheDir, name)
+
+    def __load(self, name):
+        """
+        Loads an entry and marks it as recently used
+        :param name: the file name of the entry
+        :return: the entry or None if it does not exist or is corrupt
+        """
+        path = self.__get_path(name)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)
+            return entry
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def __store(self, name, entry):
+        """
+        Stores an entry and evicts old entries if the cache is too large
+        :param name: the file name of the entry
+        :param entry: the entry to be stored
+        """
+        path = self.__get_path(name)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(entry, f)
+        os.replace(path + '.tmp', path)
+        self.evict()
+
+    def get_violating_trace_ids(self, graph_hash, log_fingerprint):
+        """
+        Gets the violating trace ids of an event log that was checked against the graph before
+        :param graph_hash: semantic hash of the graph
+        :param log_fingerprint: content hash of the event log
+        :return: list of the violating trace ids or None if the combination is not cached
+        """
+        return self.__load('{}_{}.tauv'.format(graph_hash, log_fingerprint))
+
+    def put_violating_trace_ids(self, graph_hash, log_fingerprint, trace_ids):
+        """
+        Stores the violating trace ids of an event log
+        :param graph_hash: semantic hash of the graph
+        :param log_fingerprint: content hash of the event log
+        :param trace_ids: list of the violating trace ids
+        """
+        self.__store('{}_{}.tauv'.format(graph_hash, log_fingerprint), list(trace_ids))
+
+    def get_verdicts(self, graph_hash):
+        """
+        Gets the verdicts of all variants that were checked against the graph before
+        :param graph_hash: semantic hash of the graph
+        :return: dict with the tuple of activity names as key and True for violating variants as value
+        """
+        verdicts = self.__load('{}.verdicts'.format(graph_hash))
+        return verdicts if verdicts is not None else {}
+
+    def put_verdicts(self, graph_hash, verdicts):
+        """
+        Stores the verdicts of the variants checked against the graph
+        :param graph_hash: semantic hash of the graph
+        :param verdicts: dict with the tuple of activity names as key and the verdict as value
+        """
+        self.__store('{}.verdicts'.format(graph_hash), verdicts)
+
+    def replay_variants(self, dcr_graph, event_log, ca, marking_class=Marking, transition_cache=None):
+        """
+        Replays the variants of the event log that are not cached for the graph, the others get the cached verdict
+        :param dcr_graph: the graph the variants are replayed on
+        :param event_log: the event log
+        :param ca: the RuleViolation object the violating traces are appended to
+        :param marking_class: the marking engine used for the replay
+        :param transition_cache: optional TransitionCache
+        :return: the number of variants of the event log
+        """
+        graph_hash = dcr_graph.get_semantic_hash()
+        verdicts = self.get_verdicts(graph_hash)
+        variants = event_log.get_variants()
+        for activity_names, traces in variants.items():
+            violated = verdicts.get(activity_names)
+            if violated is None:
+                self.Misses += 1
+                violated = replay.check_activities(dcr_graph, activity_names, marking_class, transition_cache)
+                verdicts[activity_names] = violated
+            else:
+                self.Hits += 1
+            if violated:
+                ca.append_variant_data(traces, True)
+        self.put_verdicts(graph_hash, verdicts)
+        return len(variants)
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache is not larger than the maximal size
+        """
+        entries = []
+        total_bytes = 0
+        for name in os.listdir(self.CacheDir):
+            path = self.__get_path(name)
+            if not os.path.isfile(path) or name.endswith('.tmp'):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.MaxBytes:
+                break
+            os.remove(path)
+            total_bytes -= size
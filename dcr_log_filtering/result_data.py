@@ -20,6 +20,7 @@ class RuleViolation(object):
         self.ViolatingTraces = []
         self.ConformantTraces = []
         self.ConformantTraceIDs = []
+        self.ViolationReasons = {}
         self.Lock = threading.RLock()  # Used to make the class thread safe
         RuleViolation.analysis_data = self
 
@@ -28,17 +29,12 @@ class RuleViolation(object):
         Creates a dict from the Violating traces
         :return: a dict with the process paths
         """
-        process_paths = {}
+        variant_counts = {}
         for trace in self.ViolatingTraces:
-            process_path = str()
-            for event in trace.Events:
-                process_path += "  -{}".format(event.EventName)
-            process_path = process_path.lstrip()[1:]
-            if process_path in process_paths:
-                process_paths[process_path] += 1
-            else:
-                process_paths[process_path] = 1
-        return process_paths
+            variant = tuple(event.EventName for event in trace.Events)
+            variant_counts[variant] = variant_counts.get(variant, 0) + 1
+        # the path is only joined once per variant
+        return {"  -".join(variant): count for variant, count in variant_counts.items()}
 
     def append_conformance_data(self, trace, violated):
         """
@@ -51,6 +47,9 @@ class RuleViolation(object):
         if violated:
             self.ViolatingTraces.append(trace)
             self.ViolatingTraceIDs.append(trace.TraceId)
+            if isinstance(violated, str):
+                # the reason of the violation, e.g. roles.ROLE_VIOLATION
+                self.ViolationReasons[trace.TraceId] = violated
         else:
             self.ConformantTraces.append(trace)
             self.ConformantTraceIDs.append(trace.TraceId)
@@ -59,3 +58,51 @@ class RuleViolation(object):
         # Release lock for next thread
         self.Lock.release()
 
+    def append_violating_trace_id(self, trace_id, reason=None):
+        """
+        Thread safe method to add the id of a violating trace without keeping the trace itself
+        :param trace_id: the id of the violating trace
+        :param reason: optional reason of the violation, e.g. roles.ROLE_VIOLATION
+        """
+        self.Lock.acquire()
+        self.ViolatingTraceIDs.append(trace_id)
+        if reason is not None:
+            self.ViolationReasons[trace_id] = reason
+        self.Lock.release()
+
+    def get_violation_counts(self):
+        """
+        Counts the violating traces per reason of the violation
+        :return: dict with the reason as key and the number of traces as value
+        """
+        counts = {}
+        for reason in self.ViolationReasons.values():
+            counts[reason] = counts.get(reason, 0) + 1
+        return counts
+
+    def append_violating_trace_ids(self, trace_ids):
+        """
+        Thread safe method to add the ids of several violating traces at once
+        :param trace_ids: the ids of the violating traces
+        """
+        self.Lock.acquire()
+        self.ViolatingTraceIDs.extend(trace_ids)
+        self.Lock.release()
+
+    def append_variant_data(self, traces, violated):
+        """
+        Thread safe method to add the conformance analysis result of one variant to all traces of the variant
+        :param traces: the traces that share the variant
+        :param violated: True if the variant violated the graph
+        """
+        self.Lock.acquire()
+
+        if violated:
+            self.ViolatingTraces.extend(traces)
+            self.ViolatingTraceIDs.extend(trace.TraceId for trace in traces)
+        else:
+            self.ConformantTraces.extend(traces)
+            self.ConformantTraceIDs.extend(trace.TraceId for trace in traces)
+
+        self.Lock.release()
+
@@ -0,0 +1,82 @@
+# coding=utf-8
+"""
+The module implements the role checking of the replay. The roles and resources are interned to integer ids and
+every activity has a precomputed bitmask of its allowed roles, thus an event is checked with a single AND
+"""
+from graph import DCRGraph
+
+# The reasons of a violation
+CONTROL_FLOW_VIOLATION = 'control-flow'
+ROLE_VIOLATION = 'role'
+
+# Allowed role mask of an activity without roles, every role may execute it
+ALL_ROLES = -1
+
+
+class RoleTable(object):
+    """
+    The interned roles of a graph and the allowed roles of its activities
+    """
+
+    def __init__(self, dcr_graph: DCRGraph):
+        """
+        Interns the roles of the activities and compiles their allowed role masks
+        :param dcr_graph: the graph
+        """
+        self.RoleIds = {}
+        self.RoleBits = {}
+        self.AllowedRoles = [ALL_ROLES] * len(dcr_graph.Nodes)
+        for node in dcr_graph.Nodes:
+            mask = 0
+            for role in node.Roles:
+                if role:
+                    mask |= self.get_role_bit(role)
+            if mask:
+                self.AllowedRoles[node.Index] = mask
+        # A nested activity without roles of its own has the roles of its nesting activity
+        for node in dcr_graph.Nodes:
+            nesting_activity = getattr(node, 'NestingActivity', None)
+            if self.AllowedRoles[node.Index] == ALL_ROLES and nesting_activity is not None:
+                self.AllowedRoles[node.Index] = self.AllowedRoles[nesting_activity.Index]
+
+    def get_role_id(self, role):
+        """
+        Gets the id of a role, a role that was not seen before gets the next id
+        :param role: the role or resource name
+        :return: the id of the role
+        """
+        role_id = self.RoleIds.get(role)
+        if role_id is None:
+            role_id = len(self.RoleIds)
+            self.RoleIds[role] = role_id
+            self.RoleBits[role] = 1 << role_id
+        return role_id
+
+    def get_role_bit(self, role):
+        """
+        Gets the bit of a role in the allowed role masks, an event without role or resource is not checked
+        :param role: the role or resource name, None or empty if the event has none
+        :return: the bit of the role, ALL_ROLES for a missing role
+        """
+        if not role:
+            return ALL_ROLES
+        role_bit = self.RoleBits.get(role)
+        if role_bit is None:
+            role_bit = 1 << self.get_role_id(role)
+        return role_bit
+
+    def has_roles(self):
+        """
+        Checks if any activity is restricted to roles
+        :return: True if an activity has roles, False if every role may execute every activity
+        """
+        return any(mask != ALL_ROLES for mask in self.AllowedRoles)
+
+    def is_allowed(self, node, role):
+        """
+        Checks if a role may execute an activity
+        :param node: the node of the activity
+        :param role: the role or resource of the event
+        :return: True if the role is allowed, False if not
+        """
+        return bool(self.AllowedRoles[node.Index] & self.get_role_bit(role))
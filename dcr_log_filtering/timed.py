@@ -0,0 +1,166 @@
+# coding=utf-8
+"""
+The module implements the timed constraints of DCR graphs. A condition with a time is a delay, its target may only
+be executed once the delay has passed since the last execution of the source. A response with a time is a deadline,
+the target has to be executed before the deadline has passed. The deadlines of a case are kept in a heap keyed by
+their timestamp, thus the expired deadlines are found in amortized O(log n) per event
+"""
+import heapq
+import re
+from datetime import datetime
+
+import conn
+
+# The reason of a violation of a delay or a deadline
+TIME_VIOLATION = 'time'
+
+__duration_pattern = re.compile(r'^P(?:(?P<years>\d+(?:[.,]\d+)?)Y)?(?:(?P<months>\d+(?:[.,]\d+)?)M)?'
+                                r'(?:(?P<weeks>\d+(?:[.,]\d+)?)W)?(?:(?P<days>\d+(?:[.,]\d+)?)D)?'
+                                r'(?:T(?:(?P<hours>\d+(?:[.,]\d+)?)H)?(?:(?P<minutes>\d+(?:[.,]\d+)?)M)?'
+                                r'(?:(?P<seconds>\d+(?:[.,]\d+)?)S)?)?$')
+
+# Seconds of the duration units, a year has 365 and a month 30 days
+__unit_seconds = {'years': 365 * 86400, 'months': 30 * 86400, 'weeks': 7 * 86400, 'days': 86400, 'hours': 3600,
+                  'minutes': 60, 'seconds': 1}
+
+
+def parse_duration(duration: str):
+    """
+    Parses an ISO 8601 duration like P2D or PT1H30M
+    :param duration: the duration
+    :return: the duration in seconds or None if the duration is empty
+    """
+    if duration is None or not duration.strip():
+        return None
+    match = __duration_pattern.match(duration.strip().upper())
+    if match is None or duration.strip().upper() in ('P', 'PT') or duration.strip().upper().endswith('T'):
+        raise ValueError('The duration {} is not an ISO 8601 duration'.format(duration))
+    seconds = 0.0
+    for unit, value in match.groupdict().items():
+        if value is not None:
+            seconds += float(value.replace(',', '.')) * __unit_seconds[unit]
+    return seconds
+
+
+def to_seconds(timestamp):
+    """
+    Converts the timestamp of an event to seconds since the epoch
+    :param timestamp: datetime, ISO 8601 string, numpy datetime64 or None
+    :return: the seconds or None if the event has no timestamp
+    """
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    if isinstance(timestamp, str):
+        if not timestamp:
+            return None
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+    if hasattr(timestamp, 'astype'):
+        # numpy datetime64, NaT is not equal to itself
+        if timestamp != timestamp:
+            return None
+        return timestamp.astype('datetime64[us]').astype('int64') / 1e6
+    return float(timestamp)
+
+
+class TimingTable(object):
+    """
+    The timed constraints of a graph by the index of the activity they are checked for
+    """
+
+    def __init__(self, dcr_graph):
+        """
+        Collects the delays and deadlines of the graph
+        :param dcr_graph: the graph
+        """
+        self.Delays = [()] * len(dcr_graph.Nodes)
+        self.Deadlines = [()] * len(dcr_graph.Nodes)
+        for connection in dcr_graph.Connections:
+            if connection.Time is None:
+                continue
+            if isinstance(connection, conn.Condition):
+                target = connection.EndNode.Index
+                self.Delays[target] += ((connection, connection.StartNode.Index, connection.Time),)
+            elif isinstance(connection, conn.Response):
+                # a response to a nesting activity makes its nested activities pending as well
+                source = connection.StartNode.Index
+                for target in (connection.EndNode,) + tuple(getattr(connection.EndNode, 'Activities', ())):
+                    self.Deadlines[source] += ((connection, target, connection.Time),)
+        # a nested activity is delayed by the conditions of its nesting activities and starts their deadlines
+        delays = list(self.Delays)
+        deadlines = list(self.Deadlines)
+        for node in dcr_graph.Nodes:
+            nesting_activity = getattr(node, 'NestingActivity', None)
+            while nesting_activity is not None:
+                self.Delays[node.Index] += delays[nesting_activity.Index]
+                self.Deadlines[node.Index] += deadlines[nesting_activity.Index]
+                nesting_activity = getattr(nesting_activity, 'NestingActivity', None)
+
+
+class CaseTimer(object):
+    """
+    The timing state of a case: the last execution of every activity and the pending deadlines
+    """
+
+    def __init__(self, timing_table: TimingTable):
+        """
+        Constructor of the timing state of a case
+        :param timing_table: the TimingTable of the graph
+        """
+        self.Table = timing_table
+        self.LastExecution = {}
+        # The current deadline of every target, the heap may contain outdated entries that are skipped
+        self.Deadlines = {}
+        self.Heap = []
+
+    def is_violated(self, marking, node, timestamp):
+        """
+        Checks if a deadline expired before the event or if a delay of the activity has not passed yet
+        :param marking: the marking before the event
+        :param node: the node of the activity
+        :param timestamp: the seconds of the event, events without timestamp are not checked
+        :return: True if a timed constraint is violated, False if not
+        """
+        if timestamp is None:
+            return False
+        heap = self.Heap
+        while heap and heap[0][0] < timestamp:
+            deadline, _, target = heapq.heappop(heap)
+            if self.Deadlines.get(target.Index) != deadline:
+                continue
+            del self.Deadlines[target.Index]
+            if marking.is_pending(target):
+                return True
+        if node is not None:
+            for connection, source, delay in self.Table.Delays[node.Index]:
+                executed_at = self.LastExecution.get(source)
+                if executed_at is not None and timestamp - executed_at < delay \
+                        and marking.is_included(connection.StartNode) and connection.is_active(marking):
+                    return True
+        return False
+
+    def record_event(self, marking, node, timestamp):
+        """
+        Records an executed event, its own deadline is met and the deadlines of its timed responses start
+        :param marking: the marking after the transition, the guards of the responses are evaluated on it
+        :param node: the node of the activity
+        :param timestamp: the seconds of the event
+        """
+        if node is None or timestamp is None:
+            return
+        index = node.Index
+        nesting_activity = getattr(node, 'NestingActivity', None)
+        while nesting_activity is not None:
+            self.LastExecution[nesting_activity.Index] = timestamp
+            nesting_activity = getattr(nesting_activity, 'NestingActivity', None)
+        self.LastExecution[index] = timestamp
+        self.Deadlines.pop(index, None)
+        for connection, target, deadline in self.Table.Deadlines[index]:
+            if not connection.is_active(marking):
+                continue
+            due = timestamp + deadline
+            current = self.Deadlines.get(target.Index)
+            if current is None or due < current:
+                self.Deadlines[target.Index] = due
+                heapq.heappush(self.Heap, (due, target.Index, target))
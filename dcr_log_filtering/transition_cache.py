@@ -0,0 +1,67 @@
+# coding=utf-8
+"""
+The module implements a memoized transition table of a DCR graph. Since the reachable state space of a graph is
+usually small, most transitions of a long replay are found in the table after a short warm-up
+"""
+from collections import OrderedDict
+
+
+class TransitionCache(object):
+    """
+    Bounded LRU table that maps (marking key, activity index) to (successor marking key, verdict)
+    """
+
+    def __init__(self, max_size=None):
+        """
+        Constructor of the transition cache
+        :param max_size: the maximal number of cached transitions, None for an unbounded cache
+        """
+        if max_size is not None and max_size <= 0:
+            raise ValueError('The size of the transition cache has to be positive')
+        self.MaxSize = max_size
+        self.Transitions = OrderedDict()
+        self.Hits = 0
+        self.Misses = 0
+
+    def perform_transition_node(self, marking, node):
+        """
+        Performs the transition of the node on the marking, either by a lookup in the table or by performing and
+        recording it
+        :param marking: Marking or BitMarking that is changed by the transition
+        :param node: node that is executed
+        :return: True if the node is blocked or not included, False if the transition was performed
+        """
+        if node is None:
+            return False
+        key = (marking.get_key(), node.Index)
+        entry = self.Transitions.get(key)
+        if entry is not None:
+            self.Hits += 1
+            self.Transitions.move_to_end(key)
+            marking.set_key(entry[0])
+            return entry[1]
+
+        self.Misses += 1
+        violated = marking.perform_transition_node(node)
+        self.Transitions[key] = (marking.get_key(), violated)
+        if self.MaxSize is not None and len(self.Transitions) > self.MaxSize:
+            self.Transitions.popitem(last=False)
+        return violated
+
+    def get_hit_ratio(self):
+        """
+        Gets the ratio of the lookups that were answered from the table
+        :return: the hit ratio between 0 and 1
+        """
+        lookups = self.Hits + self.Misses
+        if lookups == 0:
+            return 0.0
+        return self.Hits / lookups
+
+    def clear(self):
+        """
+        Removes all cached transitions and resets the counters
+        """
+        self.Transitions.clear()
+        self.Hits = 0
+        self.Misses = 0
@@ -0,0 +1,139 @@
+# coding=utf-8
+import os
+import sys
+
+import pytest
+
+# the modules of the package import each other by their plain names
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'dcr_log_filtering')))
+
+NESTED_GRAPH = """<dcrgraph title="nested">
+    <specification>
+        <resources>
+            <events>
+                <event id="A"><custom><roles><role>Clerk</role></roles></custom></event>
+                <event id="N" type="nesting">
+                    <custom><roles><role/></roles></custom>
+                    <event id="B"><custom><roles><role/></roles></custom></event>
+                    <event id="C"><custom><roles><role/></roles></custom></event>
+                </event>
+                <event id="D"><custom><roles><role/></roles></custom></event>
+                <event id="E"><custom><roles><role/></roles></custom></event>
+            </events>
+            <labelMappings>
+                <labelMapping eventId="A" labelId="a"/>
+                <labelMapping eventId="N" labelId="n"/>
+                <labelMapping eventId="B" labelId="b"/>
+                <labelMapping eventId="C" labelId="c"/>
+                <labelMapping eventId="D" labelId="d"/>
+                <labelMapping eventId="E" labelId="e"/>
+            </labelMappings>
+            <expressions/>
+        </resources>
+        <constraints>
+            <conditions>
+                <condition sourceId="A" targetId="N"/>
+                <condition sourceId="N" targetId="D"/>
+            </conditions>
+            <responses>
+                <response sourceId="A" targetId="N"/>
+                <response sourceId="B" targetId="E"/>
+            </responses>
+            <excludes>
+                <exclude sourceId="D" targetId="N"/>
+                <exclude sourceId="E" targetId="B"/>
+                <exclude sourceId="E" targetId="C"/>
+            </excludes>
+            <includes>
+                <include sourceId="D" targetId="C"/>
+                <include sourceId="A" targetId="B"/>
+            </includes>
+            <milestones>
+                <milestone sourceId="E" targetId="D"/>
+            </milestones>
+        </constraints>
+    </specification>
+    <runtime>
+        <marking>
+            <executed/>
+            <included>
+                <event id="A"/><event id="N"/><event id="B"/><event id="C"/><event id="D"/><event id="E"/>
+            </included>
+            <pendingResponses/>
+        </marking>
+    </runtime>
+</dcrgraph>
+"""
+
+
+@pytest.fixture
+def nested_graph(tmp_path):
+    """
+    Graph with the nesting activity N of B and C, the labels are the lower case activity ids
+    """
+    from graph import DCRGraph
+    xml_path = tmp_path / 'nested.xml'
+    xml_path.write_text(NESTED_GRAPH)
+    return DCRGraph(str(xml_path))
+
+
+FLAT_GRAPH = """<dcrgraph title="flat">
+    <specification>
+        <resources>
+            <events>
+                <event id="A"><custom><roles><role/></roles></custom></event>
+                <event id="B"><custom><roles><role/></roles></custom></event>
+                <event id="C"><custom><roles><role/></roles></custom></event>
+            </events>
+            <labelMappings>
+                <labelMapping eventId="A" labelId="a"/>
+                <labelMapping eventId="B" labelId="b"/>
+                <labelMapping eventId="C" labelId="c"/>
+            </labelMappings>
+            <expressions>{expressions}</expressions>
+        </resources>
+        <constraints>
+            {constraints}
+        </constraints>
+    </specification>
+    <runtime>
+        <marking>
+            <executed/>
+            <included><event id="A"/><event id="B"/><event id="C"/></included>
+            <pendingResponses/>
+        </marking>
+    </runtime>
+</dcrgraph>
+"""
+
+
+@pytest.fixture
+def create_flat_graph(tmp_path):
+    """
+    Factory of graphs with the activities A, B and C labelled a, b and c
+    """
+    from graph import DCRGraph
+
+    def create(constraints, expressions=''):
+        xml_path = tmp_path / 'flat.xml'
+        xml_path.write_text(FLAT_GRAPH.format(constraints=constraints, expressions=expressions))
+        return DCRGraph(str(xml_path))
+    return create
+
+
+@pytest.fixture
+def guarded_graph(create_flat_graph):
+    """
+    Graph where a is a condition of b if the amount is above 1000 and the type is urgent
+    """
+    return create_flat_graph(
+        '<conditions><condition sourceId="A" targetId="B" expressionId="g"/></conditions>',
+        '<expression id="g" value="amount &gt; 1000 &amp;&amp; type = &quot;urgent&quot;"/>')
+
+
+@pytest.fixture
+def timed_graph(create_flat_graph):
+    """
+    Graph where b must happen at least an hour after a
+    """
+    return create_flat_graph('<conditions><condition sourceId="A" targetId="B" time="PT1H"/></conditions>')
@@ -0,0 +1,91 @@
+# coding=utf-8
+import os
+import shutil
+from random import Random
+
+import pytest
+
+import automaton
+import replay
+from automaton import DCRAutomaton, StateExplosionError
+from eventlog import Event, EventLog, Trace
+from graph import DCRGraph
+from marking import BitMarking
+from result_data import RuleViolation
+
+RESOURCES = os.path.join(os.path.dirname(__file__), '..', 'dcr_log_filtering', 'Resources')
+GRAPHS = ['BPI2019_strict.xml', 'ETM.xml', 'Hospital_Billing.xml']
+
+
+def create_event_log(dcr_graph, count=300, max_length=15, seed=3):
+    """
+    Creates a log of random sequences of the activities of the graph and an activity the graph does not know
+    """
+    activity_names = sorted(dcr_graph.NameMappings) + ['unknown']
+    random = Random(seed)
+    event_log = EventLog()
+    for trace_id in range(count):
+        trace = Trace(str(trace_id))
+        for _ in range(random.randint(0, max_length)):
+            trace.append_event(Event(random.choice(activity_names), '', None))
+        event_log.append_trace(trace)
+    return event_log
+
+
+def assert_same_verdicts(dcr_graph, dcr_automaton):
+    event_log = create_event_log(dcr_graph)
+    expected = RuleViolation()
+    replay.replay_variants(dcr_graph, event_log, expected, BitMarking)
+    ca = RuleViolation()
+    automaton.replay_automaton(dcr_automaton, event_log, ca)
+    assert sorted(ca.ViolatingTraceIDs) == sorted(expected.ViolatingTraceIDs)
+    assert 0 < len(ca.ViolatingTraceIDs) < len(event_log.Traces)
+
+
+@pytest.mark.parametrize('file_name', GRAPHS)
+def test_automaton_agrees_with_the_variant_replay(file_name):
+    dcr_graph = DCRGraph(os.path.join(RESOURCES, file_name))
+    assert_same_verdicts(dcr_graph, DCRAutomaton.compile_graph(dcr_graph))
+
+
+def test_automaton_agrees_with_the_variant_replay_on_the_nested_graph(nested_graph):
+    assert_same_verdicts(nested_graph, DCRAutomaton.compile_graph(nested_graph))
+
+
+def test_state_explosion(nested_graph, tmp_path):
+    xml_path = tmp_path / 'nested.xml'
+    automaton_path = str(tmp_path / 'nested.automaton')
+    state_count = DCRAutomaton.compile_graph(nested_graph).get_state_count()
+    with pytest.raises(StateExplosionError):
+        automaton.get_automaton(nested_graph, str(xml_path), automaton_path, max_states=state_count - 1)
+    # nothing is saved, the variant replay the callers fall back to is not affected
+    assert not os.path.exists(automaton_path)
+    dcr_automaton = automaton.get_automaton(nested_graph, str(xml_path), automaton_path, max_states=state_count)
+    assert dcr_automaton.get_state_count() == state_count
+
+
+def test_saved_automaton_is_reused(nested_graph, tmp_path, monkeypatch):
+    xml_path = str(tmp_path / 'nested.xml')
+    automaton_path = str(tmp_path / 'nested.automaton')
+    compiled = automaton.get_automaton(nested_graph, xml_path, automaton_path)
+
+    def compile_graph(*args, **kwargs):
+        raise AssertionError('the saved automaton was not reused')
+    monkeypatch.setattr(DCRAutomaton, 'compile_graph', compile_graph)
+    loaded = automaton.get_automaton(nested_graph, xml_path, automaton_path)
+    assert loaded.Fingerprint == compiled.Fingerprint
+    assert loaded.Transitions == compiled.Transitions
+
+
+def test_saved_automaton_of_a_changed_graph_is_rejected(tmp_path):
+    xml_path = str(tmp_path / 'graph.xml')
+    automaton_path = str(tmp_path / 'graph.automaton')
+    shutil.copy(os.path.join(RESOURCES, 'BPI2019_loose.xml'), xml_path)
+    automaton.get_automaton(DCRGraph(xml_path), xml_path, automaton_path)
+
+    shutil.copy(os.path.join(RESOURCES, 'BPI2019_strict.xml'), xml_path)
+    dcr_graph = DCRGraph(xml_path)
+    dcr_automaton = automaton.get_automaton(dcr_graph, xml_path, automaton_path)
+    assert dcr_automaton.Fingerprint == DCRAutomaton.get_fingerprint(xml_path)
+    assert DCRAutomaton.load(automaton_path).Fingerprint == dcr_automaton.Fingerprint
+    assert_same_verdicts(dcr_graph, dcr_automaton)
@@ -0,0 +1,99 @@
+# coding=utf-8
+import csv
+
+import pytest
+
+import replay
+from diagnostics import ViolationDiagnostics, CONDITION, EXCLUDED, MILESTONE, PENDING
+from marking import Marking, BitMarking
+from result_data import RuleViolation
+
+TRACES = [
+    ('1', ('b',)),
+    ('2', ('d',)),
+    ('3', ('a', 'b', 'c', 'd')),
+    ('4', ('a', 'e', 'b')),
+    ('5', ('a',)),
+    # e excludes b and c and with them the nest, nothing is pending
+    ('6', ('a', 'b', 'e')),
+    ('7', ('a', 'b', 'e', 'c')),
+]
+
+
+def replay_prefix(dcr_graph, marking_class, activity_names):
+    marking = marking_class.get_initial_marking(dcr_graph)
+    for activity_name in activity_names:
+        assert not marking.perform_transition_node(dcr_graph.get_node_by_name(activity_name))
+    return marking
+
+
+def get_connection_id(dcr_graph, kind, source, target):
+    return next(constraint_id for constraint_id, connection in enumerate(dcr_graph.Connections)
+                if type(connection).__name__.lower() == kind and connection.StartNode.ActivityName == source
+                and connection.EndNode.ActivityName == target)
+
+
+@pytest.mark.parametrize('marking_class', [Marking, BitMarking])
+@pytest.mark.parametrize('prefix, activity_name, expected', [
+    # the condition a -> n of the nest blocks its activity b
+    ((), 'b', (CONDITION, 'a', 'n')),
+    ((), 'd', (CONDITION, 'n', 'd')),
+    # b leaves e pending, the milestone e -> d blocks d
+    (('a', 'b', 'c'), 'd', (MILESTONE, 'e', 'd')),
+    (('a', 'e'), 'b', (EXCLUDED, '', 'b')),
+])
+def test_blocking_constraint(nested_graph, marking_class, prefix, activity_name, expected):
+    violation_diagnostics = ViolationDiagnostics(nested_graph)
+    marking = replay_prefix(nested_graph, marking_class, prefix)
+    node = nested_graph.get_node_by_name(activity_name)
+    assert marking.perform_transition_node(node)
+    constraint_id = violation_diagnostics.get_blocking_id(marking, node)
+    assert violation_diagnostics.get_constraint_description(constraint_id) == expected
+    if expected[0] == EXCLUDED:
+        assert constraint_id == violation_diagnostics.get_excluded_id(node)
+    else:
+        assert constraint_id == get_connection_id(nested_graph, *expected)
+
+
+@pytest.mark.parametrize('marking_class', [Marking, BitMarking])
+@pytest.mark.parametrize('activity_names, pending', [
+    # the response a -> n leaves the nest and both its activities pending
+    (('a',), ('b', 'c', 'n')),
+    (('a', 'b'), ('c', 'n', 'e')),
+    (('a', 'b', 'c'), ('e',)),
+    (('a', 'b', 'c', 'e'), ()),
+])
+def test_pending_violation(nested_graph, marking_class, activity_names, pending):
+    violation_diagnostics = ViolationDiagnostics(nested_graph)
+    marking = replay_prefix(nested_graph, marking_class, activity_names)
+    constraint_ids, position, activity = violation_diagnostics.get_pending_violation(marking, len(activity_names))
+    assert sorted(constraint_ids) == sorted(violation_diagnostics.get_pending_id(nested_graph.get_node_by_name(name))
+                                            for name in pending)
+    assert all(violation_diagnostics.get_constraint_description(constraint_id)[0] == PENDING
+               for constraint_id in constraint_ids)
+    assert (position, activity) == (len(activity_names), None)
+
+
+@pytest.mark.parametrize('marking_class', [Marking, BitMarking])
+def test_counts_match_the_violating_traces(nested_graph, marking_class, tmp_path):
+    violation_diagnostics = ViolationDiagnostics(nested_graph)
+    ca = RuleViolation()
+    replay.replay_trace_stream(nested_graph, TRACES, ca, marking_class, diagnostics=violation_diagnostics)
+    assert sorted(ca.ViolatingTraceIDs) == ['1', '2', '3', '4', '5', '7']
+    assert violation_diagnostics.TraceCount == len(ca.ViolatingTraceIDs)
+
+    # every blocked trace is counted once at its blocking constraint and at the activity it stopped at
+    blocked_traces = violation_diagnostics.ActivityCounts.sum()
+    assert blocked_traces == 5
+    assert violation_diagnostics.Counts[:violation_diagnostics.ConnectionCount + violation_diagnostics.NodeCount] \
+        .sum() == blocked_traces
+    pending_ids = range(violation_diagnostics.ConnectionCount + violation_diagnostics.NodeCount,
+                        len(violation_diagnostics.Counts))
+    assert all(violation_diagnostics.Counts[pending_id] <= violation_diagnostics.TraceCount - blocked_traces for pending_id in pending_ids)
+
+    report_path = tmp_path / 'report.csv'
+    violation_diagnostics.write_report(str(report_path))
+    with open(report_path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [int(row['traces']) for row in rows] == sorted((int(row['traces']) for row in rows), reverse=True)
+    assert sum(int(row['traces']) for row in rows if row['kind'] != PENDING) == blocked_traces
@@ -0,0 +1,36 @@
+# coding=utf-8
+import numpy as np
+import pytest
+
+from evaluation import UNLABELED, get_confusion_matrices, get_label_array, get_prediction_array, get_reports
+
+TRACE_IDS = ['t1', 't2', 't3', 't4', 't5', 't6']
+
+
+def test_labels_and_predictions_are_aligned_with_the_traces():
+    labels = get_label_array(TRACE_IDS, ['t5', 't1', 't3', 't2', 't4'], [1, 0, 1, 0, 1])
+    assert labels.tolist() == [0, 0, 1, 1, 1, UNLABELED]
+    assert get_prediction_array(TRACE_IDS, {'t2', 't3', 't4', 't6'}).tolist() == [0, 1, 1, 1, 0, 1]
+
+
+def test_confusion_matrices():
+    y_true = np.array([0, 0, 1, 1, 1, UNLABELED])
+    y_preds = np.array([[0, 1, 1, 1, 0, 1], [1, 1, 1, 1, 1, 0]])
+    confusion_matrices = get_confusion_matrices(y_true, y_preds)
+    assert confusion_matrices.tolist() == [[[1, 1], [1, 2]], [[0, 2], [0, 3]]]
+
+
+def test_report_of_a_known_confusion_matrix():
+    report = get_reports(np.array([[[1, 1], [1, 2]]]))[0]
+    # rows precision, recall, f1-score, support and columns 0, 1, accuracy, macro avg, weighted avg
+    assert report[:, 0] == pytest.approx([0.5, 0.5, 0.5, 2])
+    assert report[:, 1] == pytest.approx([2 / 3, 2 / 3, 2 / 3, 3])
+    assert report[0, 2] == pytest.approx(0.6)
+    assert report[:3, 3] == pytest.approx([7 / 12] * 3)
+    assert report[:3, 4] == pytest.approx([0.6] * 3)
+    assert report[3, 3] == report[3, 4] == 5
+
+
+def test_report_without_predicted_class_is_zero():
+    report = get_reports(np.array([[[0, 2], [0, 3]]]))[0]
+    assert report[0, 0] == 0 and report[2, 0] == 0
@@ -0,0 +1,57 @@
+# coding=utf-8
+import pytest
+
+from expr import BooleanExpression, ConstantExpression, Expression, GuardContext, parse_guard, tokenize_guard
+
+
+def evaluate(guard, **attributes):
+    context = GuardContext()
+    context.begin_event(attributes)
+    return guard.compile_guard()(context)
+
+
+def test_tokenize_keeps_operators_in_quoted_values():
+    assert tokenize_guard("a == 'x && y' || (b > 1)") == ["a == 'x && y'", '||', '(', 'b > 1', ')']
+
+
+def test_and_binds_stronger_than_or():
+    guard = parse_guard('a == 1 || b == 1 && c == 1')
+    assert isinstance(guard, BooleanExpression) and guard.Operator == BooleanExpression.OR
+    assert isinstance(guard.Operands[0], Expression)
+    assert isinstance(guard.Operands[1], BooleanExpression) and guard.Operands[1].Operator == BooleanExpression.AND
+    assert evaluate(guard, a='1', b='0', c='0')
+    assert not evaluate(guard, a='0', b='1', c='0')
+
+
+def test_parentheses_override_precedence():
+    guard = parse_guard('(a == 1 || b == 1) && c == 1')
+    assert guard.Operator == BooleanExpression.AND
+    assert not evaluate(guard, a='1', b='0', c='0')
+    assert evaluate(guard, a='0', b='1', c='1')
+
+
+def test_quoted_literal_is_a_string():
+    guard = parse_guard("a == 'x && y'")
+    assert isinstance(guard, Expression)
+    assert evaluate(guard, a='x && y')
+    assert not evaluate(guard, a='x')
+
+
+def test_constants_are_folded():
+    assert isinstance(parse_guard('true && a == 1'), Expression)
+    assert isinstance(parse_guard('false && a == 1'), ConstantExpression)
+    assert parse_guard('false && a == 1').Value is False
+    assert parse_guard('a == 1 || true').Value is True
+    assert isinstance(parse_guard('a == 1 && a == 1'), Expression)
+
+
+@pytest.mark.parametrize('expression, message', [
+    ('(a == 1', 'unbalanced parenthesis'),
+    ("a == 'x", 'unterminated string'),
+    ('a == 1 &&', 'ends unexpectedly'),
+    ('a == 1 )', r'Unexpected \)'),
+    ('|| a == 1', r'Unexpected \|\|'),
+])
+def test_invalid_guards(expression, message):
+    with pytest.raises(ValueError, match=message):
+        parse_guard(expression)
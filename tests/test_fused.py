@@ -0,0 +1,82 @@
+# coding=utf-8
+import pytest
+
+import cleaner
+import eventlog_parser
+import fused
+import replay
+from marking import Marking, BitMarking
+from result_data import RuleViolation
+
+CONSTRAINTS = """<conditions><condition sourceId="A" targetId="B"/></conditions>
+            <responses><response sourceId="A" targetId="C"/></responses>"""
+
+TRACES = [
+    ('1', ('a', 'c')),
+    ('2', ('b',)),
+    ('3', ('a', 'b', 'c')),
+    ('4', ('a', 'b')),
+    ('5', ()),
+    ('6', ('c', 'unknown')),
+]
+
+
+def create_xes(traces):
+    lines = ['<?xml version="1.0" encoding="UTF-8" ?>',
+             '<log xes.version="1.0" xmlns="http://www.xes-standard.org/">',
+             '  <extension name="Concept" prefix="concept" uri="http://www.xes-standard.org/concept.xesext"/>',
+             '  <string key="concept:name" value="log"/>']
+    for trace_id, activity_names in traces:
+        lines.append('  <trace>')
+        lines.append('    <string key="concept:name" value="{}"/>'.format(trace_id))
+        for position, activity_name in enumerate(activity_names):
+            lines.append('    <event><string key="concept:name" value="{}"/>'
+                         '<date key="time:timestamp" value="2020-01-0{}T00:00:00.000+00:00"/></event>'
+                         .format(activity_name, position + 1))
+        lines.append('  </trace>')
+    lines.append('</log>')
+    return '\n'.join(lines) + '\n'
+
+
+@pytest.fixture
+def dcr_graph(create_flat_graph):
+    return create_flat_graph(CONSTRAINTS)
+
+
+@pytest.fixture
+def xes_path(tmp_path):
+    path = tmp_path / 'log.xes'
+    path.write_text(create_xes(TRACES))
+    return str(path)
+
+
+@pytest.mark.parametrize('marking_class', [Marking, BitMarking])
+def test_exactly_the_conformant_traces_are_written(dcr_graph, xes_path, tmp_path, marking_class):
+    output_path = str(tmp_path / 'filtered.xes')
+    ca = RuleViolation()
+    fused.check_and_filter(dcr_graph, xes_path, output_path, ca, marking_class)
+
+    conformant = [(trace_id, activity_names) for trace_id, activity_names in TRACES
+                  if not replay.check_activities(dcr_graph, activity_names, marking_class)]
+    assert [trace_id for trace_id, _ in conformant] == ['1', '3', '5', '6']
+    assert sorted(ca.ViolatingTraceIDs) == ['2', '4']
+    assert [(trace_id, tuple(activity_names)) for trace_id, activity_names
+            in eventlog_parser.iterate_traces(output_path)] == conformant
+
+
+def test_output_equals_the_filtered_log(dcr_graph, xes_path, tmp_path):
+    fused_path = str(tmp_path / 'fused.xes')
+    ca = RuleViolation()
+    fused.check_and_filter(dcr_graph, xes_path, fused_path, ca)
+    filtered_path = str(tmp_path / 'filtered.xes')
+    assert cleaner.filter_event_log(xes_path, filtered_path, ca.ViolatingTraceIDs)
+    with open(fused_path) as fused_file, open(filtered_path) as filtered_file:
+        assert fused_file.read() == filtered_file.read()
+
+
+def test_events_of_the_conformant_traces_are_collected(dcr_graph, xes_path, tmp_path):
+    events = fused.check_and_filter(dcr_graph, xes_path, str(tmp_path / 'filtered.xes'), RuleViolation(),
+                                    collect_events=True)
+    assert [(trace_id, activity_name) for trace_id, activity_name, _ in events] == [
+        ('1', 'a'), ('1', 'c'), ('3', 'a'), ('3', 'b'), ('3', 'c'), ('6', 'c'), ('6', 'unknown')]
+    assert events[1][2] == '2020-01-02T00:00:00.000+00:00'
@@ -0,0 +1,50 @@
+# coding=utf-8
+import os
+
+import pytest
+
+from graph import DCRGraph
+from marking import Marking, BitMarking
+
+RESOURCES = os.path.join(os.path.dirname(__file__), '..', 'dcr_log_filtering', 'Resources')
+
+
+@pytest.fixture
+def graph():
+    return DCRGraph(os.path.join(RESOURCES, 'BPI2019_strict.xml'))
+
+
+def assert_indexes_consistent(dcr_graph, removed):
+    assert [node.Index for node in dcr_graph.Nodes] == list(range(len(dcr_graph.Nodes)))
+    assert removed not in dcr_graph.OutgoingConnections
+    assert removed not in dcr_graph.IncomingConnections
+    assert removed not in dcr_graph.TransitionConnections
+    for connection in dcr_graph.Connections:
+        assert connection.StartNode is not removed and connection.EndNode is not removed
+    for connections in dcr_graph.OutgoingConnections.values():
+        assert all(connection in dcr_graph.Connections for connection in connections)
+    for incoming in dcr_graph.IncomingConnections.values():
+        for connections in incoming.values():
+            assert all(connection in dcr_graph.Connections for connection in connections)
+    for connections in dcr_graph.TransitionConnections.values():
+        assert all(connection in dcr_graph.Connections for connection in connections)
+
+
+def test_remove_node_removes_its_connections(graph):
+    node = max(graph.Nodes, key=lambda n: len(graph.get_connections_incoming(n.ActivityId)))
+    assert graph.get_connections_incoming(node.ActivityId)
+    graph.remove_node(node)
+    assert_indexes_consistent(graph, node)
+    for marking_class in (Marking, BitMarking):
+        assert marking_class.get_initial_marking(graph) is not None
+
+
+def test_remove_nesting_activity_updates_its_children(nested_graph):
+    graph = nested_graph
+    nest = graph.get_node('N')
+    children = list(nest.Activities)
+    graph.remove_node(nest)
+    assert_indexes_consistent(graph, nest)
+    for child in children:
+        assert child.NestingActivity is None
+        assert graph.get_transition_connections(child) == graph.OutgoingConnections[child]
@@ -0,0 +1,78 @@
+# coding=utf-8
+import pytest
+
+import replay
+from incremental import IncrementalState
+from marking import BitMarking
+
+CONSTRAINTS = """<conditions><condition sourceId="A" targetId="B"/></conditions>
+            <responses><response sourceId="A" targetId="C"/></responses>
+            <excludes><exclude sourceId="C" targetId="A"/></excludes>"""
+
+
+@pytest.fixture
+def dcr_graph(create_flat_graph):
+    return create_flat_graph(CONSTRAINTS)
+
+
+def replay_all(dcr_graph, traces):
+    """
+    Gets the violating trace ids of a full replay of the event log
+    """
+    return sorted(trace_id for trace_id, activity_names in traces
+                  if replay.check_activities(dcr_graph, activity_names, BitMarking))
+
+
+def check_update(state, dcr_graph, traces):
+    result = state.update(dcr_graph, traces)
+    assert sorted(state.get_violating_trace_ids()) == replay_all(dcr_graph, traces)
+    return result
+
+
+def test_appended_events_are_resumed(dcr_graph):
+    state = IncrementalState(dcr_graph.get_semantic_hash())
+    assert check_update(state, dcr_graph, [('1', ('a',)), ('2', ('a', 'c'))]) == (2, 0, 3)
+    assert state.get_violating_trace_ids() == ['1']
+    assert check_update(state, dcr_graph, [('1', ('a', 'c')), ('2', ('a', 'c', 'b')), ('3', ('b',))]) == (1, 2, 3)
+    assert state.get_violating_trace_ids() == ['3']
+
+
+def test_blocked_cases_keep_their_verdict(dcr_graph):
+    state = IncrementalState(dcr_graph.get_semantic_hash())
+    check_update(state, dcr_graph, [('1', ('b',))])
+    assert check_update(state, dcr_graph, [('1', ('b', 'a', 'c'))]) == (0, 0, 0)
+    assert state.get_violating_trace_ids() == ['1']
+
+
+@pytest.mark.parametrize('before, after', [
+    (('a', 'c'), ('a',)),
+    (('a', 'c', 'a'), ('a', 'c')),
+    (('b', 'a'), ('a',)),
+])
+def test_shrunk_cases_are_replayed_from_the_start(dcr_graph, before, after):
+    state = IncrementalState(dcr_graph.get_semantic_hash())
+    check_update(state, dcr_graph, [('1', before)])
+    assert check_update(state, dcr_graph, [('1', after)]) == (0, 0, len(after))
+
+
+def test_removed_cases_are_dropped(dcr_graph):
+    state = IncrementalState(dcr_graph.get_semantic_hash())
+    check_update(state, dcr_graph, [('1', ('a',)), ('2', ('b',)), ('3', ('a', 'c'))])
+    check_update(state, dcr_graph, [('3', ('a', 'c'))])
+    assert state.get_violating_trace_ids() == []
+    assert list(state.Cases) == ['3']
+
+
+def test_changed_graph_replays_all_cases(dcr_graph, create_flat_graph, tmp_path):
+    path = str(tmp_path / 'state.pickle')
+    traces = [('1', ('a', 'b')), ('2', ('a', 'c', 'b'))]
+    state = IncrementalState.load(path, dcr_graph)
+    check_update(state, dcr_graph, traces)
+    state.save(path)
+    assert IncrementalState.load(path, dcr_graph).Cases == state.Cases
+
+    changed_graph = create_flat_graph('<conditions><condition sourceId="C" targetId="B"/></conditions>')
+    state = IncrementalState.load(path, changed_graph)
+    assert state.Cases == {}
+    assert check_update(state, changed_graph, traces) == (2, 0, 5)
+    assert state.get_violating_trace_ids() == ['1']
@@ -0,0 +1,76 @@
+# coding=utf-8
+import os
+import struct
+
+import pytest
+
+import eventlog_parser
+import log_cache
+from eventlog import ColumnarEventLog
+
+XES = """<?xml version="1.0" encoding="UTF-8" ?>
+<log xes.version="1.0" xmlns="http://www.xes-standard.org/">
+  <trace>
+    <string key="concept:name" value="1"/>
+    <event><string key="concept:name" value="a"/></event>
+    <event><string key="concept:name" value="b"/></event>
+  </trace>
+  <trace>
+    <string key="concept:name" value="2"/>
+    <event><string key="concept:name" value="b"/></event>
+  </trace>
+</log>
+"""
+
+
+@pytest.fixture
+def xes_path(tmp_path):
+    path = tmp_path / 'log.xes'
+    path.write_text(XES)
+    columnar_log = ColumnarEventLog.create_columnar_event_log(eventlog_parser.iterate_trace_events(str(path)))
+    log_cache.write_sidecar(columnar_log, str(path))
+    assert os.path.exists(log_cache.get_sidecar_path(str(path)))
+    return path
+
+
+def test_sidecar_is_read(xes_path):
+    columnar_log = log_cache.read_sidecar(str(xes_path))
+    assert columnar_log.TraceIds.tolist() == ['1', '2']
+    assert columnar_log.get_activity_names(0) == ('a', 'b')
+
+
+def test_sidecar_is_valid_after_touch(xes_path):
+    stat = os.stat(xes_path)
+    os.utime(xes_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert log_cache.read_sidecar(str(xes_path)) is not None
+
+
+def test_sidecar_is_rejected_after_a_change_of_the_same_size(xes_path):
+    stat = os.stat(xes_path)
+    xes_path.write_text(XES.replace('value="b"', 'value="c"'))
+    os.utime(xes_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert os.path.getsize(xes_path) == stat.st_size
+    assert log_cache.read_sidecar(str(xes_path)) is None
+
+
+def test_sidecar_is_rejected_after_an_append(xes_path):
+    with open(xes_path, 'a') as f:
+        f.write('\n')
+    assert log_cache.read_sidecar(str(xes_path)) is None
+
+
+def test_sidecar_without_requested_column_is_rejected(xes_path):
+    assert log_cache.read_sidecar(str(xes_path), with_timestamps=True) is None
+
+
+def test_truncated_sidecar_is_rebuilt(xes_path):
+    sidecar_path = log_cache.get_sidecar_path(str(xes_path))
+    # the sidecar is cut after its header, the columns are missing
+    with open(sidecar_path, 'r+b') as f:
+        f.seek(len(log_cache.MAGIC))
+        header_length, = struct.unpack('<Q', f.read(8))
+        f.truncate(len(log_cache.MAGIC) + 8 + header_length)
+    assert log_cache.read_sidecar(str(xes_path)) is None
+    columnar_log = eventlog_parser.get_columnar_event_log(str(xes_path), use_sidecar=True)
+    assert columnar_log.get_activity_names(1) == ('b',)
+    assert log_cache.read_sidecar(str(xes_path)) is not None
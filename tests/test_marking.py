@@ -0,0 +1,66 @@
+# coding=utf-8
+import os
+from random import Random
+
+import pytest
+
+import replay
+from activity import DCRActivityNest
+from graph import DCRGraph
+from marking import Marking, BitMarking
+
+
+@pytest.mark.parametrize('marking_class', [Marking, BitMarking])
+def test_excluding_all_nested_activities_excludes_the_nest(nested_graph, marking_class):
+    # a includes the already included B, e excludes B and C, the nest N has no included activity left
+    marking = marking_class.get_initial_marking(nested_graph)
+    for activity_name in ('a', 'e'):
+        assert not marking.perform_transition_node(nested_graph.get_node_by_name(activity_name))
+    assert not marking.is_included(nested_graph.get_node('N'))
+
+
+def test_including_a_nested_activity_includes_the_nest_once(nested_graph):
+    marking = Marking.get_initial_marking(nested_graph)
+    assert not marking.perform_transition_node(nested_graph.get_node_by_name('a'))
+    assert marking.Included.count(nested_graph.get_node('N')) == 1
+
+
+RESOURCES = os.path.join(os.path.dirname(__file__), '..', 'dcr_log_filtering', 'Resources')
+
+
+def generate_sequences(dcr_graph, count=300, max_length=20, seed=7):
+    """
+    Generates random sequences of the activities of a graph, the nests are only executed through their activities
+    """
+    activity_names = sorted(node.ActivityName for node in dcr_graph.Nodes if not isinstance(node, DCRActivityNest))
+    random = Random(seed)
+    return [[random.choice(activity_names) for _ in range(random.randint(1, max_length))] for _ in range(count)]
+
+
+def get_state(dcr_graph, marking):
+    return [(marking.is_included(node), marking.is_executed(node), marking.is_pending(node))
+            for node in dcr_graph.Nodes]
+
+
+def assert_same_replay(dcr_graph):
+    for activity_names in generate_sequences(dcr_graph):
+        marking = Marking.get_initial_marking(dcr_graph)
+        bit_marking = BitMarking.get_initial_marking(dcr_graph)
+        for activity_name in activity_names:
+            node = dcr_graph.get_node_by_name(activity_name)
+            blocked = marking.perform_transition_node(node)
+            assert bit_marking.perform_transition_node(node) == blocked, activity_names
+            # a blocked activity leaves the marking unchanged, the rest of the sequence is replayed as well
+            assert get_state(dcr_graph, bit_marking) == get_state(dcr_graph, marking), activity_names
+        assert bit_marking.is_accepting() == marking.is_accepting(), activity_names
+        assert replay.check_activities(dcr_graph, activity_names, BitMarking) == \
+            replay.check_activities(dcr_graph, activity_names, Marking), activity_names
+
+
+@pytest.mark.parametrize('file_name', sorted(name for name in os.listdir(RESOURCES) if name.endswith('.xml')))
+def test_engines_agree_on_the_bundled_graphs(file_name):
+    assert_same_replay(DCRGraph(os.path.join(RESOURCES, file_name)))
+
+
+def test_engines_agree_on_the_nested_graph(nested_graph):
+    assert_same_replay(nested_graph)
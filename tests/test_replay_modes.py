@@ -0,0 +1,43 @@
+# coding=utf-8
+import pytest
+
+import fused
+import replay
+from incremental import IncrementalState
+from monitor import ConformanceMonitor
+from result_data import RuleViolation
+
+UNSUPPORTED_GRAPHS = [('guarded_graph', 'guarded'), ('timed_graph', 'delays or deadlines')]
+
+
+@pytest.fixture(params=UNSUPPORTED_GRAPHS, ids=[name for name, _ in UNSUPPORTED_GRAPHS])
+def unsupported_graph(request):
+    """
+    Graph whose verdicts depend on the event data, with the expected error message
+    """
+    name, message = request.param
+    return request.getfixturevalue(name), message
+
+
+def test_fused_replay_refuses_event_data(unsupported_graph, tmp_path):
+    dcr_graph, message = unsupported_graph
+    with pytest.raises(ValueError, match=message):
+        fused.check_and_filter(dcr_graph, str(tmp_path / 'log.xes'), str(tmp_path / 'out.xes'), RuleViolation())
+
+
+def test_incremental_replay_refuses_event_data(unsupported_graph):
+    dcr_graph, message = unsupported_graph
+    with pytest.raises(ValueError, match=message):
+        IncrementalState(dcr_graph.get_semantic_hash()).update(dcr_graph, [('1', ('b',))])
+
+
+def test_monitor_refuses_event_data(unsupported_graph):
+    dcr_graph, message = unsupported_graph
+    with pytest.raises(ValueError, match=message):
+        ConformanceMonitor(dcr_graph)
+
+
+def test_multi_graph_replay_refuses_event_data(unsupported_graph):
+    dcr_graph, message = unsupported_graph
+    with pytest.raises(ValueError, match=message):
+        replay.replay_multi_graph([dcr_graph], [('1', ('b',))])
@@ -0,0 +1,96 @@
+# coding=utf-8
+import os
+import time
+
+import pytest
+
+import replay
+from eventlog import Event, EventLog, Trace
+from marking import BitMarking
+from result_cache import ResultCache, get_file_fingerprint
+from result_data import RuleViolation
+
+CONSTRAINTS = """<conditions><condition sourceId="A" targetId="B"/></conditions>
+            <responses><response sourceId="A" targetId="C"/></responses>"""
+
+
+def create_event_log(traces):
+    event_log = EventLog()
+    for trace_id, activity_names in traces:
+        trace = Trace(trace_id)
+        for activity_name in activity_names:
+            trace.append_event(Event(activity_name, '', None))
+        event_log.append_trace(trace)
+    return event_log
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / 'cache'))
+
+
+def get_entry_path(cache, graph_hash, log_fingerprint):
+    return os.path.join(cache.CacheDir, '{}_{}.tauv'.format(graph_hash, log_fingerprint))
+
+
+def test_violating_trace_ids_hit_and_miss(cache):
+    assert cache.get_violating_trace_ids('graph', 'log') is None
+    cache.put_violating_trace_ids('graph', 'log', ('1', '3'))
+    assert cache.get_violating_trace_ids('graph', 'log') == ['1', '3']
+    assert cache.get_violating_trace_ids('other graph', 'log') is None
+    assert cache.get_violating_trace_ids('graph', 'other log') is None
+
+
+def test_corrupt_entry_is_a_miss(cache):
+    cache.put_violating_trace_ids('graph', 'log', ['1'])
+    with open(get_entry_path(cache, 'graph', 'log'), 'wb') as f:
+        f.write(b'\x80')
+    assert cache.get_violating_trace_ids('graph', 'log') is None
+
+
+def test_file_fingerprint_depends_on_the_content(tmp_path):
+    path = tmp_path / 'log.xes'
+    path.write_text('<log/>')
+    fingerprint = get_file_fingerprint(str(path), block_size=2)
+    assert fingerprint == get_file_fingerprint(str(path))
+    path.write_text('<Log/>')
+    assert get_file_fingerprint(str(path)) != fingerprint
+
+
+def test_variant_verdicts_hit_and_miss(cache, create_flat_graph):
+    dcr_graph = create_flat_graph(CONSTRAINTS)
+    traces = [('1', ('a', 'c')), ('2', ('b',)), ('3', ('a', 'c')), ('4', ('a',))]
+    expected = sorted(trace_id for trace_id, activity_names in traces
+                      if replay.check_activities(dcr_graph, activity_names, BitMarking))
+
+    ca = RuleViolation()
+    assert cache.replay_variants(dcr_graph, create_event_log(traces), ca, BitMarking) == 3
+    assert (cache.Hits, cache.Misses) == (0, 3)
+    assert sorted(ca.ViolatingTraceIDs) == expected == ['2', '4']
+
+    # a fresh cache on the same directory serves the known variants and only replays the new one
+    cache = ResultCache(cache.CacheDir)
+    ca = RuleViolation()
+    cache.replay_variants(dcr_graph, create_event_log(traces + [('5', ('a', 'b', 'c'))]), ca, BitMarking)
+    assert (cache.Hits, cache.Misses) == (3, 1)
+    assert sorted(ca.ViolatingTraceIDs) == expected
+    assert cache.get_verdicts(dcr_graph.get_semantic_hash())[('a', 'b', 'c')] is False
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.put_violating_trace_ids('graph', 'log 1', ['1'])
+    entry_size = os.path.getsize(get_entry_path(cache, 'graph', 'log 1'))
+    cache.MaxBytes = 2 * entry_size
+    cache.put_violating_trace_ids('graph', 'log 2', ['2'])
+    now = time.time()
+    for age, log_fingerprint in ((200, 'log 1'), (100, 'log 2')):
+        os.utime(get_entry_path(cache, 'graph', log_fingerprint), (now - age, now - age))
+
+    # reading the oldest entry marks it as recently used, the entry of log 2 is evicted instead
+    assert cache.get_violating_trace_ids('graph', 'log 1') == ['1']
+    cache.put_violating_trace_ids('graph', 'log 3', ['3'])
+    assert cache.get_violating_trace_ids('graph', 'log 2') is None
+    assert cache.get_violating_trace_ids('graph', 'log 1') == ['1']
+    assert cache.get_violating_trace_ids('graph', 'log 3') == ['3']
+    assert sum(os.path.getsize(os.path.join(cache.CacheDir, name)) for name in os.listdir(cache.CacheDir)) \
+        <= cache.MaxBytes
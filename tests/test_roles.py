@@ -0,0 +1,28 @@
+# coding=utf-8
+import os
+
+import pytest
+
+import replay
+from graph import DCRGraph
+from marking import BitMarking
+from roles import RoleTable, ROLE_VIOLATION
+
+RESOURCES = os.path.join(os.path.dirname(__file__), '..', 'dcr_log_filtering', 'Resources')
+
+
+@pytest.fixture
+def graph():
+    return DCRGraph(os.path.join(RESOURCES, 'Hospital_Billing_Resource.xml'))
+
+
+@pytest.mark.parametrize('role, allowed', [('ResB', True), ('ResA', False), ('', True), (None, True)])
+def test_is_allowed(graph, role, allowed):
+    assert RoleTable(graph).is_allowed(graph.get_node_by_name('BILLED'), role) == allowed
+
+
+@pytest.mark.parametrize('role', ['', None])
+def test_missing_role_is_not_a_role_violation(graph, role):
+    role_table = RoleTable(graph)
+    assert replay.check_activity_roles(graph, role_table, ('BILLED',), (role,), BitMarking) != ROLE_VIOLATION
+    assert replay.check_activity_roles(graph, role_table, ('BILLED',), ('ResA',), BitMarking) == ROLE_VIOLATION
@@ -0,0 +1,83 @@
+# coding=utf-8
+from datetime import datetime, timedelta
+
+import pytest
+
+import replay
+from graph import DCRGraph
+from marking import Marking, BitMarking
+from timed import TimingTable, TIME_VIOLATION, parse_duration
+
+NESTED_TIMED_GRAPH = """<dcrgraph title="nested timed">
+    <specification>
+        <resources>
+            <events>
+                <event id="A"><custom><roles><role/></roles></custom></event>
+                <event id="N" type="nesting">
+                    <custom><roles><role/></roles></custom>
+                    <event id="B"><custom><roles><role/></roles></custom></event>
+                    <event id="C"><custom><roles><role/></roles></custom></event>
+                </event>
+                <event id="D"><custom><roles><role/></roles></custom></event>
+            </events>
+            <labelMappings>
+                <labelMapping eventId="A" labelId="a"/>
+                <labelMapping eventId="N" labelId="n"/>
+                <labelMapping eventId="B" labelId="b"/>
+                <labelMapping eventId="C" labelId="c"/>
+                <labelMapping eventId="D" labelId="d"/>
+            </labelMappings>
+        </resources>
+        <constraints>
+            <conditions>
+                <condition sourceId="A" targetId="N" time="PT1H"/>
+            </conditions>
+            <responses>
+                <response sourceId="N" targetId="D" time="P1D"/>
+            </responses>
+        </constraints>
+    </specification>
+    <runtime>
+        <marking>
+            <executed/>
+            <included>
+                <event id="A"/><event id="N"/><event id="B"/><event id="C"/><event id="D"><custom><roles><role/></roles></custom></event>
+            </included>
+            <pendingResponses/>
+        </marking>
+    </runtime>
+</dcrgraph>
+"""
+
+START = datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def nested_graph(tmp_path):
+    xml_path = tmp_path / 'nested_timed.xml'
+    xml_path.write_text(NESTED_TIMED_GRAPH)
+    return DCRGraph(str(xml_path))
+
+
+def test_parse_duration():
+    assert parse_duration('P2D') == 2 * 86400
+    assert parse_duration('PT1H30M') == 5400
+    assert parse_duration('') is None
+    with pytest.raises(ValueError):
+        parse_duration('PT')
+
+
+@pytest.mark.parametrize('marking_class', [Marking, BitMarking])
+@pytest.mark.parametrize('hours, expected', [(2, None), (0.5, TIME_VIOLATION)])
+def test_delay_of_nesting_activity(nested_graph, marking_class, hours, expected):
+    timestamps = [START, START + timedelta(hours=hours), START + timedelta(hours=hours + 1)]
+    assert replay.check_timed_activities(nested_graph, TimingTable(nested_graph), ('a', 'b', 'd'), timestamps,
+                                         marking_class=marking_class) == expected
+
+
+@pytest.mark.parametrize('marking_class', [Marking, BitMarking])
+@pytest.mark.parametrize('days, expected', [(0.5, None), (2, TIME_VIOLATION)])
+def test_deadline_of_nesting_activity(nested_graph, marking_class, days, expected):
+    timestamps = [START, START + timedelta(hours=2), START + timedelta(hours=2, days=days)]
+    assert replay.check_timed_activities(nested_graph, TimingTable(nested_graph), ('a', 'c', 'd'), timestamps,
+                                         marking_class=marking_class) == expected